@@ -1,11 +1,15 @@
 """Main entry point for the bot."""
 
 import asyncio
+import functools
 
 from structlog import get_logger
 from telethon import events
 
+from app.bot.callback_data import Op
 from app.bot.client import bot
+from app.bot.completion_notifier import completion_notifier
+from app.bot.executor import Priority, handler_executor
 from app.bot.handlers.callbacks.account_management import (
     cancel_logout_callback,
     confirm_logout_account_callback,
@@ -15,6 +19,7 @@ from app.bot.handlers.callbacks.account_management import (
 from app.bot.handlers.callbacks.active_downloads import (
     active_download_callback,
     cancel_download_callback,
+    live_downloads_callback,
 )
 from app.bot.handlers.callbacks.delete import (
     delete_file_callback,
@@ -36,10 +41,14 @@ from app.bot.handlers.commands.login import login_handler
 from app.bot.handlers.commands.signup import signup_handler
 from app.bot.handlers.commands.start import start_handler
 from app.bot.handlers.messages.add_torrent import add_torrent_handler, handle_torrent_file
-from app.bot.handlers.messages.text_message import text_message_handler
+from app.bot.handlers.messages.text_message import is_keyboard_button, text_message_handler
+from app.bot.router import CallbackRouter
 from app.config import settings
 from app.database import close_db, init_db
 from app.database.session import validate_encryption_key
+from app.services.seedr import seedr_pool, token_writer
+from app.utils.metrics import report_metrics
+from app.utils.playlist import load_playlist_thumbnails
 
 logger = get_logger(__name__)
 
@@ -56,76 +65,116 @@ async def main():
     logger.info("Validating encryption key")
     await validate_encryption_key()
 
+    # Load static assets
+    load_playlist_thumbnails()
+
     # Start the bot
     logger.info("Connecting to Telegram")
     await bot.start(bot_token=settings.telegram_bot_token)  # type: ignore[]
 
     # Register handlers
     logger.info("Registering handlers")
+    handler_executor.start()
+    cheap = functools.partial(handler_executor.wrap, priority=Priority.CHEAP)
+    heavy = functools.partial(handler_executor.wrap, priority=Priority.HEAVY)
 
     # Command handlers
-    bot.add_event_handler(start_handler, events.NewMessage(pattern="/start"))
-    bot.add_event_handler(login_handler, events.NewMessage(pattern="/login"))
-    bot.add_event_handler(signup_handler, events.NewMessage(pattern="/signup"))
-    bot.add_event_handler(info_handler, events.NewMessage(pattern="/info"))
-    bot.add_event_handler(accounts_handler, events.NewMessage(pattern="/accounts"))
-    bot.add_event_handler(files_handler, events.NewMessage(pattern="/files"))
-    bot.add_event_handler(active_handler, events.NewMessage(pattern="/active"))
-    bot.add_event_handler(add_torrent_handler, events.NewMessage(pattern=r"(?s).*magnet:\?xt=[^\s]+.*"))
+    bot.add_event_handler(cheap(start_handler), events.NewMessage(pattern="/start"))
+    bot.add_event_handler(cheap(login_handler), events.NewMessage(pattern="/login"))
+    bot.add_event_handler(cheap(signup_handler), events.NewMessage(pattern="/signup"))
+    bot.add_event_handler(heavy(info_handler), events.NewMessage(pattern="/info"))
+    bot.add_event_handler(cheap(accounts_handler), events.NewMessage(pattern="/accounts"))
+    bot.add_event_handler(heavy(files_handler), events.NewMessage(pattern="/files"))
+    bot.add_event_handler(heavy(active_handler), events.NewMessage(pattern="/active"))
+    bot.add_event_handler(heavy(add_torrent_handler), events.NewMessage(pattern=r"(?s).*magnet:\?xt=[^\s]+.*"))
+
+    # Callback handlers are dispatched by the action encoded in their data
+    callback_router = CallbackRouter()
 
     # Callback handlers - Account
-    bot.add_event_handler(authorize_device_callback, events.CallbackQuery(pattern=b"authorize_device"))
-    bot.add_event_handler(login_email_callback, events.CallbackQuery(pattern=b"login_email"))
-    bot.add_event_handler(auth_complete_callback, events.CallbackQuery(pattern=b"auth_complete_.*"))
-    bot.add_event_handler(login_handler, events.CallbackQuery(pattern=b"^login$"))
-    bot.add_event_handler(switch_account_callback, events.CallbackQuery(pattern=b"switch_account_.*"))
-    bot.add_event_handler(logout_account_callback, events.CallbackQuery(pattern=b"logout_account_.*"))
-    bot.add_event_handler(confirm_logout_account_callback, events.CallbackQuery(pattern=b"confirm_logout_.*"))
-    bot.add_event_handler(cancel_logout_callback, events.CallbackQuery(pattern=b"cancel_logout"))
+    callback_router.add(Op.AUTHORIZE_DEVICE, heavy(authorize_device_callback))
+    # Waits on a conversation for minutes, so it does not hold a worker
+    callback_router.add(Op.LOGIN_EMAIL, login_email_callback)
+    callback_router.add(Op.AUTH_COMPLETE, heavy(auth_complete_callback))
+    callback_router.add(Op.LOGIN, cheap(login_handler))
+    callback_router.add(Op.SWITCH_ACCOUNT, cheap(switch_account_callback))
+    callback_router.add(Op.LOGOUT_ACCOUNT, cheap(logout_account_callback))
+    callback_router.add(Op.CONFIRM_LOGOUT, cheap(confirm_logout_account_callback))
+    callback_router.add(Op.CANCEL_LOGOUT, cheap(cancel_logout_callback))
 
     # Callback handlers - Files
-    bot.add_event_handler(folder_callback, events.CallbackQuery(pattern=b"folder_(?!link_).*"))
-    bot.add_event_handler(folder_link_callback, events.CallbackQuery(pattern=b"folder_link_.*"))
-    bot.add_event_handler(file_callback, events.CallbackQuery(pattern=b"file_(?!link_).*"))
-    bot.add_event_handler(file_link_callback, events.CallbackQuery(pattern=b"file_link_.*"))
-    bot.add_event_handler(delete_file_callback, events.CallbackQuery(pattern=b"delete_file_.*"))
-    bot.add_event_handler(delete_folder_callback, events.CallbackQuery(pattern=b"delete_folder_.*"))
+    callback_router.add(Op.FOLDER, heavy(folder_callback))
+    callback_router.add(Op.FOLDER_LINK, heavy(folder_link_callback))
+    callback_router.add(Op.FILE, heavy(file_callback))
+    callback_router.add(Op.FILE_LINK, heavy(file_link_callback))
+    callback_router.add(Op.DELETE_FILE, heavy(delete_file_callback))
+    callback_router.add(Op.DELETE_FOLDER, heavy(delete_folder_callback))
 
     # Callback handlers - Playlist
-    bot.add_event_handler(playlist_callback, events.CallbackQuery(pattern=b"playlist_.*"))
+    callback_router.add(Op.PLAYLIST, heavy(playlist_callback))
 
     # Callback handlers - Active Downloads
-    bot.add_event_handler(active_download_callback, events.CallbackQuery(pattern=b"active_.*"))
-    bot.add_event_handler(cancel_download_callback, events.CallbackQuery(pattern=b"cancel_download_.*"))
+    callback_router.add(Op.ACTIVE_DOWNLOAD, heavy(active_download_callback))
+    callback_router.add(Op.CANCEL_DOWNLOAD, heavy(cancel_download_callback))
+    callback_router.add(Op.LIVE_DOWNLOADS, cheap(live_downloads_callback))
+
+    bot.add_event_handler(callback_router.dispatch, events.CallbackQuery())
 
     # File upload handler (must be before the text_message_handler)
     bot.add_event_handler(
-        handle_torrent_file,
+        heavy(handle_torrent_file),
         events.NewMessage(
-            func=lambda e: e.document
-            and (e.document.mime_type == "application/x-bittorrent" or e.file.name.endswith(".torrent"))
+            func=lambda e: (
+                e.document and (e.document.mime_type == "application/x-bittorrent" or e.file.name.endswith(".torrent"))
+            )
         ),
     )
 
-    # This handler catches text button clicks and other text messages.
-    bot.add_event_handler(text_message_handler, events.NewMessage(incoming=True))
+    # This handler catches reply keyboard button clicks.
+    # Other text is dropped by the filter before any database access.
+    bot.add_event_handler(heavy(text_message_handler), events.NewMessage(incoming=True, func=is_keyboard_button))
+
+    if settings.completion_notifications:
+        completion_notifier.start(bot)
+
+    # Referenced until shutdown, since the event loop only keeps weak references to tasks
+    metrics_task = None
+    if settings.metrics_log_interval > 0:
+        metrics_task = asyncio.create_task(report_metrics(settings.metrics_log_interval))
 
     logger.info("Bot is running. Press Ctrl+C to stop.")
-    await bot.run_until_disconnected()
+    try:
+        await bot.run_until_disconnected()
+    finally:
+        if metrics_task:
+            metrics_task.cancel()
+        # On the running loop, which the database connections and Seedr clients belong to
+        await shutdown()
 
 
 async def shutdown():
+    """Release everything the bot holds. A failing step does not skip the ones after it."""
     logger.info("Shutting down")
-    await close_db()
-    await bot.disconnect()
+    # Refreshed tokens that are not written yet would be lost, so they go first
+    steps = (
+        token_writer.close,
+        close_db,
+        handler_executor.close,
+        completion_notifier.close,
+        seedr_pool.close,
+        bot.disconnect,
+    )
+    for step in steps:
+        try:
+            await step()
+        except Exception:
+            logger.error("Shutdown step failed", step=step.__qualname__, exc_info=True)
 
 
 if __name__ == "__main__":
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        logger.info("Received interrupt signal, shutting down.")
-        asyncio.run(shutdown())
+        logger.info("Received interrupt signal, shut down.")
     except Exception as e:
         logger.error("A fatal error occurred", error=str(e), exc_info=True)
-        asyncio.run(shutdown())
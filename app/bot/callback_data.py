@@ -0,0 +1,268 @@
+"""
+Compact encoding of inline button callback data.
+
+Telegram limits callback data to 64 bytes. Buttons are encoded as a version
+byte, an opcode naming the action and its parameters:
+
+- Decimal ids are stored as varints (an 11-digit Seedr id takes 5 bytes).
+- Other strings are stored as a varint length followed by their UTF-8 bytes.
+- None is stored as a single byte.
+
+Data that still does not fit is kept in a bounded in-memory store and the
+button carries a short key to it instead. Data of buttons sent before this
+encoding existed ("folder_123_page_2_parent_456") is still decoded.
+"""
+
+import hashlib
+from collections import OrderedDict
+from collections.abc import Callable
+from enum import IntEnum
+
+from app.config import settings
+from app.exceptions import CallbackDataExpiredError
+from app.utils.metrics import metrics
+from app.utils.validators import parse_callback_data
+
+MAX_CALLBACK_DATA_SIZE = 64
+
+# First byte of encoded data. Legacy data always starts with an ASCII letter.
+_VERSION_1 = 0x01
+_STORED_KEY = 0x02
+
+# Value tags, stored in the two low bits of each value's varint header
+_TAG_INT = 0
+_TAG_STR = 1
+_TAG_NONE = 2
+
+
+class Op(IntEnum):
+    """Actions of inline buttons. Values are part of the wire format and must never change."""
+
+    FOLDER = 1
+    FILE = 2
+    FOLDER_LINK = 3
+    FILE_LINK = 4
+    DELETE_FOLDER = 5
+    DELETE_FILE = 6
+    PLAYLIST = 7
+    ACTIVE_DOWNLOAD = 8
+    CANCEL_DOWNLOAD = 9
+    SWITCH_ACCOUNT = 10
+    LOGOUT_ACCOUNT = 11
+    CONFIRM_LOGOUT = 12
+    CANCEL_LOGOUT = 13
+    LOGIN = 14
+    LOGIN_EMAIL = 15
+    AUTHORIZE_DEVICE = 16
+    AUTH_COMPLETE = 17
+    LIVE_DOWNLOADS = 18
+
+
+# Values of trailing parameters that buttons may leave out
+_DEFAULTS: dict[Op, tuple] = {
+    Op.FOLDER: ("0", None, "1"),  # folder id, parent id, page
+    Op.FILE: (None, None),  # file id, parent id
+    Op.LIVE_DOWNLOADS: (None,),  # download id, or None for all downloads
+}
+
+
+class CallbackStateStore:
+    """Bounded LRU store of callback data too large to fit in a button."""
+
+    def __init__(self, max_size: int):
+        self._max_size = max_size
+        self._entries: OrderedDict[bytes, bytes] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, data: bytes) -> bytes:
+        """Store data and return its key. Identical data gets the same key."""
+        key = hashlib.blake2b(data, digest_size=12).digest()
+        self._entries[key] = data
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+        return key
+
+    def get(self, key: bytes) -> bytes | None:
+        data = self._entries.get(key)
+        if data is not None:
+            self._entries.move_to_end(key)
+        return data
+
+
+callback_store = CallbackStateStore(max_size=settings.callback_store_size)
+
+
+def _write_varint(value: int, out: bytearray) -> None:
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, position: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+def _is_canonical_int(value: str) -> bool:
+    return value.isascii() and value.isdecimal() and (value == "0" or value[0] != "0")
+
+
+def encode_callback(op: Op, *params: str | int | None) -> bytes:
+    """Encode a button action and its parameters as callback data."""
+    out = bytearray((_VERSION_1, op))
+    for value in params:
+        if value is None:
+            _write_varint(_TAG_NONE, out)
+        elif isinstance(value, int) or _is_canonical_int(value):
+            _write_varint(int(value) << 2 | _TAG_INT, out)
+        else:
+            encoded = value.encode()
+            _write_varint(len(encoded) << 2 | _TAG_STR, out)
+            out += encoded
+
+    if len(out) > MAX_CALLBACK_DATA_SIZE:
+        metrics.increment("callback_data.stored")
+        return bytes((_STORED_KEY,)) + callback_store.put(bytes(out))
+    return bytes(out)
+
+
+def decode_callback(data: bytes) -> tuple[Op, tuple[str | None, ...]] | None:
+    """
+    Decode callback data into its action and parameters.
+
+    Parameters are returned as strings (or None), whatever encoding they used.
+    Returns None for data that is not recognized.
+
+    Raises:
+        CallbackDataExpiredError: If the data was kept in the store and has been evicted.
+    """
+    if not data:
+        return None
+
+    if data[0] == _STORED_KEY:
+        stored = callback_store.get(data[1:])
+        if stored is None:
+            raise CallbackDataExpiredError()
+        data = stored
+
+    if data[0] != _VERSION_1:
+        return _decode_legacy(data)
+
+    try:
+        op = Op(data[1])
+        params = []
+        position = 2
+        while position < len(data):
+            header, position = _read_varint(data, position)
+            tag, value = header & 0b11, header >> 2
+            if tag == _TAG_INT:
+                params.append(str(value))
+            elif tag == _TAG_STR:
+                params.append(data[position : position + value].decode())
+                position += value
+            else:
+                params.append(None)
+    except ValueError, IndexError:
+        return None
+
+    defaults = _DEFAULTS.get(op, ())
+    return op, (*params, *defaults[len(params) :])
+
+
+def _parse_legacy_folder(payload: str) -> tuple:
+    folder_id, _, rest = payload.partition("_")
+    params = parse_callback_data(rest)
+    return folder_id, params.get("parent"), params.get("page", "1")
+
+
+def _parse_legacy_file(payload: str) -> tuple:
+    file_id, _, rest = payload.partition("_")
+    return file_id, parse_callback_data(rest).get("parent")
+
+
+def _parse_legacy_playlist(payload: str) -> tuple:
+    return tuple(payload.split("_", 2))
+
+
+# Prefix of legacy data -> action, and the parser of the rest of the data
+_LEGACY_PREFIXES: dict[str, tuple[Op, Callable[[str], tuple]]] = {
+    "folder_": (Op.FOLDER, _parse_legacy_folder),
+    "file_": (Op.FILE, _parse_legacy_file),
+    "folder_link_": (Op.FOLDER_LINK, lambda payload: (payload,)),
+    "file_link_": (Op.FILE_LINK, lambda payload: (payload,)),
+    "delete_folder_": (Op.DELETE_FOLDER, lambda payload: (payload,)),
+    "delete_file_": (Op.DELETE_FILE, lambda payload: (payload,)),
+    "playlist_": (Op.PLAYLIST, _parse_legacy_playlist),
+    "active_": (Op.ACTIVE_DOWNLOAD, lambda payload: (payload,)),
+    "cancel_download_": (Op.CANCEL_DOWNLOAD, lambda payload: (payload,)),
+    "switch_account_": (Op.SWITCH_ACCOUNT, lambda payload: (payload,)),
+    "logout_account_": (Op.LOGOUT_ACCOUNT, lambda payload: (payload,)),
+    "confirm_logout_": (Op.CONFIRM_LOGOUT, lambda payload: (payload,)),
+    "auth_complete_": (Op.AUTH_COMPLETE, lambda payload: (payload,)),
+}
+
+_LEGACY_EXACT: dict[str, Op] = {
+    "cancel_logout": Op.CANCEL_LOGOUT,
+    "login": Op.LOGIN,
+    "login_email": Op.LOGIN_EMAIL,
+    "authorize_device": Op.AUTHORIZE_DEVICE,
+}
+
+
+class _TrieNode:
+    __slots__ = ("children", "route")
+
+    def __init__(self):
+        self.children: dict[str, _TrieNode] = {}
+        self.route: tuple[Op, Callable[[str], tuple]] | None = None
+
+
+def _build_legacy_trie() -> _TrieNode:
+    root = _TrieNode()
+    for prefix, route in _LEGACY_PREFIXES.items():
+        node = root
+        for char in prefix:
+            node = node.children.setdefault(char, _TrieNode())
+        node.route = route
+    return root
+
+
+_legacy_trie = _build_legacy_trie()
+
+
+def _decode_legacy(data: bytes) -> tuple[Op, tuple[str | None, ...]] | None:
+    """Decode "{prefix}{payload}" data, matching the longest known prefix."""
+    try:
+        text = data.decode()
+    except UnicodeDecodeError:
+        return None
+
+    if op := _LEGACY_EXACT.get(text):
+        return op, ()
+
+    node, match = _legacy_trie, None
+    for position, char in enumerate(text):
+        node = node.children.get(char)
+        if node is None:
+            break
+        if node.route is not None:
+            match = (node.route, position + 1)
+
+    if match is None:
+        return None
+
+    (op, parse), position = match
+    metrics.increment("callback_data.legacy")
+    params = parse(text[position:])
+    defaults = _DEFAULTS.get(op, ())
+    return op, (*params, *defaults[len(params) :])
@@ -0,0 +1,319 @@
+"""
+Notifications for downloads that finished, across all logged-in accounts.
+
+Every account is polled on its own schedule: often while it has active
+torrents, rarely while it has none. Accounts are spread over the poll
+interval and every interval is jittered, so polls do not bunch up. A torrent
+that is gone from one poll to the next and has a folder of the same name in
+its place has finished, and its owner gets a message.
+
+Polls go through a circuit breaker of their own, so background failures never
+fail fast the Seedr calls users are waiting on. Accounts whose token Seedr
+rejects are not polled again until their token changes.
+"""
+
+import asyncio
+import functools
+import heapq
+import random
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import httpx
+from seedrcc import AsyncSeedr, Token, models
+from seedrcc.exceptions import AuthenticationError, NetworkError, ServerError
+from sqlalchemy import select
+from structlog import get_logger
+from telethon import TelegramClient, errors
+
+from app.bot.outbox import outbox
+from app.bot.views.notification_view import render_download_completed
+from app.config import settings
+from app.database import Account, User, get_session
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.seedr import on_token_refresh, token_writer
+from app.utils.language import get_language_service
+from app.utils.metrics import metrics
+
+logger = get_logger(__name__)
+language_service = get_language_service()
+
+# Accounts whose credentials are loaded with a single query
+_BATCH_SIZE = 100
+
+# Separate from the breaker of the handlers, which background polls must not open
+completion_breaker = CircuitBreaker(
+    name="completion_notifier.breaker",
+    failure_rate=settings.seedr_breaker_failure_rate,
+    min_calls=settings.seedr_breaker_min_calls,
+    window=settings.seedr_breaker_window,
+    open_duration=settings.seedr_breaker_open_duration,
+    slow_call_threshold=settings.seedr_breaker_slow_call,
+    half_open_calls=settings.seedr_breaker_half_open_calls,
+    failure_exceptions=(NetworkError, ServerError, TimeoutError),
+)
+
+
+@dataclass(slots=True)
+class _AccountState:
+    """What is kept between polls of an account."""
+
+    due: float
+    # Active torrent ID -> name, None until the account was polled once
+    torrents: dict[int, str] | None = None
+
+
+@dataclass(slots=True)
+class _Credentials:
+    account_id: int
+    user_id: int
+    token: str
+    account_name: str
+    telegram_id: int
+    language: str
+    is_default_account: bool
+
+
+class CompletionNotifier:
+    """Polls every account for finished downloads, with at most `concurrency` polls at a time."""
+
+    def __init__(
+        self,
+        active_interval: float,
+        idle_interval: float,
+        refresh_interval: float,
+        concurrency: int,
+    ):
+        self.active_interval = active_interval
+        self.idle_interval = idle_interval
+        self.refresh_interval = refresh_interval
+        self.concurrency = concurrency
+        self._states: dict[int, _AccountState] = {}
+        # (due time, account ID), entries whose due time is no longer the account's are stale
+        self._schedule: list[tuple[float, int]] = []
+        self._polls: set[asyncio.Task] = set()
+        self._notifications: set[asyncio.Task] = set()
+        # Account ID -> the token Seedr rejected, those accounts are skipped until their token changes
+        self._rejected: dict[int, str] = {}
+        self._task: asyncio.Task | None = None
+        self._wakeup = asyncio.Event()
+        self._http: httpx.AsyncClient | None = None
+
+    def start(self, client: TelegramClient) -> None:
+        """Start polling in the background, sending notifications through `client`."""
+        # One connection pool for every poll, instead of one per account
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        self._http = httpx.AsyncClient(limits=limits, timeout=30.0)
+        self._task = asyncio.create_task(self._run(client))
+
+    async def close(self) -> None:
+        """Stop polling."""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, *self._polls, *self._notifications, return_exceptions=True)
+        if self._http:
+            await self._http.aclose()
+
+    def poll_soon(self, account_id: int) -> None:
+        """Poll an account now, e.g. because a torrent was just added to it."""
+        state = self._states.get(account_id)
+        if state is not None:
+            self._reschedule(account_id, state, 0)
+
+    async def _run(self, client: TelegramClient) -> None:
+        slots = asyncio.Semaphore(self.concurrency)
+        refresh_at = 0.0
+        while True:
+            now = time.monotonic()
+            if now >= refresh_at:
+                try:
+                    await self._refresh_accounts()
+                except Exception as e:
+                    logger.warning("Could not load accounts to poll", error=str(e))
+                refresh_at = now + self.refresh_interval
+
+            due = self._pop_due(now)
+            if not due:
+                next_due = self._schedule[0][0] if self._schedule else refresh_at
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), max(0.0, min(next_due, refresh_at) - now))
+                except TimeoutError:
+                    pass
+                continue
+
+            try:
+                credentials = await self._load_credentials(due)
+            except Exception as e:
+                logger.warning("Could not load account credentials", error=str(e))
+                for account_id in due:
+                    if state := self._states.get(account_id):
+                        self._reschedule(account_id, state, self.idle_interval)
+                continue
+
+            for account_id in due:
+                await slots.acquire()
+                task = asyncio.create_task(self._poll(client, account_id, credentials.get(account_id)))
+                self._polls.add(task)
+                task.add_done_callback(self._polls.discard)
+                task.add_done_callback(lambda _: slots.release())
+
+            metrics.set_gauge("completion_notifier.accounts", len(self._states))
+            metrics.set_gauge("completion_notifier.polling", len(self._polls))
+
+    async def _refresh_accounts(self) -> None:
+        """
+        Start tracking new accounts, spread over the idle interval, and stop tracking removed ones.
+
+        Rejected accounts whose token changed since are polled again right away.
+        """
+        async with get_session(read_only=True) as session:
+            account_ids = set((await session.execute(select(Account.id))).scalars())
+            rejected = []
+            if self._rejected:
+                query = select(Account.id, Account.token).where(Account.id.in_(list(self._rejected)))
+                rejected = (await session.execute(query)).all()
+
+        now = time.monotonic()
+        for account_id in account_ids - self._states.keys():
+            state = self._states[account_id] = _AccountState(due=0)
+            self._reschedule(account_id, state, random.uniform(0, self.idle_interval), now=now)  # noqa: S311
+        for account_id in self._states.keys() - account_ids:
+            del self._states[account_id]
+            self._rejected.pop(account_id, None)
+        for row in rejected:
+            token = self._rejected.get(row.id)
+            if token is not None and (token_writer.get(row.id) or row.token) != token:
+                del self._rejected[row.id]
+                if state := self._states.get(row.id):
+                    self._reschedule(row.id, state, 0, now=now)
+
+        # Drop stale schedule entries, which pile up when accounts are polled early
+        if len(self._schedule) > 2 * len(self._states):
+            self._schedule = [
+                (due, account_id)
+                for due, account_id in self._schedule
+                if (state := self._states.get(account_id)) and state.due == due
+            ]
+            heapq.heapify(self._schedule)
+
+    def _pop_due(self, now: float) -> list[int]:
+        due = []
+        while self._schedule and self._schedule[0][0] <= now and len(due) < _BATCH_SIZE:
+            due_at, account_id = heapq.heappop(self._schedule)
+            state = self._states.get(account_id)
+            if state is not None and state.due == due_at:
+                due.append(account_id)
+        return due
+
+    def _reschedule(self, account_id: int, state: _AccountState, delay: float, now: float | None = None) -> None:
+        state.due = (now if now is not None else time.monotonic()) + delay
+        heapq.heappush(self._schedule, (state.due, account_id))
+        if self._schedule[0] == (state.due, account_id):
+            # Due before anything the scheduler is sleeping until
+            self._wakeup.set()
+
+    async def _load_credentials(self, account_ids: Sequence[int]) -> dict[int, _Credentials]:
+        async with get_session(read_only=True) as session:
+            result = await session.execute(
+                select(
+                    Account.id,
+                    Account.user_id,
+                    Account.token,
+                    Account.username,
+                    Account.email,
+                    User.telegram_id,
+                    User.language,
+                    User.default_account_id,
+                )
+                .join(User, User.id == Account.user_id)
+                .where(Account.id.in_(account_ids))
+            )
+            rows = result.all()
+
+        return {
+            row.id: _Credentials(
+                account_id=row.id,
+                user_id=row.user_id,
+                token=token_writer.get(row.id) or row.token,
+                account_name=row.username or row.email or "",
+                telegram_id=row.telegram_id,
+                language=row.language,
+                is_default_account=row.default_account_id == row.id,
+            )
+            for row in rows
+        }
+
+    async def _poll(self, client: TelegramClient, account_id: int, credentials: _Credentials | None) -> None:
+        state = self._states.get(account_id)
+        if state is None or credentials is None or self._rejected.get(account_id) == credentials.token:
+            return
+
+        callback = functools.partial(on_token_refresh, account_id=account_id, user_id=credentials.user_id)
+        seedr = AsyncSeedr(Token.from_base64(credentials.token), on_token_refresh=callback, httpx_client=self._http)
+        try:
+            contents = await completion_breaker.call(seedr.list_contents)
+        except AuthenticationError:
+            # Left unscheduled until the user logs in again, which a later account refresh picks up
+            state.torrents = None
+            self._rejected[account_id] = credentials.token
+            metrics.increment("completion_notifier.rejected")
+            return
+        except Exception as e:
+            logger.debug("Completion poll failed", account_id=account_id, error=str(e))
+            metrics.increment("completion_notifier.failures")
+            self._reschedule(account_id, state, self._jitter(self.idle_interval))
+            return
+
+        metrics.increment("completion_notifier.polls")
+        previous, state.torrents = state.torrents, {torrent.id: torrent.name for torrent in contents.torrents}
+        interval = self.active_interval if state.torrents else self.idle_interval
+        self._reschedule(account_id, state, self._jitter(interval))
+
+        finished = [name for torrent_id, name in (previous or {}).items() if torrent_id not in state.torrents]
+        if finished:
+            # Sent once this poll has returned its slot, so that waiting on the outbox does not hold up other polls
+            task = asyncio.create_task(self._notify(client, credentials, finished, contents))
+            self._notifications.add(task)
+            task.add_done_callback(self._notifications.discard)
+
+    async def _notify(
+        self, client: TelegramClient, credentials: _Credentials, names: list[str], contents: models.ListContentsResult
+    ) -> None:
+        translator = language_service.get_translator(credentials.language)
+        for name in names:
+            folder = next((folder for folder in contents.folders if folder.name == name), None)
+            if folder is None:
+                # Gone without a folder in its place, i.e. cancelled or failed
+                continue
+
+            view = render_download_completed(
+                name,
+                folder.id,
+                credentials.account_id,
+                credentials.account_name,
+                credentials.is_default_account,
+                translator,
+            )
+            try:
+                await outbox.send(client, credentials.telegram_id, view.message, buttons=view.buttons)
+                metrics.increment("completion_notifier.notifications")
+            except errors.UserIsBlockedError, errors.InputUserDeactivatedError:
+                return
+            except Exception as e:
+                logger.warning(
+                    "Could not send completion notification", account_id=credentials.account_id, error=str(e)
+                )
+
+    @staticmethod
+    def _jitter(interval: float) -> float:
+        return interval * random.uniform(0.8, 1.2)  # noqa: S311
+
+
+completion_notifier = CompletionNotifier(
+    active_interval=settings.completion_poll_interval,
+    idle_interval=settings.completion_idle_poll_interval,
+    refresh_interval=settings.completion_accounts_refresh_interval,
+    concurrency=settings.completion_poll_concurrency,
+)
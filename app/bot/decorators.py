@@ -2,21 +2,25 @@
 
 import functools
 import inspect
-from collections.abc import Callable, Coroutine
+from collections.abc import Mapping
+from contextlib import AsyncExitStack
 from typing import Any
 
-from seedrcc import AsyncSeedr, Token
 from seedrcc.exceptions import APIError, AuthenticationError, SeedrError
+from sqlalchemy.ext.asyncio import AsyncSession
 from structlog import get_logger
+from structlog.contextvars import bound_contextvars
 from telethon import errors, events
 
+from app.bot.outbox import outbox
 from app.bot.views import ViewResponse
 from app.bot.views.accounts_view import render_no_account
-from app.database import get_session
-from app.database.models import User
+from app.bot.views.shared_view import render_service_unavailable_message
+from app.database import Account, UserRecord, release_session, unit_of_work, user_cache
+from app.database.query_stats import track_queries
 from app.database.repository import AccountRepository, UserRepository
-from app.exceptions import NoAccountError
-from app.services.seedr import on_token_refresh
+from app.exceptions import NoAccountError, ServiceUnavailableError
+from app.services.seedr import seedr_pool
 from app.utils.language import Translator, get_language_service
 
 logger = get_logger(__name__)
@@ -24,37 +28,68 @@ language_service = get_language_service()
 
 
 async def _inject_dependencies(
-    func: Callable[..., Coroutine],
+    parameters: Mapping[str, inspect.Parameter],
     event: events.NewMessage.Event | events.CallbackQuery.Event,
-    user: User,
+    user: UserRecord,
     translator: Translator,
     require_auth: bool,
+    stack: AsyncExitStack,
+    session: AsyncSession,
+    account: Account | None = None,
 ) -> dict:
-    """Injects dependencies, including the Seedr client if required."""
+    """Injects the dependencies named in `parameters`, including the Seedr client if required.
+
+    The default account is looked up unless it was already loaded together with
+    the user. The Seedr client is leased from the shared pool for as long as
+    `stack` is open.
+    """
     dependencies = {
         "event": event,
         "user": user,
         "translator": translator,
         "client": event.client,
+        "session": session,
     }
 
     if require_auth:
         if not user.default_account_id:
             raise NoAccountError()
 
-        async with get_session() as session:
+        if account is None:
             account = await AccountRepository(session).get_by_id(user.default_account_id, user.id)
 
         if not account:
             raise NoAccountError()
 
-        token_instance = Token.from_base64(account.token)
-        callback = functools.partial(on_token_refresh, account_id=account.id, user_id=user.id)
-        seedr_client = AsyncSeedr(token=token_instance, on_token_refresh=callback)
+        seedr_client = await stack.enter_async_context(
+            seedr_pool.lease(account.id, account.seedr_account_id, user.id, account.token)
+        )
         dependencies["seedr_client"] = seedr_client
 
-    handler_signature = inspect.signature(func)
-    return {key: value for key, value in dependencies.items() if key in handler_signature.parameters}
+    return {key: value for key, value in dependencies.items() if key in parameters}
+
+
+async def _load_user(
+    event: events.NewMessage.Event | events.CallbackQuery.Event, session: AsyncSession, with_account: bool
+) -> tuple[UserRecord, Account | None]:
+    """
+    Loads the user from the database and caches it, creating the user on first contact.
+
+    With `with_account`, the default account is fetched in the same query.
+    """
+    generation = user_cache.generation
+    user_model, account = None, None
+
+    if with_account:
+        user_model, account = await UserRepository(session).get_with_default_account(event.sender_id)
+
+    if user_model is None:
+        username = event.sender.username if event.sender else None
+        user_model = await UserRepository(session).get_or_create(telegram_id=event.sender_id, username=username)
+
+    user = UserRecord.from_model(user_model)
+    user_cache.set(user, generation)
+    return user, account
 
 
 async def _handle_exception(
@@ -71,6 +106,9 @@ async def _handle_exception(
     if isinstance(exception, NoAccountError):
         view = render_no_account(translator)
 
+    elif isinstance(exception, ServiceUnavailableError):
+        view = render_service_unavailable_message(translator)
+
     elif isinstance(exception, AuthenticationError):
         error_text = str(exception) or translator.get("tokenExpired")
         view = ViewResponse(message=error_text)
@@ -83,6 +121,10 @@ async def _handle_exception(
     elif isinstance(exception, errors.AlreadyInConversationError):
         pass
 
+    # Replying would only add to the flood
+    elif isinstance(exception, errors.FloodWaitError):
+        logger.warning("Telegram flood wait too long, dropping reply", seconds=exception.seconds)
+
     # Any other unhandled exceptions
     else:
         error_text = translator.get("somethingWrong")
@@ -91,9 +133,9 @@ async def _handle_exception(
 
     if view:
         if isinstance(event, events.CallbackQuery.Event):
-            await event.edit(view.message, buttons=view.buttons)
+            await outbox.edit(event, view.message, buttons=view.buttons)
         else:
-            await event.respond(view.message, buttons=view.buttons)
+            await outbox.respond(event, view.message, buttons=view.buttons)
 
     raise events.StopPropagation()
 
@@ -101,32 +143,56 @@ async def _handle_exception(
 def setup_handler(require_auth: bool = False):
     """
     Primary decorator for handlers. It provides dependency injection and centralized exception handling.
+
+    All database work for an event, including that of nested handlers, shares one
+    session (see `unit_of_work`). Its connection is given back to the pool before
+    the handler runs, so slow Seedr and Telegram calls do not hold it.
+
+    The number of database statements each handler runs, and the time they take,
+    are logged and attached to the log context of errors.
     """
 
     def decorator(func):
+        parameters = inspect.signature(func).parameters
+        accepts_any_kwargs = any(param.kind is inspect.Parameter.VAR_KEYWORD for param in parameters.values())
+
         @functools.wraps(func)
         async def wrapper(event: events.NewMessage.Event | events.CallbackQuery.Event, *args: Any, **kwargs: Any):
             translator = None
-            try:
-                user = kwargs.get("user")
-                if not user:
-                    username = event.sender.username if event.sender else None
-                    async with get_session() as session:
-                        user = await UserRepository(session).get_or_create(
-                            telegram_id=event.sender_id, username=username
-                        )
-
-                translator = language_service.get_translator(user.language)
-
-                injected_kwargs = await _inject_dependencies(func, event, user, translator, require_auth)
-
-                # Merge original kwargs with injected dependencies (injected takes precedence)
-                final_kwargs = {**kwargs, **injected_kwargs}
-
-                return await func(*args, **final_kwargs)
-            except Exception as err:
-                translator = language_service.get_translator() if translator is None else translator
-                await _handle_exception(event, translator, err)
+            with track_queries() as query_stats, bound_contextvars(handler=func.__name__):
+                try:
+                    async with unit_of_work() as session:
+                        account = None
+                        user = kwargs.get("user") or user_cache.get(event.sender_id)
+                        if not user:
+                            user, account = await _load_user(event, session, with_account=require_auth)
+
+                        translator = language_service.get_translator(user.language)
+
+                        async with AsyncExitStack() as stack:
+                            injected_kwargs = await _inject_dependencies(
+                                parameters, event, user, translator, require_auth, stack, session, account
+                            )
+                            await release_session(session)
+
+                            # Merge original kwargs with injected dependencies (injected takes precedence).
+                            # Kwargs the handler does not take, like a router payload, are dropped.
+                            if not accepts_any_kwargs:
+                                kwargs = {key: value for key, value in kwargs.items() if key in parameters}
+                            final_kwargs = {**kwargs, **injected_kwargs}
+
+                            try:
+                                return await func(*args, **final_kwargs)
+                            except events.StopPropagation:
+                                # Stopping propagation is not a failure, keep what the handler wrote
+                                await release_session(session)
+                                raise
+                except Exception as err:
+                    translator = language_service.get_translator() if translator is None else translator
+                    with bound_contextvars(**query_stats.as_log_context()):
+                        await _handle_exception(event, translator, err)
+                finally:
+                    logger.debug("Handled event", **query_stats.as_log_context())
 
         return wrapper
 
@@ -0,0 +1,147 @@
+"""Bounded execution of event handlers."""
+
+import asyncio
+import functools
+from collections.abc import Callable, Coroutine
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import Any
+
+from structlog import get_logger
+from telethon import events
+
+from app.bot.outbox import outbox
+from app.config import settings
+from app.database import user_cache
+from app.utils.language import get_language_service
+from app.utils.metrics import metrics
+
+logger = get_logger(__name__)
+language_service = get_language_service()
+
+Handler = Callable[..., Coroutine[Any, Any, Any]]
+
+
+class Priority(StrEnum):
+    """Classes of handlers, each with its own queue and workers."""
+
+    CHEAP = "cheap"  # Replies built from the database only
+    HEAVY = "heavy"  # Work waiting on Seedr
+
+
+@dataclass(slots=True)
+class _Job:
+    handler: Handler
+    event: events.NewMessage.Event | events.CallbackQuery.Event
+    kwargs: dict[str, Any]
+    future: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+
+class HandlerExecutor:
+    """
+    Runs event handlers on a fixed number of workers instead of one task per update.
+
+    Each priority has a bounded queue and its own share of workers, so a burst of
+    Seedr-bound work cannot use up the database and Seedr connections while
+    cheap replies wait behind it. Events arriving while the queue of their
+    priority is full are turned away with a "busy" reply.
+    """
+
+    def __init__(self, workers: dict[Priority, int], queue_sizes: dict[Priority, int]):
+        self._worker_counts = workers
+        self._queues = {priority: asyncio.Queue(maxsize=size) for priority, size in queue_sizes.items()}
+        self._workers: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Start the workers."""
+        for priority, count in self._worker_counts.items():
+            for _ in range(count):
+                self._workers.append(asyncio.create_task(self._work(priority)))
+
+    async def close(self) -> None:
+        """Stop the workers. Queued events are dropped."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+    def wrap(self, handler: Handler, priority: Priority) -> Handler:
+        """Make `handler` run on the workers of `priority` when called."""
+
+        @functools.wraps(handler)
+        async def submit(event, **kwargs):
+            return await self.run(priority, handler, event, **kwargs)
+
+        return submit
+
+    async def run(
+        self,
+        priority: Priority,
+        handler: Handler,
+        event: events.NewMessage.Event | events.CallbackQuery.Event,
+        **kwargs,
+    ) -> Any:
+        """Queue the handler and wait for a worker to run it, or reply "busy" if the queue is full."""
+        queue = self._queues[priority]
+        job = _Job(handler, event, kwargs)
+        try:
+            queue.put_nowait(job)
+        except asyncio.QueueFull:
+            metrics.increment(f"handlers.{priority}.shed")
+            logger.warning("Handler queue full, shedding event", priority=priority, handler=handler.__name__)
+            await _reply_busy(event)
+            return None
+
+        metrics.set_gauge(f"handlers.{priority}.queued", queue.qsize())
+        return await job.future
+
+    async def _work(self, priority: Priority) -> None:
+        queue = self._queues[priority]
+        while True:
+            job = await queue.get()
+            metrics.set_gauge(f"handlers.{priority}.queued", queue.qsize())
+            # The event's task may have been cancelled while it was queued
+            if job.future.done():
+                continue
+
+            result, error = None, None
+            try:
+                result = await job.handler(job.event, **job.kwargs)
+            except BaseException as e:
+                error = e
+                # A handler's own cancellation is its outcome, the worker's ends the worker
+                if asyncio.current_task().cancelling():
+                    raise
+            finally:
+                _resolve(job.future, result, error)
+
+
+def _resolve(future: asyncio.Future, result: Any, error: BaseException | None) -> None:
+    """Hand the outcome of a job to the event waiting for it."""
+    if future.done():
+        return
+    if error is None:
+        future.set_result(result)
+    elif isinstance(error, Exception):
+        future.set_exception(error)
+    else:
+        future.cancel()
+
+
+async def _reply_busy(event: events.NewMessage.Event | events.CallbackQuery.Event) -> None:
+    """Tell the user to try again, in their language if it is known without the database."""
+    user = user_cache.get(event.sender_id)
+    message = language_service.get_translator(user.language if user else "en").get("serverBusy")
+    try:
+        if isinstance(event, events.CallbackQuery.Event):
+            await event.answer(message, alert=True)
+        else:
+            await outbox.respond(event, message, reply_to=event.id)
+    except Exception as e:
+        logger.warning("Could not send busy reply", error=str(e))
+
+
+handler_executor = HandlerExecutor(
+    workers={Priority.CHEAP: settings.cheap_handler_workers, Priority.HEAVY: settings.heavy_handler_workers},
+    queue_sizes={Priority.CHEAP: settings.cheap_handler_queue_size, Priority.HEAVY: settings.heavy_handler_queue_size},
+)
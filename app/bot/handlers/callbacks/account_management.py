@@ -1,48 +1,48 @@
 """Account management callback handlers."""
 
 from seedrcc import AsyncSeedr
+from sqlalchemy.ext.asyncio import AsyncSession
 from telethon import events
 
 from app.bot.decorators import setup_handler
 from app.bot.handlers.commands.accounts import accounts_handler
+from app.bot.outbox import outbox
 from app.bot.views.accounts_view import (
     render_account_not_found,
     render_logout_account_confirmation,
 )
 from app.bot.views.start_view import render_start_message
-from app.database import get_session
-from app.database.models import User
+from app.database import UserRecord
 from app.database.repository import AccountRepository, UserRepository
+from app.services.seedr import seedr_pool
 from app.utils.language import Translator
 
 
 @setup_handler(require_auth=True)
 async def switch_account_callback(
     event: events.CallbackQuery.Event,
-    user: User,
+    user: UserRecord,
     translator: Translator,
     seedr_client: AsyncSeedr,
+    session: AsyncSession,
+    params: tuple[str | None, ...],
 ):
     """Handle switch to specific account callback."""
-    callback_data = event.data.decode()
-    account_id = int(callback_data.replace("switch_account_", ""))
+    account_id = int(params[0])
 
-    async with get_session() as session:
-        account_repo = AccountRepository(session)
-        account_to_switch = await account_repo.get_by_id(account_id, user.id)
+    account_to_switch = await AccountRepository(session).get_by_id(account_id, user.id)
 
     if not account_to_switch:
         view = render_account_not_found(translator)
-        await event.edit(view.message, buttons=view.buttons)
+        await outbox.edit(event, view.message, buttons=view.buttons)
         return
 
     if user.default_account_id == account_id:
         await event.answer(translator.get("alreadyActive"), alert=False)
         return
 
-    async with get_session() as session:
-        user_repo = UserRepository(session)
-        await user_repo.update_settings(event, user.id, default_account_id=account_to_switch.id)
+    await UserRepository(session).update_settings(event, user.id, default_account_id=account_to_switch.id)
+    await session.commit()
 
     username = account_to_switch.username or account_to_switch.email
     await event.answer(translator.get("accountSwitched").format(username=username), alert=False)
@@ -51,71 +51,67 @@ async def switch_account_callback(
 
 @setup_handler(require_auth=True)
 async def logout_account_callback(
-    event: events.CallbackQuery.Event, user: User, translator: Translator, seedr_client: AsyncSeedr
+    event: events.CallbackQuery.Event,
+    user: UserRecord,
+    translator: Translator,
+    seedr_client: AsyncSeedr,
+    session: AsyncSession,
+    params: tuple[str | None, ...],
 ):
     """Handle logout account button - show confirmation."""
-    callback_data = event.data.decode()
-    account_id = int(callback_data.replace("logout_account_", ""))
+    account_id = int(params[0])
 
-    async with get_session() as session:
-        account_repo = AccountRepository(session)
-        account = await account_repo.get_by_id(account_id, user.id)
+    account = await AccountRepository(session).get_by_id(account_id, user.id)
 
     if not account:
         view = render_account_not_found(translator)
-        await event.edit(view.message, buttons=view.buttons)
+        await outbox.edit(event, view.message, buttons=view.buttons)
         return
 
     username = account.username or account.email or ""
     view = render_logout_account_confirmation(account_id, username, translator)
-    await event.edit(view.message, buttons=view.buttons)
+    await outbox.edit(event, view.message, buttons=view.buttons)
 
 
 @setup_handler(require_auth=True)
 async def confirm_logout_account_callback(
-    event: events.CallbackQuery.Event, user: User, translator: Translator, seedr_client: AsyncSeedr
+    event: events.CallbackQuery.Event,
+    user: UserRecord,
+    translator: Translator,
+    seedr_client: AsyncSeedr,
+    session: AsyncSession,
+    params: tuple[str | None, ...],
 ):
     """Handle confirmed account logout."""
-    callback_data = event.data.decode()
-    account_id = int(callback_data.replace("confirm_logout_", ""))
-
-    account_not_found = False
-    has_remaining_accounts = False
+    account_id = int(params[0])
 
-    async with get_session() as session:
-        account_repo = AccountRepository(session)
-        user_repo = UserRepository(session)
-
-        account = await account_repo.get_by_id(account_id, user.id)
-        if not account:
-            account_not_found = True
-        else:
-            await account_repo.delete(account_id, user.id)
+    account_repo = AccountRepository(session)
+    if not await account_repo.delete(account_id, user.id):
+        view = render_account_not_found(translator)
+        await outbox.edit(event, view.message, buttons=view.buttons)
+        return
 
-            # Get remaining accounts after deletion
-            remaining = await account_repo.get_by_user_id(user.id)
-            has_remaining_accounts = len(remaining) > 0
+    # Get remaining accounts after deletion
+    remaining = await account_repo.get_by_user_id(user.id)
 
-            # If the deleted account was the default, switch to another or None
-            if user.default_account_id == account_id:
-                new_default = remaining[0].id if remaining else None
-                await user_repo.update_settings(event, user.id, default_account_id=new_default)
+    # If the deleted account was the default, switch to another or None
+    if user.default_account_id == account_id:
+        new_default = remaining[0].id if remaining else None
+        await UserRepository(session).update_settings(event, user.id, default_account_id=new_default)
 
-    if account_not_found:
-        view = render_account_not_found(translator)
-        await event.edit(view.message, buttons=view.buttons)
-        return
+    await session.commit()
 
+    await seedr_pool.invalidate(account_id)
     await event.answer(translator.get("accountRemoved"), alert=False)
 
-    if has_remaining_accounts:
+    if remaining:
         await accounts_handler(event)
     else:
         view = render_start_message(False, translator)
-        await event.edit(view.message, buttons=view.buttons)
+        await outbox.edit(event, view.message, buttons=view.buttons)
 
 
 @setup_handler()
-async def cancel_logout_callback(event: events.CallbackQuery.Event, user: User, translator: Translator):
+async def cancel_logout_callback(event: events.CallbackQuery.Event, user: UserRecord, translator: Translator):
     """Handle cancel logout button - return to accounts view."""
     await accounts_handler(event)
@@ -4,20 +4,23 @@ from seedrcc import AsyncSeedr
 from telethon import events
 
 from app.bot.decorators import setup_handler
+from app.bot.live_progress import live_progress
+from app.bot.outbox import outbox
 from app.bot.views.active_downloads_view import render_download_status
-from app.database.models import User
+from app.database import UserRecord
+from app.services.seedr import AccountSeedr
 from app.utils.language import Translator
 
 
 @setup_handler(require_auth=True)
 async def active_download_callback(
     event: events.CallbackQuery.Event,
-    user: User,
+    user: UserRecord,
     translator: Translator,
     seedr_client: AsyncSeedr,
+    params: tuple[str | None, ...],
 ):
-    callback_data = event.data.decode()
-    download_id = int(callback_data.replace("active_", ""))
+    download_id = int(params[0])
 
     contents = await seedr_client.list_contents()
 
@@ -25,7 +28,7 @@ async def active_download_callback(
 
     if active_download:
         view = render_download_status(active_download, translator)
-        await event.edit(view.message, buttons=view.buttons)
+        await outbox.edit(event, view.message, buttons=view.buttons)
         return
 
     await event.answer(translator.get("downloadNotFound"), alert=True)
@@ -34,13 +37,30 @@ async def active_download_callback(
 @setup_handler(require_auth=True)
 async def cancel_download_callback(
     event: events.CallbackQuery.Event,
-    user: User,
+    user: UserRecord,
     translator: Translator,
     seedr_client: AsyncSeedr,
+    params: tuple[str | None, ...],
 ):
     """Handle cancelling an active download."""
-    download_id = str(event.data.decode().replace("cancel_download_", ""))
+    download_id = params[0]
 
     await seedr_client.delete_torrent(download_id)
 
-    await event.edit(translator.get("downloadCancelled"))
+    await outbox.edit(event, translator.get("downloadCancelled"))
+
+
+@setup_handler(require_auth=True)
+async def live_downloads_callback(
+    event: events.CallbackQuery.Event,
+    user: UserRecord,
+    translator: Translator,
+    seedr_client: AccountSeedr,
+    params: tuple[str | None, ...],
+):
+    """Keep the status of a download, or the menu of all downloads, updating for a while."""
+    download_id = int(params[0]) if params[0] else None
+
+    live_progress.watch(seedr_client, user.id, event, translator, download_id)
+    minutes = round(live_progress.timeout / 60)
+    await event.answer(translator.get("liveUpdatesStarted").format(minutes=minutes))
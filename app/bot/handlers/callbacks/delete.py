@@ -4,40 +4,49 @@ from seedrcc import AsyncSeedr
 from telethon import events
 
 from app.bot.decorators import setup_handler
+from app.bot.outbox import outbox
 from app.bot.views.status_view import (
     render_deleted_successfully_message,
     render_failed_to_delete_file_message,
     render_failed_to_delete_folder_message,
 )
-from app.database.models import User
+from app.database import UserRecord
 from app.utils.language import Translator
 
 
 @setup_handler(require_auth=True)
 async def delete_file_callback(
-    event: events.CallbackQuery.Event, user: User, translator: Translator, seedr_client: AsyncSeedr
+    event: events.CallbackQuery.Event,
+    user: UserRecord,
+    translator: Translator,
+    seedr_client: AsyncSeedr,
+    params: tuple[str | None, ...],
 ):
     """Handle file deletion callback."""
-    file_id = str(int(event.data.decode().replace("delete_file_", "")))
+    file_id = str(int(params[0]))
     result = await seedr_client.delete_file(file_id)
     if result.result:
         view = render_deleted_successfully_message(translator)
-        await event.edit(view.message, buttons=view.buttons)
+        await outbox.edit(event, view.message, buttons=view.buttons)
     else:
         view = render_failed_to_delete_file_message(translator)
-        await event.edit(view.message, buttons=view.buttons)
+        await outbox.edit(event, view.message, buttons=view.buttons)
 
 
 @setup_handler(require_auth=True)
 async def delete_folder_callback(
-    event: events.CallbackQuery.Event, user: User, translator: Translator, seedr_client: AsyncSeedr
+    event: events.CallbackQuery.Event,
+    user: UserRecord,
+    translator: Translator,
+    seedr_client: AsyncSeedr,
+    params: tuple[str | None, ...],
 ):
     """Handle folder deletion callback."""
-    folder_id = str(int(event.data.decode().replace("delete_folder_", "")))
+    folder_id = str(int(params[0]))
     result = await seedr_client.delete_folder(folder_id)
     if result.result:
         view = render_deleted_successfully_message(translator)
-        await event.edit(view.message, buttons=view.buttons)
+        await outbox.edit(event, view.message, buttons=view.buttons)
     else:
         view = render_failed_to_delete_folder_message(translator)
-        await event.edit(view.message, buttons=view.buttons)
+        await outbox.edit(event, view.message, buttons=view.buttons)
@@ -2,10 +2,12 @@
 
 from seedrcc import AsyncSeedr
 from seedrcc.exceptions import AuthenticationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from telethon import events
 
 from app.bot.client import bot
 from app.bot.decorators import setup_handler
+from app.bot.outbox import outbox
 from app.bot.utils.conversation import ask
 from app.bot.views.login_view import (
     render_enter_email,
@@ -15,14 +17,16 @@ from app.bot.views.login_view import (
     render_logging_in,
     render_store_password_prompt,
 )
-from app.database import get_session
-from app.database.models import User
+from app.database import UserRecord
 from app.database.repository import AccountRepository, UserRepository
+from app.services.seedr import seedr_pool
 from app.utils.language import Translator
 
 
 @setup_handler()
-async def login_email_callback(event: events.CallbackQuery.Event, user: User, translator: Translator):
+async def login_email_callback(
+    event: events.CallbackQuery.Event, user: UserRecord, translator: Translator, session: AsyncSession
+):
     """Handle email/password login callback."""
     has_accounts = bool(user.default_account_id)
     try:
@@ -50,31 +54,33 @@ async def login_email_callback(event: events.CallbackQuery.Event, user: User, tr
             store_password = response_text.lower() == translator.get("yesBtn").lower()
 
             view = render_logging_in(translator)
-            status_message = await conv.send_message(view.message, buttons=view.buttons)
+            status_message = await outbox.respond(conv, view.message, buttons=view.buttons)
 
             seedr_client = await AsyncSeedr.from_password(email, password)
             token = seedr_client.token
             settings = await seedr_client.get_settings()
 
-            async with get_session() as session:
-                account_repo = AccountRepository(session)
-                account = await account_repo.create(
-                    user_id=user.id,
-                    seedr_account_id=str(settings.account.user_id),
-                    token=token.to_base64(),
-                    username=settings.account.username,
-                    email=email,
-                    password=password if store_password else None,
-                    is_premium=bool(settings.account.premium),
-                    invites_remaining=settings.account.invites,
-                )
-                await UserRepository(session).update_settings(event, user.id, default_account_id=account.id)
+            account = await AccountRepository(session).create(
+                user_id=user.id,
+                seedr_account_id=str(settings.account.user_id),
+                token=token.to_base64(),
+                username=settings.account.username,
+                email=email,
+                password=password if store_password else None,
+                is_premium=bool(settings.account.premium),
+                invites_remaining=settings.account.invites,
+            )
+            await UserRepository(session).update_settings(event, user.id, default_account_id=account.id)
+
+            # Drop any pooled client still holding the previous token of this account
+            await seedr_pool.invalidate(account.id)
+            await session.commit()
 
             view = render_logged_in(settings.account.username, translator)
-            await status_message.edit(view.message, buttons=view.buttons)
+            await outbox.edit(status_message, view.message, buttons=view.buttons)
 
     except TimeoutError:
-        await event.respond(translator.get("conversationTimeout"))
+        await outbox.respond(event, translator.get("conversationTimeout"))
     except AuthenticationError:
         view = render_incorrect_password(translator, has_accounts=has_accounts)
-        await status_message.edit(view.message, buttons=view.buttons)
+        await outbox.edit(status_message, view.message, buttons=view.buttons)
@@ -4,52 +4,50 @@ from seedrcc import AsyncSeedr
 from telethon import events
 
 from app.bot.decorators import setup_handler
+from app.bot.outbox import outbox
 from app.bot.views.navigation_view import (
     render_file_details_message,
     render_folder_contents_message,
 )
-from app.database.models import User
+from app.database import UserRecord
 from app.utils.language import Translator
-from app.utils.validators import parse_callback_data
 
 
 @setup_handler(require_auth=True)
 async def folder_callback(
-    event: events.CallbackQuery.Event, user: User, translator: Translator, seedr_client: AsyncSeedr
+    event: events.CallbackQuery.Event,
+    user: UserRecord,
+    translator: Translator,
+    seedr_client: AsyncSeedr,
+    params: tuple[str | None, ...],
 ):
     """
     Handle folder navigation callback.
 
-    Callback data is a series of key-value pairs separated by underscores.
-    Example: "folder_123_page_2_parent_456"
+    Callback parameters are the folder ID, the parent folder ID and the page number.
     """
-    callback_data = event.data.decode()
-    params = parse_callback_data(callback_data)
-
-    folder_id = params.get("folder", "")
-    page = int(params.get("page", 1))
-    parent_id = params.get("parent")
+    folder_id, parent_id, page_number = params
+    page = int(page_number)
 
     contents = await seedr_client.list_contents(folder_id=folder_id)
     view = render_folder_contents_message(contents, folder_id, parent_id, page, translator)
-    await event.edit(view.message, buttons=view.buttons)
+    await outbox.edit(event, view.message, buttons=view.buttons)
 
 
 @setup_handler(require_auth=True)
 async def file_callback(
-    event: events.CallbackQuery.Event, user: User, translator: Translator, seedr_client: AsyncSeedr
+    event: events.CallbackQuery.Event,
+    user: UserRecord,
+    translator: Translator,
+    seedr_client: AsyncSeedr,
+    params: tuple[str | None, ...],
 ):
     """
     Handle file view callback.
 
-    Callback data is a series of key-value pairs separated by underscores.
-    Example: "file_789_parent_123_type_video"
+    Callback parameters are the file ID and the ID of its folder.
     """
-    callback_data = event.data.decode()
-    params = parse_callback_data(callback_data)
-
-    file_id = params.get("file", "")
-    parent_folder_id = params.get("parent")
+    file_id, parent_folder_id = params
 
     if not parent_folder_id:
         await event.answer(translator.get("cannotDetermineFolder"), alert=True)
@@ -68,4 +66,4 @@ async def file_callback(
         playlist_format=playlist_format,
         translator=translator,
     )
-    await event.edit(view.message, link_preview=False, buttons=view.buttons)
+    await outbox.edit(event, view.message, link_preview=False, buttons=view.buttons)
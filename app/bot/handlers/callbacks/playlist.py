@@ -1,60 +1,97 @@
 """Playlist-related callback handlers."""
 
-import os
-
-from seedrcc import AsyncSeedr
-from telethon import events
+from sqlalchemy.ext.asyncio import AsyncSession
+from telethon import errors, events
 from telethon.tl import types
 
 from app.bot.decorators import setup_handler
+from app.bot.outbox import outbox
 from app.bot.views.playlist_view import (
     render_playlist_message,
 )
-from app.database import get_session
-from app.database.models import User
+from app.database import UserRecord
 from app.database.repository import UserRepository
+from app.services.seedr import AccountSeedr, playlist_cache, playlist_cache_ttl
 from app.utils.language import Translator
-from app.utils.playlist import generate_file_playlist, generate_folder_playlist
+from app.utils.playlist import (
+    CachedPlaylist,
+    generate_file_playlist,
+    generate_folder_playlist,
+    get_playlist_thumbnail,
+)
 
 
 @setup_handler(require_auth=True)
 async def playlist_callback(
-    event: events.CallbackQuery.Event, user: User, translator: Translator, seedr_client: AsyncSeedr
+    event: events.CallbackQuery.Event,
+    user: UserRecord,
+    translator: Translator,
+    seedr_client: AccountSeedr,
+    session: AsyncSession,
+    params: tuple[str | None, ...],
 ):
-    """Handle playlist generation callback."""
-    callback_data = event.data.decode()
-    parts = callback_data.split("_")
-    playlist_type = parts[1]
-    media_type = parts[2]
-    media_id_str = "_".join(parts[3:])
-
-    async with get_session() as session:
-        await UserRepository(session).update_settings(event, user.id, playlist_format=playlist_type)
+    """
+    Handle playlist generation callback.
 
-    playlist_result = None
-    if media_type == "file":
-        playlist_result = await generate_file_playlist(seedr_client, media_id_str, playlist_type)
-    else:  # Folder
-        folder_id = media_id_str if media_id_str != "root" else "0"
-        playlist_result = await generate_folder_playlist(seedr_client, folder_id, playlist_type)
+    Generated playlists are cached per account, keyed by the folder's last update
+    time, and the uploaded Telegram document is reused for repeated requests.
+    """
+    playlist_type, media_type, media_id_str = params
+
+    # Remember the format as the user's default, which usually it already is
+    if user.playlist_format != playlist_type:
+        await UserRepository(session).update_settings(event, user.id, playlist_format=playlist_type)
+        await session.commit()
 
-    if playlist_result and os.path.exists(playlist_result.file_path):
-        playlist_file, desired_filename = playlist_result
+    folder_id = media_id_str if media_id_str != "root" else "0"
+    version = None
+    if media_type != "file":
+        version = (await seedr_client.list_contents(folder_id=folder_id)).last_update
 
-        # Select the local thumbnail file path
-        thumbnail_file_path = f"images/{playlist_type}.jpg"
+    cache_key = (media_type, media_id_str, playlist_type, version)
+    cached = playlist_cache.get(seedr_client.seedr_account_id, cache_key)
+    view = render_playlist_message(playlist_type, media_type, media_id_str, translator)
 
+    if cached and cached.document:
         try:
-            view = render_playlist_message(playlist_type, media_type, media_id_str, translator)
-            with open(playlist_file, "rb") as f, open(thumbnail_file_path, "rb") as thumbnail_f:
-                await event.edit(
-                    view.message,
-                    file=f,
-                    attributes=[types.DocumentAttributeFilename(file_name=desired_filename)],
-                    thumb=thumbnail_f,
-                    buttons=view.buttons,
-                )
-        finally:
-            os.remove(playlist_file)
+            await outbox.edit(event, view.message, file=cached.document, buttons=view.buttons)
+            return
+        except errors.FileReferenceExpiredError:
+            pass  # Upload the cached content again below
+
+    if cached:
+        playlist_file, desired_filename = cached.open(), cached.filename
     else:
-        await event.answer(translator.get("noPlayableMedia"), alert=True)
+        playlist_result = None
+        if media_type == "file":
+            playlist_result = await generate_file_playlist(seedr_client, media_id_str, playlist_type)
+        else:  # Folder
+            playlist_result = await generate_folder_playlist(
+                seedr_client, folder_id, playlist_type, slots=seedr_client.request_slots
+            )
+
+        if not playlist_result:
+            await event.answer(translator.get("noPlayableMedia"), alert=True)
+            return
+
+        playlist_file, desired_filename, links = playlist_result
+
+    content = playlist_file.getvalue()
+    message = await outbox.edit(
+        event,
+        view.message,
+        file=playlist_file,
+        attributes=[types.DocumentAttributeFilename(file_name=desired_filename)],
+        thumb=get_playlist_thumbnail(playlist_type),
+        buttons=view.buttons,
+    )
+
+    # Only fresh playlists are stored, and only until the first of their links expires
+    if not cached:
+        document = message.document if isinstance(message, types.Message) else None
+        playlist_cache.set(
+            seedr_client.seedr_account_id,
+            cache_key,
+            CachedPlaylist(content=content, filename=desired_filename, document=document),
+            ttl=playlist_cache_ttl(links),
+        )
@@ -1,11 +1,12 @@
 """Accounts management command handler."""
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from telethon import events
 
 from app.bot.decorators import setup_handler
+from app.bot.outbox import outbox
 from app.bot.views.accounts_view import render_accounts_message
-from app.database import get_session
-from app.database.models import User
+from app.database import UserRecord, release_session
 from app.database.repository import AccountRepository
 from app.utils.language import Translator
 
@@ -13,19 +14,19 @@ from app.utils.language import Translator
 @setup_handler(require_auth=True)
 async def accounts_handler(
     event: events.NewMessage.Event | events.CallbackQuery.Event,
-    user: User,
+    user: UserRecord,
     translator: Translator,
+    session: AsyncSession,
 ):
     """Shows list of accounts and management options."""
     is_callback = isinstance(event, events.CallbackQuery.Event)
 
-    async with get_session() as session:
-        account_repo = AccountRepository(session)
-        accounts = await account_repo.get_by_user_id(user.id)
+    accounts = await AccountRepository(session).get_by_user_id(user.id)
+    await release_session(session)
 
     view = render_accounts_message(accounts, user.default_account_id, translator)
 
     if is_callback:
-        await event.edit(view.message, buttons=view.buttons)
+        await outbox.edit(event, view.message, buttons=view.buttons)
     else:
-        await event.respond(view.message, buttons=view.buttons)
+        await outbox.respond(event, view.message, buttons=view.buttons)
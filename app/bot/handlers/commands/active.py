@@ -4,25 +4,26 @@ from seedrcc import AsyncSeedr
 from telethon import events
 
 from app.bot.decorators import setup_handler
+from app.bot.outbox import outbox
 from app.bot.views.active_downloads_view import (
     render_download_menu,
     render_download_status,
     render_no_downloads_message,
 )
 from app.bot.views.shared_view import render_processing_message
-from app.database.models import User
+from app.database import UserRecord
 from app.utils.language import Translator
 
 
 @setup_handler(require_auth=True)
 async def active_handler(
     event: events.NewMessage.Event,
-    user: User,
+    user: UserRecord,
     translator: Translator,
     seedr_client: AsyncSeedr,
 ):
     processing_view = render_processing_message(translator)
-    status_message = await event.respond(processing_view.message)
+    status_message = await outbox.respond(event, processing_view.message)
 
     contents = await seedr_client.list_contents()
 
@@ -32,7 +33,7 @@ async def active_handler(
 
     if not active_downloads:
         view = render_no_downloads_message(translator)
-        await status_message.edit(view.message, buttons=view.buttons)
+        await outbox.edit(status_message, view.message, buttons=view.buttons)
         return
 
     # View based on number of downloads
@@ -41,4 +42,4 @@ async def active_handler(
     else:
         view = render_download_status(active_downloads[0], translator)
 
-    await status_message.edit(view.message, buttons=view.buttons)
+    await outbox.edit(status_message, view.message, buttons=view.buttons)
@@ -4,29 +4,30 @@ from seedrcc import AsyncSeedr
 from telethon import events
 
 from app.bot.decorators import setup_handler
+from app.bot.outbox import outbox
 from app.bot.views.navigation_view import render_folder_contents_message
 from app.bot.views.shared_view import render_processing_message
 from app.bot.views.status_view import render_no_files_message
-from app.database.models import User
+from app.database import UserRecord
 from app.utils.language import Translator
 
 
 @setup_handler(require_auth=True)
 async def files_handler(
     event: events.NewMessage.Event,
-    user: User,
+    user: UserRecord,
     translator: Translator,
     seedr_client: AsyncSeedr,
     folder_id: str | None = None,
 ):
     processing_view = render_processing_message(translator)
-    status_message = await event.respond(processing_view.message)
+    status_message = await outbox.respond(event, processing_view.message)
 
     contents = await seedr_client.list_contents(folder_id=folder_id or "0")
 
     if not contents.folders and not contents.files:
         view = render_no_files_message(translator)
-        await status_message.edit(view.message, buttons=view.buttons)
+        await outbox.edit(status_message, view.message, buttons=view.buttons)
         return
 
     view = render_folder_contents_message(
@@ -37,4 +38,4 @@ async def files_handler(
         translator=translator,
     )
 
-    await status_message.edit(view.message, buttons=view.buttons)
+    await outbox.edit(status_message, view.message, buttons=view.buttons)
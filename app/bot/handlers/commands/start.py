@@ -4,14 +4,15 @@ from telethon import events
 
 from app.bot.decorators import setup_handler
 from app.bot.handlers.messages.add_torrent import add_torrent_handler
+from app.bot.outbox import outbox
 from app.bot.utils.commands import set_user_commands
 from app.bot.views.start_view import render_start_message
-from app.database.models import User
+from app.database import UserRecord
 from app.utils.language import Translator
 
 
 @setup_handler()
-async def start_handler(event: events.NewMessage.Event, user: User, translator: Translator):
+async def start_handler(event: events.NewMessage.Event, user: UserRecord, translator: Translator):
     has_accounts = bool(user.default_account_id)
 
     # Check for deep link start parameter
@@ -23,14 +24,15 @@ async def start_handler(event: events.NewMessage.Event, user: User, translator:
         await add_torrent_handler(event, magnet_link=magnet_link)
         raise events.StopPropagation()
 
-    await set_user_commands(event, translator, has_accounts)
+    await set_user_commands(event, user.language, has_accounts)
 
     view = render_start_message(
         has_accounts=has_accounts,
         translator=translator,
     )
 
-    await event.respond(
+    await outbox.respond(
+        event,
         view.message,
         buttons=view.buttons,
     )
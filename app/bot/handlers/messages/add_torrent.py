@@ -4,7 +4,9 @@ import seedrcc.exceptions
 from seedrcc import AsyncSeedr
 from telethon import events
 
+from app.bot.completion_notifier import completion_notifier
 from app.bot.decorators import setup_handler
+from app.bot.outbox import outbox
 from app.bot.views.add_torrent_view import (
     render_add_torrent_success,
     render_file_too_large_message,
@@ -15,7 +17,7 @@ from app.bot.views.add_torrent_view import (
 )
 from app.bot.views.shared_view import render_processing_message
 from app.config import settings
-from app.database.models import User
+from app.database import UserRecord
 from app.utils import extract_magnet_from_text, format_size
 from app.utils.language import Translator
 
@@ -23,7 +25,7 @@ from app.utils.language import Translator
 @setup_handler(require_auth=True)
 async def add_torrent_handler(
     event: events.NewMessage.Event,
-    user: User,
+    user: UserRecord,
     translator: Translator,
     seedr_client: AsyncSeedr,
     magnet_link: str | None = None,
@@ -34,27 +36,28 @@ async def add_torrent_handler(
         magnet_link = extract_magnet_from_text(event.message.text)
 
     view = render_processing_message(translator)
-    status_message = await event.respond(view.message, buttons=view.buttons)
+    status_message = await outbox.respond(event, view.message, buttons=view.buttons)
 
     try:
         result = await seedr_client.add_torrent(magnet_link)
 
         if result.user_torrent_id:
+            completion_notifier.poll_soon(seedr_client.account_id)
             view = render_add_torrent_success(translator, result.title)
-            await status_message.edit(view.message, buttons=view.buttons)
+            await outbox.edit(status_message, view.message, buttons=view.buttons)
         else:
             view = render_item_already_in_queue(translator)
-            await status_message.edit(view.message, buttons=view.buttons)
+            await outbox.edit(status_message, view.message, buttons=view.buttons)
     except seedrcc.exceptions.APIError as err:
         if err.error_type == "queue_full_added_to_wishlist":
             view = render_queue_full_added_to_wishlist(translator)
-            await status_message.edit(view.message, buttons=view.buttons)
+            await outbox.edit(status_message, view.message, buttons=view.buttons)
         elif err.error_type == "not_enough_space_added_to_wishlist":
             view = render_not_enough_space_added_to_wishlist(translator)
-            await status_message.edit(view.message, buttons=view.buttons)
+            await outbox.edit(status_message, view.message, buttons=view.buttons)
         elif err.error_type == "parsing_error":
             view = render_invalid_magnet_message(translator)
-            await status_message.edit(view.message, buttons=view.buttons)
+            await outbox.edit(status_message, view.message, buttons=view.buttons)
         else:
             raise
 
@@ -62,7 +65,7 @@ async def add_torrent_handler(
 @setup_handler(require_auth=True)
 async def handle_torrent_file(
     event: events.NewMessage.Event,
-    user: User,
+    user: UserRecord,
     translator: Translator,
     seedr_client: AsyncSeedr,
 ):
@@ -71,11 +74,11 @@ async def handle_torrent_file(
     if event.message.file.size > settings.max_torrent_file_size:
         max_size_mb = format_size(settings.max_torrent_file_size)
         view = render_file_too_large_message(max_size_mb, translator)
-        await event.respond(view.message, buttons=view.buttons)
+        await outbox.respond(event, view.message, buttons=view.buttons)
         return
 
     view = render_processing_message(translator)
-    status_message = await event.respond(view.message, buttons=view.buttons)
+    status_message = await outbox.respond(event, view.message, buttons=view.buttons)
 
     file_bytes = await event.message.download_media(bytes)
 
@@ -83,20 +86,21 @@ async def handle_torrent_file(
         result = await seedr_client.add_torrent(file_bytes)
 
         if result.user_torrent_id:
+            completion_notifier.poll_soon(seedr_client.account_id)
             view = render_add_torrent_success(translator, result.title)
-            await status_message.edit(view.message, buttons=view.buttons)
+            await outbox.edit(status_message, view.message, buttons=view.buttons)
         else:
             view = render_item_already_in_queue(translator)
-            await status_message.edit(view.message, buttons=view.buttons)
+            await outbox.edit(status_message, view.message, buttons=view.buttons)
     except seedrcc.exceptions.APIError as err:
         if err.error_type == "queue_full_added_to_wishlist":
             view = render_queue_full_added_to_wishlist(translator)
-            await status_message.edit(view.message, buttons=view.buttons)
+            await outbox.edit(status_message, view.message, buttons=view.buttons)
         elif err.error_type == "not_enough_space_added_to_wishlist":
             view = render_not_enough_space_added_to_wishlist(translator)
-            await status_message.edit(view.message, buttons=view.buttons)
+            await outbox.edit(status_message, view.message, buttons=view.buttons)
         elif err.error_type == "parsing_error":
             view = render_invalid_magnet_message(translator)
-            await status_message.edit(view.message, buttons=view.buttons)
+            await outbox.edit(status_message, view.message, buttons=view.buttons)
         else:
             raise
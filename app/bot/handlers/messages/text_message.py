@@ -9,28 +9,34 @@ from app.bot.handlers.commands.files import files_handler
 from app.bot.handlers.commands.info import info_handler
 from app.bot.handlers.commands.login import login_handler
 from app.bot.handlers.commands.signup import signup_handler
-from app.database.models import User
-from app.utils.language import Translator
+from app.database import UserRecord
+from app.utils.language import Translator, get_language_service
+
+# Reply keyboard button label key -> handler of the button
+_BUTTON_HANDLERS = {
+    "fileManagerBtn": files_handler,
+    "activeDownloadsBtn": active_handler,
+    "infoBtn": info_handler,
+    "accountsBtn": accounts_handler,
+    "loginBtn": login_handler,
+    "signupBtn": signup_handler,
+}
+
+# Button label, in any language -> label key
+_button_keys = get_language_service().reverse_index(_BUTTON_HANDLERS)
+
+
+def is_keyboard_button(event: events.NewMessage.Event) -> bool:
+    """Tells whether a message is the label of a reply keyboard button, without touching the database."""
+    return event.message.text in _button_keys
 
 
 @setup_handler(require_auth=False)
-async def text_message_handler(event: events.NewMessage.Event, user: User, translator: Translator, **kwargs):
+async def text_message_handler(event: events.NewMessage.Event, user: UserRecord, translator: Translator, **kwargs):
     """
     Handles text messages from reply keyboard buttons.
     """
-    text = event.message.text
-
-    # Map button text to the corresponding handler function.
-    actions = {
-        translator.get("fileManagerBtn"): files_handler,
-        translator.get("activeDownloadsBtn"): active_handler,
-        translator.get("infoBtn"): info_handler,
-        translator.get("accountsBtn"): accounts_handler,
-        translator.get("loginBtn"): login_handler,
-        translator.get("signupBtn"): signup_handler,
-    }
-
-    handler = actions.get(text)
+    handler = _BUTTON_HANDLERS.get(_button_keys.get(event.message.text, ""))
     if handler:
         # Call the respective handler
         await handler(event, user=user)
@@ -0,0 +1,201 @@
+"""Live updating of active download status messages."""
+
+import asyncio
+import contextvars
+import time
+from dataclasses import dataclass, field
+
+from seedrcc.exceptions import AuthenticationError
+from seedrcc.models import Torrent
+from structlog import get_logger
+from telethon import errors, events
+from telethon.tl.custom import Message
+
+from app.bot.outbox import message_key, outbox
+from app.bot.views import ViewResponse
+from app.bot.views.active_downloads_view import (
+    render_download_menu,
+    render_download_status,
+    render_no_downloads_message,
+)
+from app.config import settings
+from app.services.seedr import AccountSeedr, seedr_pool
+from app.utils.language import Translator
+from app.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+MessageKey = tuple[int, int]
+
+
+@dataclass(slots=True)
+class _Watcher:
+    """A status message kept up to date, showing one download or the menu of all of them."""
+
+    target: events.CallbackQuery.Event | Message
+    translator: Translator
+    download_id: int | None
+    expires_at: float
+
+
+@dataclass(slots=True)
+class _Poller:
+    account_id: int
+    seedr_account_id: str
+    user_id: int
+    token: str
+    watchers: dict[MessageKey, _Watcher] = field(default_factory=dict)
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+    task: asyncio.Task | None = None
+
+
+class LiveProgress:
+    """
+    Keeps active download status messages up to date.
+
+    A single poller per account fetches its torrents and updates every message
+    watching that account, polling every `min_interval` seconds while downloads
+    progress and backing off up to `max_interval` while they are stalled. A
+    message stops being updated after `timeout` seconds, and the poller stops
+    once no message is watching.
+    """
+
+    def __init__(self, min_interval: float, max_interval: float, timeout: float):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.timeout = timeout
+        self._pollers: dict[int, _Poller] = {}
+        # Watched message -> account whose poller updates it
+        self._watched: dict[MessageKey, int] = {}
+
+    def watch(
+        self,
+        client: AccountSeedr,
+        user_id: int,
+        target: events.CallbackQuery.Event | Message,
+        translator: Translator,
+        download_id: int | None = None,
+    ) -> None:
+        """Start (or extend) live updates of a status message, showing one download or all of them."""
+        key = message_key(target)
+        self.unwatch(*key)
+
+        poller = self._pollers.get(client.account_id)
+        if poller is None:
+            poller = self._pollers[client.account_id] = _Poller(
+                client.account_id, client.seedr_account_id, user_id, client.token.to_base64()
+            )
+            # Started in an empty context, so it does not inherit the state of the current event
+            poller.task = asyncio.create_task(self._run(poller), context=contextvars.Context())
+
+        poller.watchers[key] = _Watcher(target, translator, download_id, time.monotonic() + self.timeout)
+        self._watched[key] = client.account_id
+        poller.wakeup.set()
+        self._report()
+
+    def unwatch(self, chat_id: int, message_id: int) -> None:
+        """Stop live updates of a message, e.g. because it is about to show something else."""
+        account_id = self._watched.pop((chat_id, message_id), None)
+        if account_id is not None and (poller := self._pollers.get(account_id)):
+            poller.watchers.pop((chat_id, message_id), None)
+            self._report()
+
+    async def _run(self, poller: _Poller) -> None:
+        try:
+            async with seedr_pool.lease(
+                poller.account_id, poller.seedr_account_id, poller.user_id, poller.token
+            ) as client:
+                await self._poll(poller, client)
+        finally:
+            self._detach(poller)
+
+    async def _poll(self, poller: _Poller, client: AccountSeedr) -> None:
+        interval = self.min_interval
+        last_progress = None
+        while poller.watchers:
+            poller.wakeup.clear()
+            try:
+                contents = await client.list_contents()
+            except AuthenticationError:
+                logger.info("Stopping live progress, account is no longer authorized", account_id=poller.account_id)
+                return
+            except Exception as e:
+                logger.warning("Live progress poll failed", account_id=poller.account_id, error=str(e))
+                interval = self.max_interval
+            else:
+                metrics.increment("live_progress.polls")
+                progress = {torrent.id: torrent.progress for torrent in contents.torrents}
+                interval = self.min_interval if progress != last_progress else min(interval * 2, self.max_interval)
+                last_progress = progress
+                await self._update_watchers(poller, contents.torrents)
+
+            self._expire_watchers(poller)
+            if poller.watchers:
+                try:
+                    await asyncio.wait_for(poller.wakeup.wait(), interval)
+                except TimeoutError:
+                    pass
+
+        # Detached right away, so messages watched from now on get a new poller
+        self._detach(poller)
+
+    def _detach(self, poller: _Poller) -> None:
+        if self._pollers.get(poller.account_id) is poller:
+            del self._pollers[poller.account_id]
+        for key in poller.watchers:
+            self._watched.pop(key, None)
+        poller.watchers.clear()
+        self._report()
+
+    async def _update_watchers(self, poller: _Poller, torrents: list[Torrent]) -> None:
+        watchers = list(poller.watchers.items())
+        results = await asyncio.gather(
+            *(self._update_watcher(watcher, torrents) for _, watcher in watchers), return_exceptions=True
+        )
+        for (key, watcher), keep in zip(watchers, results, strict=True):
+            if keep is True or poller.watchers.get(key) is not watcher:
+                continue
+            if isinstance(keep, Exception):
+                logger.debug("Stopped live progress of message", error=str(keep))
+            del poller.watchers[key]
+            self._watched.pop(key, None)
+
+    async def _update_watcher(self, watcher: _Watcher, torrents: list[Torrent]) -> bool:
+        """Show the current progress in the message. Returns whether it should keep being updated."""
+        view, keep = self._render(watcher, torrents)
+        try:
+            await outbox.edit(watcher.target, view.message, buttons=view.buttons)
+        except errors.MessageIdInvalidError:
+            return False
+        return keep
+
+    @staticmethod
+    def _render(watcher: _Watcher, torrents: list[Torrent]) -> tuple[ViewResponse, bool]:
+        if watcher.download_id is None:
+            if not torrents:
+                return render_no_downloads_message(watcher.translator), False
+            return render_download_menu(torrents, watcher.translator), True
+
+        download = next((torrent for torrent in torrents if torrent.id == watcher.download_id), None)
+        if download is None:
+            return ViewResponse(message=watcher.translator.get("downloadNotFound")), False
+        return render_download_status(download, watcher.translator), True
+
+    def _expire_watchers(self, poller: _Poller) -> None:
+        now = time.monotonic()
+        for key, watcher in list(poller.watchers.items()):
+            if watcher.expires_at <= now:
+                del poller.watchers[key]
+                self._watched.pop(key, None)
+        self._report()
+
+    def _report(self) -> None:
+        metrics.set_gauge("live_progress.pollers", len(self._pollers))
+        metrics.set_gauge("live_progress.watchers", len(self._watched))
+
+
+live_progress = LiveProgress(
+    min_interval=settings.live_progress_min_interval,
+    max_interval=settings.live_progress_max_interval,
+    timeout=settings.live_progress_timeout,
+)
@@ -0,0 +1,233 @@
+"""
+Outbound messages to Telegram.
+
+Every message the bot sends or edits goes through the `outbox`, which:
+
+- Spreads them over a global and a per-chat budget, so bursts are delayed
+  instead of running into FloodWaitError.
+- Waits out a FloodWaitError that does happen and tries again, holding back
+  the other messages to that chat meanwhile.
+- Merges edits of a message that pile up while waiting for the budget into
+  the latest one, which is sent by a task of its own so that no single
+  cancelled caller keeps it from being sent.
+- Skips edits whose text and buttons match what the message already shows.
+"""
+
+import asyncio
+import json
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+from structlog import get_logger
+from telethon import TelegramClient, errors, events
+from telethon.tl.custom import Button, Conversation, Message
+from telethon.tl.tlobject import TLObject
+
+from app.config import settings
+from app.utils.metrics import metrics
+from app.utils.rate_limit import TokenBucket
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# Number of per-chat budgets kept, the least recently used are dropped beyond it
+_MAX_CHAT_BUCKETS = 10_000
+
+SendTarget = events.NewMessage.Event | events.CallbackQuery.Event | Message | Conversation
+EditTarget = events.CallbackQuery.Event | Message
+
+
+@dataclass(slots=True)
+class _PendingEdit:
+    target: EditTarget
+    message: str
+    kwargs: dict[str, Any]
+    future: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+
+def message_key(target: EditTarget) -> tuple[int, int]:
+    """Chat and message ID of the message an edit of `target` changes."""
+    if isinstance(target, events.CallbackQuery.Event):
+        return target.chat_id, target.message_id
+    return target.chat_id, target.id
+
+
+async def _answer(target: EditTarget) -> None:
+    """Stop the loading indicator of a callback query whose edit does not happen, which would answer it."""
+    if not isinstance(target, events.CallbackQuery.Event):
+        return
+    try:
+        await target.answer()
+    except errors.RPCError as e:
+        logger.debug("Could not answer callback query", error=str(e))
+
+
+def _serialize_button(value: Any) -> Any:
+    if isinstance(value, Button):
+        return value.button
+    if isinstance(value, TLObject):
+        return value.to_dict()
+    return repr(value)
+
+
+def _fingerprint(message: str, kwargs: dict[str, Any]) -> int:
+    """Hash of what an edit would show."""
+    buttons = json.dumps(kwargs.get("buttons"), default=_serialize_button)
+    return hash((message, buttons, kwargs.get("link_preview")))
+
+
+class Outbox:
+    """Sends and edits messages within Telegram's rate limits."""
+
+    def __init__(self, global_rate: float, chat_rate: float, chat_burst: int, max_flood_wait: int, tracked: int):
+        self._global_bucket = TokenBucket(global_rate, capacity=global_rate)
+        self._chat_rate = chat_rate
+        self._chat_burst = chat_burst
+        self._chat_buckets: OrderedDict[int, TokenBucket] = OrderedDict()
+        self._max_flood_wait = max_flood_wait
+        self._pending_edits: dict[tuple[int, int], _PendingEdit] = {}
+        self._edit_tasks: set[asyncio.Task] = set()
+        # What each recently sent or edited message shows, oldest first
+        self._shown: OrderedDict[tuple[int, int], int] = OrderedDict()
+        self._max_tracked = tracked
+
+    async def respond(self, target: SendTarget, message: str, **kwargs) -> Message:
+        """Send a message to the chat of `target` (an event, a message or a conversation)."""
+        send = target.send_message if isinstance(target, Conversation) else target.respond
+        sent = await self._deliver(target.chat_id, lambda: send(message, **kwargs))
+        if isinstance(sent, Message) and "file" not in kwargs:
+            self._remember((sent.chat_id, sent.id), _fingerprint(message, kwargs))
+        return sent
+
+    async def send(self, client: TelegramClient, chat_id: int, message: str, **kwargs) -> Message:
+        """Send a message to a chat the bot is not currently handling an event of."""
+        sent = await self._deliver(chat_id, lambda: client.send_message(chat_id, message, **kwargs))
+        if "file" not in kwargs:
+            self._remember((chat_id, sent.id), _fingerprint(message, kwargs))
+        return sent
+
+    async def edit(self, target: EditTarget, message: str, **kwargs) -> Any:
+        """
+        Edit the message of `target` (a callback query or a message).
+
+        Returns the edited message, or None if the message already showed this.
+        """
+        key = message_key(target)
+        if "file" in kwargs:
+            # Media edits are never merged or skipped, callers use the resulting message
+            result = await self._deliver(target.chat_id, lambda: target.edit(message, **kwargs))
+            self._shown.pop(key, None)
+            return result
+
+        if self._shown.get(key) == _fingerprint(message, kwargs):
+            metrics.increment("outbox.edits_unchanged")
+            await _answer(target)
+            return None
+
+        pending = self._pending_edits.get(key)
+        if pending is not None:
+            if pending.target is not target:
+                # Only the latest target is edited, which answers its callback query but not the replaced one's
+                await _answer(pending.target)
+            pending.target, pending.message, pending.kwargs = target, message, kwargs
+            metrics.increment("outbox.edits_merged")
+        else:
+            pending = self._pending_edits[key] = _PendingEdit(target, message, kwargs)
+            task = asyncio.create_task(self._run_edit(key, pending))
+            self._edit_tasks.add(task)
+            task.add_done_callback(self._edit_tasks.discard)
+
+        # A caller that is cancelled only stops waiting, the edit is still sent for the others
+        return await asyncio.shield(pending.future)
+
+    async def _run_edit(self, key: tuple[int, int], pending: _PendingEdit) -> None:
+        try:
+            try:
+                # Edits arriving while this one waits for the budget replace its content
+                await self._wait_for_budget(key[0])
+            finally:
+                del self._pending_edits[key]
+            result = await self._send_edit(key, pending)
+        except Exception as e:
+            pending.future.set_exception(e)
+        except BaseException:
+            pending.future.cancel()
+            raise
+        else:
+            pending.future.set_result(result)
+
+    async def _send_edit(self, key: tuple[int, int], pending: _PendingEdit) -> Any:
+        fingerprint = _fingerprint(pending.message, pending.kwargs)
+        if self._shown.get(key) == fingerprint:
+            metrics.increment("outbox.edits_unchanged")
+            await _answer(pending.target)
+            return None
+
+        try:
+            result = await self._deliver(
+                key[0],
+                lambda: pending.target.edit(pending.message, **pending.kwargs),
+                budgeted=True,
+            )
+        except errors.MessageNotModifiedError:
+            metrics.increment("outbox.edits_unchanged")
+            await _answer(pending.target)
+            result = None
+
+        self._remember(key, fingerprint)
+        return result
+
+    async def _deliver(self, chat_id: int, send: Callable[[], Awaitable[T]], budgeted: bool = False) -> T:
+        """Run `send` within the budget of the chat, waiting out FloodWaitErrors."""
+        while True:
+            if not budgeted:
+                await self._wait_for_budget(chat_id)
+            budgeted = False
+
+            try:
+                return await send()
+            except errors.FloodWaitError as e:
+                if e.seconds > self._max_flood_wait:
+                    raise
+                metrics.increment("outbox.flood_waits")
+                logger.warning("Telegram flood wait, delaying messages", chat_id=chat_id, seconds=e.seconds)
+                self._chat_bucket(chat_id).pause(e.seconds)
+
+    async def _wait_for_budget(self, chat_id: int) -> None:
+        delay = self._chat_bucket(chat_id).reserve()
+        if delay:
+            metrics.increment("outbox.delayed")
+            await asyncio.sleep(delay)
+
+        delay = self._global_bucket.reserve()
+        if delay:
+            metrics.increment("outbox.delayed")
+            await asyncio.sleep(delay)
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self._chat_rate, capacity=self._chat_burst)
+            while len(self._chat_buckets) > _MAX_CHAT_BUCKETS:
+                self._chat_buckets.popitem(last=False)
+        else:
+            self._chat_buckets.move_to_end(chat_id)
+        return bucket
+
+    def _remember(self, key: tuple[int, int], fingerprint: int) -> None:
+        self._shown[key] = fingerprint
+        self._shown.move_to_end(key)
+        while len(self._shown) > self._max_tracked:
+            self._shown.popitem(last=False)
+
+
+outbox = Outbox(
+    global_rate=settings.outbox_global_rate,
+    chat_rate=settings.outbox_chat_rate,
+    chat_burst=settings.outbox_chat_burst,
+    max_flood_wait=settings.outbox_max_flood_wait,
+    tracked=settings.outbox_tracked_messages,
+)
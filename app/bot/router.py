@@ -0,0 +1,80 @@
+"""Dispatching of callback queries to their handlers."""
+
+from collections.abc import Callable, Coroutine
+from typing import Any
+
+from structlog import get_logger
+from telethon import events
+
+from app.bot.callback_data import Op, decode_callback
+from app.bot.live_progress import live_progress
+from app.config import settings
+from app.database import user_cache
+from app.exceptions import CallbackDataExpiredError
+from app.utils.lanes import Lanes
+from app.utils.language import get_language_service
+
+logger = get_logger(__name__)
+language_service = get_language_service()
+
+Handler = Callable[..., Coroutine[Any, Any, Any]]
+
+# Actions that only show something. Only the newest click on a message matters.
+_NAVIGATION_OPS = frozenset({Op.FOLDER, Op.FILE, Op.ACTIVE_DOWNLOAD, Op.LIVE_DOWNLOADS})
+
+# Actions that wait on a conversation and would block the user's other clicks
+_UNSERIALIZED_OPS = frozenset({Op.LOGIN_EMAIL})
+
+
+class CallbackRouter:
+    """
+    Routes callback queries by the action encoded in their data.
+
+    The data is decoded once (see `app.bot.callback_data`) and the handler of
+    its action is called with the decoded parameters as `params`.
+
+    Clicks of a user are handled one at a time, in order, so quick repeated
+    clicks do not race each other. A navigation click that is still waiting
+    when a newer one arrives for the same message is skipped, and clicking a
+    button of a live status message ends its live updates.
+    """
+
+    def __init__(self):
+        self._handlers: dict[Op, Handler] = {}
+        self._lanes = Lanes("callbacks", max_active=settings.max_concurrent_users)
+
+    def add(self, op: Op, handler: Handler) -> None:
+        """Route callback queries for `op` to `handler`."""
+        self._handlers[op] = handler
+
+    async def dispatch(self, event: events.CallbackQuery.Event) -> None:
+        """Run the handler routed for the callback query, if any."""
+        try:
+            decoded = decode_callback(event.data)
+        except CallbackDataExpiredError:
+            user = user_cache.get(event.sender_id)
+            translator = language_service.get_translator(user.language if user else "en")
+            await event.answer(translator.get("buttonExpired"), alert=True)
+            return
+
+        handler = self._handlers.get(decoded[0]) if decoded else None
+        if handler is None:
+            logger.debug("No handler for callback data", data=event.data)
+            return
+
+        op, params = decoded
+        if op is not Op.LIVE_DOWNLOADS:
+            # Any other button on a live status message replaces what it shows
+            live_progress.unwatch(event.chat_id, event.message_id)
+
+        if op in _UNSERIALIZED_OPS:
+            await handler(event, params=params)
+            return
+
+        slot = (event.chat_id, event.message_id) if op in _NAVIGATION_OPS else None
+        async with self._lanes.enter(event.sender_id, slot) as is_current:
+            if not is_current:
+                await event.answer()
+                return
+
+            await handler(event, params=params)
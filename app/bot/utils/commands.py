@@ -1,37 +1,60 @@
 """Utility functions for setting bot commands."""
 
+import functools
+from collections import OrderedDict
+
 from telethon import events
 from telethon.tl import functions, types
 
-from app.utils.language import Translator
+from app.config import settings
+from app.utils.language import get_language_service
+from app.utils.metrics import metrics
 
+# Telegram user ID -> hash of the command set last sent to them
+_sent_commands: OrderedDict[int, int] = OrderedDict()
 
-async def set_user_commands(
-    event: events.NewMessage.Event | events.CallbackQuery.Event,
-    translator: Translator,
-    has_accounts: bool,
-):
-    base_commands = [
+
+@functools.cache
+def _build_commands(language: str, has_accounts: bool) -> list[types.BotCommand]:
+    """Builds the command list of a language, once per language and account state."""
+    translator = get_language_service().get_translator(language)
+    commands = [
         types.BotCommand(command="start", description=translator.get("startCmdDesc")),
         types.BotCommand(command="login", description=translator.get("loginCmdDesc")),
         types.BotCommand(command="signup", description=translator.get("signupCmdDesc")),
     ]
 
     if has_accounts:
-        account_commands = [
+        commands += [
             types.BotCommand(command="files", description=translator.get("filesCmdDesc")),
             types.BotCommand(command="active", description=translator.get("activeCmdDesc")),
             types.BotCommand(command="info", description=translator.get("infoCmdDesc")),
             types.BotCommand(command="accounts", description=translator.get("accountsCmdDesc")),
         ]
-        commands = base_commands + account_commands
-    else:
-        commands = base_commands
+    return commands
+
+
+async def set_user_commands(
+    event: events.NewMessage.Event | events.CallbackQuery.Event,
+    language: str,
+    has_accounts: bool,
+):
+    """Shows the user the commands for their language and account state, unless they already have them."""
+    commands_hash = hash((language, has_accounts))
+    if _sent_commands.get(event.sender_id) == commands_hash:
+        _sent_commands.move_to_end(event.sender_id)
+        metrics.increment("bot_commands.unchanged")
+        return
 
     await event.client(
         functions.bots.SetBotCommandsRequest(
             scope=types.BotCommandScopePeer(peer=await event.get_input_sender()),
             lang_code="",
-            commands=commands,
+            commands=_build_commands(language, has_accounts),
         )
     )
+
+    _sent_commands[event.sender_id] = commands_hash
+    _sent_commands.move_to_end(event.sender_id)
+    while len(_sent_commands) > settings.user_cache_size:
+        _sent_commands.popitem(last=False)
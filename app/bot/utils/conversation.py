@@ -3,6 +3,7 @@
 from telethon import events
 from telethon.tl.custom.conversation import Conversation
 
+from app.bot.outbox import outbox
 from app.bot.views import ViewResponse
 from app.bot.views.login_view import render_cancelled_login_message
 from app.utils.language import Translator
@@ -11,7 +12,7 @@ from app.utils.language import Translator
 async def cancel_conversation(conv: Conversation, translator: Translator, has_accounts: bool):
     """Generic helper to cancel a conversation and show a message."""
     view = render_cancelled_login_message(translator=translator, has_accounts=has_accounts)
-    await conv.send_message(view.message, buttons=view.buttons)
+    await outbox.respond(conv, view.message, buttons=view.buttons)
     conv.cancel()
     raise events.StopPropagation()
 
@@ -31,7 +32,7 @@ async def ask(
     """
     cancel_text = translator.get("cancelBtn")
 
-    await conv.send_message(view.message, buttons=view.buttons)
+    await outbox.respond(conv, view.message, buttons=view.buttons)
     response_msg = await conv.get_response()
     response_text = response_msg.text.strip()
 
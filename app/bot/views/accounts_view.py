@@ -4,6 +4,7 @@ from textwrap import dedent
 
 from telethon import Button
 
+from app.bot.callback_data import Op, encode_callback
 from app.bot.views import ViewResponse
 from app.bot.views.shared_view import get_main_keyboard
 from app.database.models import Account
@@ -23,13 +24,13 @@ def render_accounts_message(
         username = account.username or account.email or f"Account {account.id}"
         account_label = f"{translator.get('activeAccountEmoji')} {username}" if is_active else username
         row = [
-            Button.inline(account_label, f"switch_account_{account.id}".encode()),
-            Button.inline(translator.get("logoutBtn"), f"logout_account_{account.id}".encode()),
+            Button.inline(account_label, encode_callback(Op.SWITCH_ACCOUNT, account.id)),
+            Button.inline(translator.get("logoutBtn"), encode_callback(Op.LOGOUT_ACCOUNT, account.id)),
         ]
         buttons.append(row)
 
     add_account_text = translator.get("addAccountBtn")
-    buttons.append([Button.inline(add_account_text, b"login")])
+    buttons.append([Button.inline(add_account_text, encode_callback(Op.LOGIN))])
     buttons.append([Button.url(translator.get("signupBtn"), "https://www.seedr.cc")])
 
     return ViewResponse(message=message, buttons=buttons)
@@ -50,8 +51,8 @@ def render_logout_account_confirmation(account_id: int, username: str, translato
     """)
     buttons = [
         [
-            Button.inline(translator.get("yesBtn"), f"confirm_logout_{account_id}".encode()),
-            Button.inline(translator.get("noBtn"), b"cancel_logout"),
+            Button.inline(translator.get("yesBtn"), encode_callback(Op.CONFIRM_LOGOUT, account_id)),
+            Button.inline(translator.get("noBtn"), encode_callback(Op.CANCEL_LOGOUT)),
         ]
     ]
     return ViewResponse(message=message.strip(), buttons=buttons)
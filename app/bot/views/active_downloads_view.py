@@ -5,6 +5,7 @@ from textwrap import dedent
 from seedrcc.models import Torrent
 from telethon import Button
 
+from app.bot.callback_data import Op, encode_callback
 from app.bot.views import ViewResponse
 from app.utils import format_date, format_size, progress_bar
 from app.utils.language import Translator
@@ -38,7 +39,12 @@ def render_download_status(download: Torrent, translator: Translator) -> ViewRes
         <b>{translator.get("pausedDownloadWarning") if download.stopped else ""}</b>
     """).strip()
 
-    buttons = [[Button.inline(translator.get("cancelBtn"), f"cancel_download_{download.id}".encode())]]
+    buttons = [
+        [
+            Button.inline(translator.get("liveBtn"), encode_callback(Op.LIVE_DOWNLOADS, download.id)),
+            Button.inline(translator.get("cancelBtn"), encode_callback(Op.CANCEL_DOWNLOAD, download.id)),
+        ]
+    ]
 
     return ViewResponse(message=message, buttons=buttons)
 
@@ -57,7 +63,8 @@ def render_download_menu(active_downloads, translator: Translator) -> ViewRespon
             if len(download.name) > 30
             else f"{download.name} ({int(download.progress)}%)"
         )
-        buttons.append([Button.inline(button_text, f"active_{download.id}".encode())])
+        buttons.append([Button.inline(button_text, encode_callback(Op.ACTIVE_DOWNLOAD, download.id))])
+    buttons.append([Button.inline(translator.get("liveBtn"), encode_callback(Op.LIVE_DOWNLOADS))])
     return ViewResponse(message=message.strip(), buttons=buttons)
 
 
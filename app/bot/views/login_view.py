@@ -4,6 +4,7 @@ from textwrap import dedent
 
 from telethon import Button
 
+from app.bot.callback_data import Op, encode_callback
 from app.bot.views import ViewResponse
 from app.bot.views.shared_view import get_main_keyboard
 from app.utils.language import Translator
@@ -20,13 +21,13 @@ def render_login_message(translator: Translator) -> ViewResponse:
         [
             Button.inline(
                 translator.get("loginWithEmailBtn"),
-                b"login_email",
+                encode_callback(Op.LOGIN_EMAIL),
             )
         ],
         [
             Button.inline(
                 translator.get("authorizeWithDeviceBtn"),
-                b"authorize_device",
+                encode_callback(Op.AUTHORIZE_DEVICE),
             )
         ],
     ]
@@ -73,7 +74,7 @@ def render_incorrect_password(translator: Translator, has_accounts: bool) -> Vie
 
 def render_authorize_device(device_code: str, user_code: str, translator: Translator) -> ViewResponse:
     """Render the authorize device message."""
-    buttons = [[Button.inline(translator.get("doneBtn"), f"auth_complete_{device_code}".encode())]]
+    buttons = [[Button.inline(translator.get("doneBtn"), encode_callback(Op.AUTH_COMPLETE, device_code))]]
     message = translator.get("authorize").format(code=user_code)
     return ViewResponse(message=message, buttons=buttons)
 
@@ -5,6 +5,7 @@ from textwrap import dedent
 from seedrcc.models import File, Folder, ListContentsResult
 from telethon import Button
 
+from app.bot.callback_data import Op, encode_callback
 from app.bot.views import ViewResponse
 from app.config import settings
 from app.utils import format_date, format_size
@@ -46,7 +47,7 @@ def _build_item_buttons(folders: list[Folder], files: list[File], folder_id: str
             [
                 Button.inline(
                     f"{translator.get('folderEmoji')} {folder.name}",
-                    f"folder_{folder.id}_page_1_parent_{folder_id}".encode(),
+                    encode_callback(Op.FOLDER, folder.id, folder_id, 1),
                 )
             ]
         )
@@ -57,7 +58,9 @@ def _build_item_buttons(folders: list[Folder], files: list[File], folder_id: str
             emoji = translator.get("videoEmoji")
         elif file.play_audio:
             emoji = translator.get("audioEmoji")
-        buttons.append([Button.inline(f"{emoji} {file.name}", f"file_{file.folder_file_id}_parent_{folder_id}")])
+        buttons.append(
+            [Button.inline(f"{emoji} {file.name}", encode_callback(Op.FILE, file.folder_file_id, folder_id))]
+        )
 
     return buttons
 
@@ -69,13 +72,11 @@ def _build_pagination_buttons(
     buttons = []
     if page > 1:
         buttons.append(
-            Button.inline(
-                translator.get("previousBtn"), f"folder_{folder_id}_parent_{parent_id}_page_{page - 1}".encode()
-            )
+            Button.inline(translator.get("previousBtn"), encode_callback(Op.FOLDER, folder_id, parent_id, page - 1))
         )
     if page < total_pages:
         buttons.append(
-            Button.inline(translator.get("nextBtn"), f"folder_{folder_id}_parent_{parent_id}_page_{page + 1}".encode())
+            Button.inline(translator.get("nextBtn"), encode_callback(Op.FOLDER, folder_id, parent_id, page + 1))
         )
     return buttons
 
@@ -84,12 +85,12 @@ def _build_action_buttons(folder_id: str, parent_id: str, translator: Translator
     """Builds the action buttons (Delete, Get Link, Back, etc.)."""
     return [
         [
-            Button.inline(translator.get("deleteBtn"), f"delete_folder_{folder_id}".encode()),
-            Button.inline(translator.get("getLinkBtn"), f"folder_link_{folder_id}".encode()),
+            Button.inline(translator.get("deleteBtn"), encode_callback(Op.DELETE_FOLDER, folder_id)),
+            Button.inline(translator.get("getLinkBtn"), encode_callback(Op.FOLDER_LINK, folder_id)),
         ],
         [
-            Button.inline(translator.get("playlistBtn"), f"playlist_m3u_folder_{folder_id}".encode()),
-            Button.inline(translator.get("backBtn"), f"folder_{parent_id}".encode()),
+            Button.inline(translator.get("playlistBtn"), encode_callback(Op.PLAYLIST, "m3u", "folder", folder_id)),
+            Button.inline(translator.get("backBtn"), encode_callback(Op.FOLDER, parent_id)),
         ],
     ]
 
@@ -147,8 +148,8 @@ def render_file_details_message(
 
     buttons = [
         [
-            Button.inline(translator.get("deleteBtn"), f"delete_file_{file_id}".encode()),
-            Button.inline(translator.get("getLinkBtn"), f"file_link_{file_id}".encode()),
+            Button.inline(translator.get("deleteBtn"), encode_callback(Op.DELETE_FILE, file_id)),
+            Button.inline(translator.get("getLinkBtn"), encode_callback(Op.FILE_LINK, file_id)),
         ]
     ]
     if file_metadata.play_audio or file_metadata.play_video:
@@ -156,12 +157,12 @@ def render_file_details_message(
             [
                 Button.inline(
                     f"{translator.get('playlistBtn')}",
-                    f"playlist_{playlist_format}_file_{file_id}".encode(),
+                    encode_callback(Op.PLAYLIST, playlist_format, "file", file_id),
                 )
             ]
         )
 
-    back_button = Button.inline(translator.get("backBtn"), f"folder_{file_metadata.folder_id or '0'}".encode())
+    back_button = Button.inline(translator.get("backBtn"), encode_callback(Op.FOLDER, file_metadata.folder_id or "0"))
     buttons.append([back_button])
 
     return ViewResponse(message=message.strip(), buttons=buttons)
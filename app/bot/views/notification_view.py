@@ -0,0 +1,37 @@
+"""Views for notifications pushed to users."""
+
+from telethon import Button
+
+from app.bot.callback_data import Op, encode_callback
+from app.bot.views import ViewResponse
+from app.utils.language import Translator
+
+
+def render_download_completed(
+    name: str,
+    folder_id: int | None,
+    account_id: int,
+    account_name: str,
+    is_default_account: bool,
+    translator: Translator,
+) -> ViewResponse:
+    """Render the notification for a finished download, with buttons to get to it."""
+    if not is_default_account:
+        # File buttons always act on the default account, so offer to switch to this one first
+        message = translator.get("downloadCompletedOnAccount").format(name=name, username=account_name)
+        switch_text = translator.get("switchAccountBtn").format(username=account_name)
+        return ViewResponse(
+            message=message, buttons=[[Button.inline(switch_text, encode_callback(Op.SWITCH_ACCOUNT, account_id))]]
+        )
+
+    message = translator.get("downloadCompleted").format(name=name)
+    if folder_id is None:
+        return ViewResponse(message=message)
+
+    buttons = [
+        [
+            Button.inline(translator.get("openFolderBtn"), encode_callback(Op.FOLDER, folder_id, "0", 1)),
+            Button.inline(translator.get("getLinkBtn"), encode_callback(Op.FOLDER_LINK, folder_id)),
+        ]
+    ]
+    return ViewResponse(message=message, buttons=buttons)
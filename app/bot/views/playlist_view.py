@@ -2,6 +2,7 @@
 
 from telethon import Button
 
+from app.bot.callback_data import Op, encode_callback
 from app.bot.views import ViewResponse
 from app.utils.language import Translator
 
@@ -19,15 +20,15 @@ def render_playlist_message(
         [
             Button.inline(
                 (selected_emoji if playlist_type == "vlc" else "") + translator.get("vlcBtn"),
-                f"playlist_vlc_{media_type}_{media_id_str}".encode(),
+                encode_callback(Op.PLAYLIST, "vlc", media_type, media_id_str),
             ),
             Button.inline(
                 (selected_emoji if playlist_type == "m3u" else "") + translator.get("m3uBtn"),
-                f"playlist_m3u_{media_type}_{media_id_str}".encode(),
+                encode_callback(Op.PLAYLIST, "m3u", media_type, media_id_str),
             ),
             Button.inline(
                 (selected_emoji if playlist_type == "xspf" else "") + translator.get("xspfBtn"),
-                f"playlist_xspf_{media_type}_{media_id_str}".encode(),
+                encode_callback(Op.PLAYLIST, "xspf", media_type, media_id_str),
             ),
         ]
     ]
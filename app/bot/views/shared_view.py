@@ -32,3 +32,8 @@ def get_main_keyboard(has_accounts: bool, translator: Translator) -> list:
 def render_processing_message(translator: Translator) -> ViewResponse:
     """Render the processing message."""
     return ViewResponse(message=translator.get("processing"))
+
+
+def render_service_unavailable_message(translator: Translator) -> ViewResponse:
+    """Render the message for when Seedr is unavailable."""
+    return ViewResponse(message=translator.get("serviceUnavailable"))
@@ -25,6 +25,23 @@ class Settings(BaseSettings):
         default="sqlite:///data/seedrccbot.sqlite",
         description="Database connection URL",
     )
+    database_pool_size: int = Field(default=20, description="Connections kept open to a PostgreSQL database")
+    database_max_overflow: int = Field(
+        default=30, description="Extra connections opened to a PostgreSQL database under load"
+    )
+    database_statement_cache_size: int = Field(
+        default=500, description="Prepared statements cached per PostgreSQL connection"
+    )
+    sqlite_pool_size: int = Field(
+        default=5, description="Connections kept open to a SQLite database (reads run concurrently in WAL mode)"
+    )
+    sqlite_busy_timeout: int = Field(
+        default=5000, description="Milliseconds a SQLite connection waits for the write lock before failing"
+    )
+    sqlite_mmap_size: int = Field(
+        default=256 * 1024 * 1024,  # 256 MB
+        description="Bytes of the SQLite database file accessed through memory-mapped I/O",
+    )
 
     # Bot Settings
     bot_name: str = Field(default="Seedrcc Bot", description="Name of the bot")
@@ -33,9 +50,135 @@ class Settings(BaseSettings):
         description="Maximum allowed size for torrent file uploads in bytes",
     )
     page_size: int = Field(default=8, description="Number of items to show per page in lists")
+    max_concurrent_users: int = Field(
+        default=200, description="Maximum number of users whose button clicks are handled at the same time"
+    )
+    cheap_handler_workers: int = Field(
+        default=8, description="Workers running handlers that only reply from the database"
+    )
+    heavy_handler_workers: int = Field(default=4, description="Workers running handlers that wait on Seedr")
+    cheap_handler_queue_size: int = Field(
+        default=500, description="Events waiting for a cheap handler worker before new ones are turned away"
+    )
+    heavy_handler_queue_size: int = Field(
+        default=100, description="Events waiting for a heavy handler worker before new ones are turned away"
+    )
+    outbox_global_rate: float = Field(default=25.0, description="Messages sent or edited per second across all chats")
+    outbox_chat_rate: float = Field(default=1.0, description="Messages sent or edited per second in a single chat")
+    outbox_chat_burst: int = Field(
+        default=3, description="Messages that can be sent or edited at once in a chat before its rate applies"
+    )
+    outbox_max_flood_wait: int = Field(
+        default=300, description="Longest Telegram flood wait, in seconds, waited out before a message is given up"
+    )
+    outbox_tracked_messages: int = Field(
+        default=20_000, description="Recently sent messages whose content is remembered to skip unchanged edits"
+    )
+    live_progress_min_interval: float = Field(
+        default=5.0, description="Seconds between live download status updates while downloads progress"
+    )
+    live_progress_max_interval: float = Field(
+        default=30.0, description="Longest time in seconds between live download status updates while stalled"
+    )
+    live_progress_timeout: int = Field(
+        default=600, description="Seconds a download status message keeps updating after the Live button is clicked"
+    )
+    completion_notifications: bool = Field(
+        default=False, description="Notify users when a download finishes on any of their accounts"
+    )
+    completion_poll_interval: float = Field(
+        default=60.0, description="Seconds between completion checks of an account with active downloads"
+    )
+    completion_idle_poll_interval: float = Field(
+        default=900.0, description="Seconds between completion checks of an account without active downloads"
+    )
+    completion_accounts_refresh_interval: float = Field(
+        default=300.0, description="Seconds between reloads of the accounts checked for completed downloads"
+    )
+    completion_poll_concurrency: int = Field(
+        default=20, description="Maximum number of accounts checked for completed downloads at the same time"
+    )
+    callback_store_size: int = Field(
+        default=100_000, description="Maximum number of stored inline button payloads too large for Telegram"
+    )
+    user_cache_size: int = Field(default=10_000, description="Maximum number of users cached in memory")
+    user_cache_ttl: int = Field(default=3600, description="Seconds a cached user is trusted before it is read again")
+
+    # Seedr Client Settings
+    seedr_client_pool_size: int = Field(
+        default=500,
+        description="Maximum number of warm Seedr clients kept open, one per account",
+    )
+    seedr_client_idle_ttl: int = Field(
+        default=600,
+        description="Seconds an unused Seedr client is kept open before it is closed",
+    )
+    token_flush_delay: float = Field(
+        default=2.0,
+        description="Seconds refreshed Seedr tokens are batched in memory before being written to the database",
+    )
+    seedr_account_concurrency: int = Field(
+        default=4,
+        description="Maximum number of concurrent Seedr requests per account when crawling folders",
+    )
+    seedr_breaker_failure_rate: float = Field(
+        default=0.5,
+        description="Share of failed or slow Seedr calls within the window that opens the circuit breaker",
+    )
+    seedr_breaker_min_calls: int = Field(
+        default=10,
+        description="Minimum number of Seedr calls within the window before the circuit breaker can open",
+    )
+    seedr_breaker_window: int = Field(default=60, description="Seconds of Seedr calls the circuit breaker looks at")
+    seedr_breaker_open_duration: int = Field(
+        default=30,
+        description="Seconds the circuit breaker fails Seedr calls fast before letting trial calls through",
+    )
+    seedr_breaker_slow_call: float = Field(
+        default=10.0,
+        description="Seconds after which a Seedr call counts as failed for the circuit breaker",
+    )
+    seedr_breaker_half_open_calls: int = Field(
+        default=3,
+        description="Number of successful trial calls needed to close the circuit breaker again",
+    )
+    listing_cache_ttl: int = Field(default=30, description="Seconds a folder listing is served from cache")
+    listing_cache_active_ttl: int = Field(
+        default=5,
+        description="Seconds a folder listing with running downloads is served from cache",
+    )
+    listing_cache_max_items: int = Field(
+        default=200_000,
+        description="Maximum number of files, folders and torrents held across all cached folder listings",
+    )
+    seedr_link_ttl: int = Field(
+        default=3600,
+        description="Seconds a Seedr download link stays valid when the link does not carry its own expiry",
+    )
+    link_cache_max_entries: int = Field(default=50_000, description="Maximum number of cached download links")
+    playlist_cache_ttl: int = Field(
+        default=300,
+        description="Seconds a generated playlist is reused, must stay below the lifetime of Seedr download links",
+    )
+    playlist_cache_max_bytes: int = Field(
+        default=32 * 1024 * 1024,  # 32 MB
+        description="Maximum total size of cached playlist files in bytes",
+    )
+
+    # Monitoring
+    metrics_log_interval: int = Field(
+        default=300,
+        description="Seconds between metrics snapshots written to the log, 0 to disable",
+    )
 
     # Security
     encryption_key: str = Field(..., description="Fernet encryption key for securing credentials")
+    old_encryption_keys: str = Field(
+        default="", description="Comma-separated previous Fernet keys still accepted for decryption during rotation"
+    )
+    decryption_cache_size: int = Field(
+        default=4096, description="Maximum number of decrypted credentials kept in memory"
+    )
 
 
 # Global settings instance
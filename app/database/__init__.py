@@ -2,7 +2,8 @@
 
 from app.database.models import Account, Base, User
 from app.database.repository import AccountRepository, UserRepository
-from app.database.session import close_db, get_session, init_db
+from app.database.session import close_db, get_session, init_db, release_session, unit_of_work
+from app.database.user_cache import UserRecord, user_cache
 
 __all__ = [
     "Base",
@@ -10,7 +11,11 @@ __all__ = [
     "Account",
     "UserRepository",
     "AccountRepository",
+    "UserRecord",
+    "user_cache",
     "get_session",
+    "unit_of_work",
+    "release_session",
     "init_db",
     "close_db",
 ]
@@ -34,8 +34,9 @@ class Account(Base, TimestampMixin):
 
     # Authentication tokens (encrypted)
     token: Mapped[str] = mapped_column(EncryptedType, nullable=False)
-    password: Mapped[str | None] = mapped_column(EncryptedType, nullable=True)
-    cookie: Mapped[str | None] = mapped_column(EncryptedType, nullable=True)
+    # Only needed to log in again, so they are not loaded (or decrypted) with the account
+    password: Mapped[str | None] = mapped_column(EncryptedType, nullable=True, deferred=True)
+    cookie: Mapped[str | None] = mapped_column(EncryptedType, nullable=True, deferred=True)
 
     # Relationships
     user: Mapped[User] = relationship("User", back_populates="accounts")
@@ -33,7 +33,7 @@ class User(Base, TimestampMixin):
         "Account",
         back_populates="user",
         cascade="all, delete-orphan",
-        lazy="selectin",
+        lazy="select",
     )
 
     def __repr__(self) -> str:
@@ -0,0 +1,59 @@
+"""Per-task counting of database statements."""
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@dataclass(slots=True)
+class QueryStats:
+    """Number of statements run and the time spent running them."""
+
+    statements: int = 0
+    duration: float = 0.0
+    # Stats of the enclosing block, which count the same statements
+    parent: QueryStats | None = field(default=None, repr=False)
+
+    def as_log_context(self) -> dict:
+        return {"db_statements": self.statements, "db_time_ms": round(self.duration * 1000, 2)}
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    Count the statements run inside the block.
+
+    Blocks can be nested; statements of an inner block also count for the outer
+    ones, as soon as they run.
+    """
+    stats = QueryStats(parent=_current_stats.get())
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Record every statement run by `engine` in the stats of the current `track_queries` block."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        context._query_started_at = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        duration = time.perf_counter() - context._query_started_at
+        stats = _current_stats.get()
+        while stats is not None:
+            stats.statements += 1
+            stats.duration += duration
+            stats = stats.parent
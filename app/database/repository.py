@@ -1,14 +1,12 @@
 """Repository for database operations."""
 
-from sqlalchemy import select
+from sqlalchemy import and_, delete, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from telethon import events
 
 from app.bot.utils.commands import set_user_commands
 from app.database.models import Account, User
-from app.utils.language import get_language_service
-
-language_service = get_language_service()
+from app.database.user_cache import mark_user_changed
 
 
 class UserRepository:
@@ -22,6 +20,16 @@ class UserRepository:
         result = await self.session.execute(select(User).where(User.telegram_id == telegram_id))
         return result.scalar_one_or_none()
 
+    async def get_with_default_account(self, telegram_id: int) -> tuple[User | None, Account | None]:
+        """Get user by Telegram ID together with their default account, in a single query."""
+        result = await self.session.execute(
+            select(User, Account)
+            .outerjoin(Account, and_(Account.id == User.default_account_id, Account.user_id == User.id))
+            .where(User.telegram_id == telegram_id)
+        )
+        row = result.one_or_none()
+        return (row[0], row[1]) if row else (None, None)
+
     async def get_by_id(self, user_id: int) -> User | None:
         """Get user by ID."""
         result = await self.session.execute(select(User).where(User.id == user_id))
@@ -46,24 +54,27 @@ class UserRepository:
     async def update_settings(
         self, event: events.NewMessage.Event | events.CallbackQuery.Event, user_id: int, **kwargs
     ) -> User | None:
-        """Update user settings and refresh commands."""
+        """Update user settings and refresh commands. Settings that keep their value are left alone."""
         user = await self.get_by_id(user_id)
         if not user:
             return None
 
-        for key, value in kwargs.items():
-            if hasattr(user, key):
-                setattr(user, key, value)
+        changes = {key: value for key, value in kwargs.items() if hasattr(user, key) and getattr(user, key) != value}
+        if not changes:
+            return user
+
+        for key, value in changes.items():
+            setattr(user, key, value)
 
         await self.session.flush()
+        mark_user_changed(self.session, user.id)
 
         # Update bot commands
-        translator = language_service.get_translator(user.language)
         has_accounts = user.default_account_id is not None
 
         await set_user_commands(
             event=event,
-            translator=translator,
+            language=user.language,
             has_accounts=has_accounts,
         )
 
@@ -111,9 +122,10 @@ class AccountRepository:
         """Update or create an account."""
         account = await self.get_by_seedr_account_id(seedr_account_id, user_id)
         if account:
-            # Update existing account
+            # Update existing account. The class is checked, since reading a deferred
+            # attribute of the instance would load it outside the async session.
             for key, value in kwargs.items():
-                if hasattr(account, key):
+                if hasattr(Account, key):
                     setattr(account, key, value)
         else:
             # Create new account
@@ -125,24 +137,21 @@ class AccountRepository:
             self.session.add(account)
 
         await self.session.flush()
+        mark_user_changed(self.session, user_id)
         return account
 
-    async def update_token(self, account_id: int, user_id: int, token: str) -> Account | None:
+    async def update_token(self, account_id: int, user_id: int, token: str) -> bool:
         """Update account token."""
-        account = await self.get_by_id(account_id, user_id)
-        if not account:
-            return None
-
-        account.token = token
-        await self.session.flush()
-        return account
+        result = await self.session.execute(
+            update(Account).where(Account.id == account_id, Account.user_id == user_id).values(token=token)
+        )
+        return result.rowcount > 0
 
     async def delete(self, account_id: int, user_id: int) -> bool:
         """Delete an account."""
-        account = await self.get_by_id(account_id, user_id)
-        if not account:
+        result = await self.session.execute(delete(Account).where(Account.id == account_id, Account.user_id == user_id))
+        if not result.rowcount:
             return False
 
-        await self.session.delete(account)
-        await self.session.flush()
+        mark_user_changed(self.session, user_id)
         return True
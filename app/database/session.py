@@ -2,14 +2,20 @@
 
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
 
+from sqlalchemy import event
 from sqlalchemy.engine.url import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy.pool import StaticPool
 from structlog import get_logger
 
 from app.config import settings
 from app.database.models import Base
 from app.database.models.bot_config import BotConfig
+from app.database.query_stats import instrument_engine
+from app.database.user_cache import user_cache
 
 logger = get_logger(__name__)
 
@@ -30,18 +36,55 @@ def make_async_db_url(db_url: str) -> str:
     return url.render_as_string(hide_password=False)
 
 
+def _engine_options(db_url: str) -> dict:
+    """Engine options suited to the database backend."""
+    url = make_url(db_url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # An in-memory database only exists within its connection, so every session shares that one
+        return {"poolclass": StaticPool}
+
+    if url.get_backend_name() == "sqlite":
+        # SQLite has a single writer, so a large pool only adds lock contention,
+        # and a local file does not need its connections pinged
+        return {
+            "pool_size": settings.sqlite_pool_size,
+            "max_overflow": 0,
+            "pool_timeout": 30,
+        }
+
+    return {
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow,
+        "pool_timeout": 10,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "connect_args": {"prepared_statement_cache_size": settings.database_statement_cache_size},
+    }
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Tunes every new SQLite connection for concurrent access."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout:d}")
+    cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size:d}")
+    cursor.close()
+
+
 # Create async engine
 engine = create_async_engine(
     make_async_db_url(settings.database_url),
-    pool_size=20,
-    max_overflow=30,
-    pool_timeout=10,
-    pool_recycle=1800,
-    pool_pre_ping=True,
     echo=False,
     future=True,
+    **_engine_options(settings.database_url),
 )
 
+if engine.dialect.name == "sqlite":
+    event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+
+instrument_engine(engine.sync_engine)
+
 # Create session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -52,10 +95,42 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 
+# Session of the unit of work the current task belongs to
+_current_session: ContextVar[AsyncSession | None] = ContextVar("current_session", default=None)
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flushed(session: Session, flush_context) -> None:
+    session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_write(orm_execute_state: ORMExecuteState) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    session.info.pop("has_writes", None)
+
+    # Cached users are only dropped once their changes are visible to other sessions
+    if changed_user_ids := session.info.pop("changed_user_ids", None):
+        user_cache.invalidate(changed_user_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop("has_writes", None)
+    session.info.pop("changed_user_ids", None)
+
+
 @asynccontextmanager
-async def get_session() -> AsyncGenerator[AsyncSession]:
+async def get_session(read_only: bool = False) -> AsyncGenerator[AsyncSession]:
     """Get async database session.
 
+    Read-only sessions are never committed, which saves a round-trip.
+
     Usage:
         async with get_session() as session:
             # Use session here
@@ -64,6 +139,9 @@ async def get_session() -> AsyncGenerator[AsyncSession]:
     async with AsyncSessionLocal() as session:
         try:
             yield session
+            if read_only:
+                return
+
             await session.commit()
         except Exception:
             await session.rollback()
@@ -72,6 +150,44 @@ async def get_session() -> AsyncGenerator[AsyncSession]:
             await session.close()
 
 
+@asynccontextmanager
+async def unit_of_work() -> AsyncGenerator[AsyncSession]:
+    """
+    Get the session shared by all the work done for one Telegram event.
+
+    Nested units of work reuse the outermost session. The session only takes a
+    connection from the pool once it is used, and is committed at the end only
+    if something was written.
+    """
+    session = _current_session.get()
+    if session is not None:
+        yield session
+        return
+
+    async with AsyncSessionLocal() as session:
+        token = _current_session.set(session)
+        try:
+            yield session
+            await release_session(session)
+        except Exception:
+            await session.rollback()
+            raise
+        finally:
+            _current_session.reset(token)
+
+
+async def release_session(session: AsyncSession) -> None:
+    """
+    Commit pending writes, if any, and give the session's connection back to the pool.
+
+    The session stays usable. Objects it loaded keep their loaded attributes.
+    """
+    if session.info.get("has_writes"):
+        await session.commit()
+    elif session.in_transaction():
+        await session.close()
+
+
 async def init_db() -> None:
     """Initialize database tables."""
 
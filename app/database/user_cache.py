@@ -0,0 +1,101 @@
+"""In-process cache of lightweight user records."""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database.models import User
+from app.utils.metrics import metrics
+
+
+@dataclass(frozen=True, slots=True)
+class UserRecord:
+    """The user fields handlers need, detached from any database session."""
+
+    id: int
+    telegram_id: int
+    username: str | None
+    language: str
+    playlist_format: str
+    default_account_id: int | None
+
+    @classmethod
+    def from_model(cls, user: User) -> UserRecord:
+        return cls(
+            id=user.id,
+            telegram_id=user.telegram_id,
+            username=user.username,
+            language=user.language,
+            playlist_format=user.playlist_format,
+            default_account_id=user.default_account_id,
+        )
+
+
+class UserCache:
+    """
+    Bounded LRU cache of user records keyed by Telegram ID.
+
+    Records are dropped once the user or their accounts change. A global
+    generation number guards against caching a record that was read from the
+    database before a concurrent change was committed.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._records: OrderedDict[int, tuple[float, UserRecord]] = OrderedDict()
+        self._telegram_ids: dict[int, int] = {}
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def get(self, telegram_id: int) -> UserRecord | None:
+        """Get the cached record of a user, if present and not expired."""
+        cached = self._records.get(telegram_id)
+        if cached is None or cached[0] <= time.monotonic():
+            if cached is not None:
+                self._remove(telegram_id)
+            metrics.increment("user_cache.misses")
+            return None
+
+        self._records.move_to_end(telegram_id)
+        metrics.increment("user_cache.hits")
+        return cached[1]
+
+    def set(self, record: UserRecord, generation: int) -> None:
+        """Cache a record read while the cache was at `generation`."""
+        if generation != self.generation:
+            return
+
+        self._remove(record.telegram_id)
+        self._records[record.telegram_id] = (time.monotonic() + self._ttl, record)
+        self._telegram_ids[record.id] = record.telegram_id
+
+        while len(self._records) > self._max_size:
+            self._remove(next(iter(self._records)))
+
+    def invalidate(self, user_ids: set[int]) -> None:
+        """Drop the records of the given users (by database ID)."""
+        self.generation += 1
+        for user_id in user_ids:
+            telegram_id = self._telegram_ids.get(user_id)
+            if telegram_id is not None:
+                self._remove(telegram_id)
+
+    def _remove(self, telegram_id: int) -> None:
+        cached = self._records.pop(telegram_id, None)
+        if cached is not None:
+            self._telegram_ids.pop(cached[1].id, None)
+
+
+def mark_user_changed(session: AsyncSession, user_id: int) -> None:
+    """Remember to drop a user's cached record once `session` commits."""
+    session.info.setdefault("changed_user_ids", set()).add(user_id)
+
+
+# Global user cache instance
+user_cache = UserCache(max_size=settings.user_cache_size, ttl=settings.user_cache_ttl)
@@ -5,3 +5,15 @@ class NoAccountError(Exception):
     """Custom exception for when a user has no default account set."""
 
     pass
+
+
+class ServiceUnavailableError(Exception):
+    """Custom exception for when calls to an external service are failing fast."""
+
+    pass
+
+
+class CallbackDataExpiredError(Exception):
+    """Custom exception for when the stored data of an inline button is no longer available."""
+
+    pass
@@ -19,6 +19,7 @@ def configure_logging(log_level: str = "INFO") -> None:
     # Configure structlog
     structlog.configure(
         processors=[
+            structlog.contextvars.merge_contextvars,
             structlog.stdlib.add_log_level,
             structlog.processors.TimeStamper(fmt="iso"),
             structlog.processors.CallsiteParameterAdder(
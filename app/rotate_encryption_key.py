@@ -0,0 +1,124 @@
+"""
+Re-encrypts every encrypted column with a new encryption key.
+
+To rotate ENCRYPTION_KEY without downtime:
+
+1. Restart the bot with ENCRYPTION_KEY set to the new key and OLD_ENCRYPTION_KEYS
+   set to the old one, so it can read data encrypted with either key.
+2. Run this job with the same environment:
+
+       uv run python -m app.rotate_encryption_key
+
+3. Once it finishes, remove OLD_ENCRYPTION_KEYS.
+
+The keys are only read from the settings, never from the command line, where
+they would show up in the process list and the shell history.
+
+Rows are processed in batches ordered by primary key and each batch is
+committed on its own. Rows already encrypted with the new key are skipped, so
+the job can simply be run again after a crash.
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy import TableClause, column, select, table, update
+from sqlalchemy.ext.asyncio import AsyncEngine
+from structlog import get_logger
+
+from app.config import settings
+from app.database.models import Base
+from app.database.session import engine
+from app.utils.encryption import EncryptedType, EncryptionService, parse_keys
+
+logger = get_logger(__name__)
+
+
+def _encrypted_tables() -> list[tuple[TableClause, str, list[str]]]:
+    """Lists the tables with encrypted columns, with their primary key and encrypted column names."""
+    tables = []
+    for model_table in Base.metadata.sorted_tables:
+        columns = [col.name for col in model_table.columns if isinstance(col.type, EncryptedType)]
+        if not columns:
+            continue
+
+        (primary_key,) = model_table.primary_key.columns
+        # Plain columns, so values are read and written without going through EncryptedType
+        raw_table = table(model_table.name, column(primary_key.name), *(column(name) for name in columns))
+        tables.append((raw_table, primary_key.name, columns))
+    return tables
+
+
+async def _rotate_table(
+    engine: AsyncEngine,
+    encryption: EncryptionService,
+    raw_table: TableClause,
+    primary_key: str,
+    columns: list[str],
+    batch_size: int,
+) -> None:
+    """Re-encrypts the encrypted columns of one table, one committed batch at a time."""
+    last_id = None
+    rotated = skipped = 0
+
+    while True:
+        query = select(raw_table).order_by(raw_table.c[primary_key]).limit(batch_size)
+        if last_id is not None:
+            query = query.where(raw_table.c[primary_key] > last_id)
+
+        async with engine.begin() as conn:
+            rows = (await conn.execute(query)).mappings().all()
+            if not rows:
+                break
+
+            for row in rows:
+                for name in columns:
+                    value = row[name]
+                    if value is None or encryption.is_current(value):
+                        skipped += 1
+                        continue
+
+                    # Only overwrite the value read above, in case the bot changed it meanwhile
+                    await conn.execute(
+                        update(raw_table)
+                        .where(raw_table.c[primary_key] == row[primary_key], raw_table.c[name] == value)
+                        .values({name: encryption.rotate(value)})
+                    )
+                    rotated += 1
+
+            last_id = rows[-1][primary_key]
+
+        logger.info("Rotated batch", table=raw_table.name, last_id=last_id, rotated=rotated, skipped=skipped)
+
+    logger.info("Rotated table", table=raw_table.name, rotated=rotated, skipped=skipped)
+
+
+async def rotate_encryption_key(old_keys: tuple[str, ...], new_key: str, batch_size: int) -> None:
+    """Re-encrypts all encrypted columns with `new_key`."""
+    encryption = EncryptionService(new_key, old_keys=old_keys)
+
+    try:
+        for raw_table, primary_key, columns in _encrypted_tables():
+            await _rotate_table(engine, encryption, raw_table, primary_key, columns, batch_size)
+    finally:
+        await engine.dispose()
+
+    logger.info("Encryption key rotation complete")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Re-encrypt stored credentials from OLD_ENCRYPTION_KEYS with ENCRYPTION_KEY."
+    )
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per committed batch")
+    args = parser.parse_args()
+
+    old_keys = parse_keys(settings.old_encryption_keys)
+    if not old_keys:
+        parser.error("OLD_ENCRYPTION_KEYS is not set, there is nothing to rotate from")
+
+    asyncio.run(rotate_encryption_key(old_keys, settings.encryption_key, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
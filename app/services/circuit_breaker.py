@@ -0,0 +1,142 @@
+"""Circuit breaker for calls to external services."""
+
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from structlog import get_logger
+
+from app.exceptions import ServiceUnavailableError
+from app.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Fails calls fast while a service is down or too slow.
+
+    - Closed: calls pass through. Failures and calls slower than
+      `slow_call_threshold` are tracked over a rolling `window` of seconds, and
+      the breaker opens once at least `min_calls` were made and the share of
+      bad calls reaches `failure_rate`.
+    - Open: calls raise `ServiceUnavailableError` immediately for `open_duration` seconds.
+    - Half-open: up to `half_open_calls` trial calls pass through. The breaker
+      closes once they all succeed and opens again on the first bad one.
+
+    Only exceptions listed in `failure_exceptions` count as failures; any
+    other exception means the service answered and counts as a success.
+    """
+
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+    _STATE_GAUGE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float,
+        min_calls: int,
+        window: float,
+        open_duration: float,
+        slow_call_threshold: float,
+        half_open_calls: int,
+        failure_exceptions: tuple[type[BaseException], ...],
+    ):
+        self.name = name
+        self._failure_rate = failure_rate
+        self._min_calls = min_calls
+        self._window = window
+        self._open_duration = open_duration
+        self._slow_call_threshold = slow_call_threshold
+        self._half_open_calls = half_open_calls
+        self._failure_exceptions = failure_exceptions
+
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._calls: deque[tuple[float, bool]] = deque()
+        self._trials_in_flight = 0
+        self._trial_successes = 0
+        metrics.set_gauge(f"{self.name}.state", self._STATE_GAUGE[self._state])
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    async def call(self, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `func` through the breaker."""
+        is_trial = self._before_call()
+        started_at = time.monotonic()
+        try:
+            result = await func()
+        except self._failure_exceptions:
+            self._after_call(is_trial, ok=False)
+            raise
+        except Exception:
+            self._after_call(is_trial, ok=True)
+            raise
+        except BaseException:
+            # Cancelled calls say nothing about the service
+            if is_trial:
+                self._trials_in_flight -= 1
+            raise
+
+        self._after_call(is_trial, ok=time.monotonic() - started_at <= self._slow_call_threshold)
+        return result
+
+    def _before_call(self) -> bool:
+        """Reject the call if the breaker is open, and tell whether it is a half-open trial."""
+        if self._state == self.OPEN:
+            if time.monotonic() - self._opened_at < self._open_duration:
+                metrics.increment(f"{self.name}.rejected")
+                raise ServiceUnavailableError()
+            self._transition(self.HALF_OPEN)
+
+        if self._state == self.HALF_OPEN:
+            if self._trials_in_flight + self._trial_successes >= self._half_open_calls:
+                metrics.increment(f"{self.name}.rejected")
+                raise ServiceUnavailableError()
+            self._trials_in_flight += 1
+            return True
+
+        return False
+
+    def _after_call(self, is_trial: bool, ok: bool) -> None:
+        if is_trial:
+            self._trials_in_flight -= 1
+            if self._state != self.HALF_OPEN:
+                return
+            if not ok:
+                self._transition(self.OPEN)
+                return
+            self._trial_successes += 1
+            if self._trial_successes >= self._half_open_calls:
+                self._transition(self.CLOSED)
+            return
+
+        if self._state != self.CLOSED:
+            return
+
+        now = time.monotonic()
+        self._calls.append((now, ok))
+        while self._calls and self._calls[0][0] < now - self._window:
+            self._calls.popleft()
+
+        if len(self._calls) >= self._min_calls:
+            failures = sum(1 for _, call_ok in self._calls if not call_ok)
+            if failures / len(self._calls) >= self._failure_rate:
+                self._transition(self.OPEN)
+
+    def _transition(self, state: str) -> None:
+        logger.warning("Circuit breaker state changed", breaker=self.name, old_state=self._state, new_state=state)
+        self._state = state
+        self._calls.clear()
+        self._trial_successes = 0
+        if state == self.OPEN:
+            self._opened_at = time.monotonic()
+
+        metrics.set_gauge(f"{self.name}.state", self._STATE_GAUGE[state])
+        metrics.increment(f"{self.name}.transitions.{state}")
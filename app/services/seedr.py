@@ -1,11 +1,453 @@
-from seedrcc import Token
+"""Seedr client management and token persistence."""
 
+import asyncio
+import functools
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from urllib.parse import parse_qs, urlsplit
+
+from seedrcc import AsyncSeedr, Token, models
+from seedrcc.exceptions import NetworkError, ServerError
+from structlog import get_logger
+
+from app.config import settings
 from app.database import get_session
 from app.database.repository import AccountRepository
+from app.services.circuit_breaker import CircuitBreaker
+from app.utils.cache import TTLCache
+from app.utils.singleflight import SingleFlight
+
+logger = get_logger(__name__)
+
+
+def _listing_weight(contents: models.ListContentsResult) -> int:
+    """Approximate the memory footprint of a listing by its number of items."""
+    return 1 + len(contents.folders) + len(contents.files) + len(contents.torrents)
+
+
+# Folder listings of all accounts, namespaced by Seedr account id and keyed by folder id
+listing_cache = TTLCache(
+    name="seedr.listing_cache",
+    ttl=settings.listing_cache_ttl,
+    max_weight=settings.listing_cache_max_items,
+    weigher=_listing_weight,
+)
+
+# Download links of all accounts, namespaced by Seedr account id and keyed by ("file", file id) or ("archive", folder id)
+link_cache = TTLCache(
+    name="seedr.link_cache",
+    ttl=settings.seedr_link_ttl,
+    max_weight=settings.link_cache_max_entries,
+)
+
+# Generated playlists of all accounts, namespaced by Seedr account id and keyed by
+# (media type, media id, playlist type, content version)
+playlist_cache = TTLCache(
+    name="playlist_cache",
+    ttl=settings.playlist_cache_ttl,
+    max_weight=settings.playlist_cache_max_bytes,
+    weigher=lambda playlist: len(playlist.content),
+)
+
+# Identical read calls in flight, keyed by (Seedr account id, method, *args)
+inflight_calls = SingleFlight(name="seedr.singleflight")
+
+# Shared by every account, since an outage of Seedr affects all of them
+seedr_breaker = CircuitBreaker(
+    name="seedr.breaker",
+    failure_rate=settings.seedr_breaker_failure_rate,
+    min_calls=settings.seedr_breaker_min_calls,
+    window=settings.seedr_breaker_window,
+    open_duration=settings.seedr_breaker_open_duration,
+    slow_call_threshold=settings.seedr_breaker_slow_call,
+    half_open_calls=settings.seedr_breaker_half_open_calls,
+    failure_exceptions=(NetworkError, ServerError, TimeoutError),
+)
+
+# Seconds after a token refresh during which further refresh requests reuse it
+_REFRESH_REUSE_WINDOW = 5.0
+
+
+def _link_lifetime(url: str) -> float:
+    """
+    Seconds until a download link expires.
+
+    The lifetime is read from the expiry timestamp in the signed URL when it
+    has one, and from the `seedr_link_ttl` setting otherwise.
+    """
+    query = parse_qs(urlsplit(url).query)
+    for param in ("e", "exp", "expires", "Expires"):
+        value = query.get(param, [""])[0]
+        if value.isdigit():
+            return int(value) - time.time()
+
+    return float(settings.seedr_link_ttl)
+
+
+def _link_cache_ttl(url: str) -> float:
+    """Seconds a download link may be served from cache, so it outlives any playlist built from it."""
+    return _link_lifetime(url) - settings.playlist_cache_ttl
+
+
+def playlist_cache_ttl(links: Iterable[str]) -> float:
+    """
+    Seconds a playlist of `links` may be served from cache.
+
+    Capped at the lifetime of its shortest-lived link, so a cached playlist
+    never hands out links that expired in the meantime.
+    """
+    return min([settings.playlist_cache_ttl, *map(_link_lifetime, links)])
+
+
+class TokenWriter:
+    """
+    Write-behind store for refreshed Seedr tokens.
+
+    The newest token of an account is kept in memory as soon as it is
+    refreshed, and all pending tokens are written to the database together
+    after a short debounce delay. Several refreshes of the same account within
+    one delay result in a single write of the newest token.
+    """
+
+    def __init__(self, delay: float):
+        self._delay = delay
+        self._pending: dict[int, tuple[int, str]] = {}
+        self._discarded: set[int] = set()
+        self._flush_task: asyncio.Task | None = None
+
+    def submit(self, account_id: int, user_id: int, token: str) -> None:
+        """Remember the newest token of an account and schedule a flush."""
+        self._pending[account_id] = (user_id, token)
+        self._discarded.discard(account_id)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    def get(self, account_id: int) -> str | None:
+        """Get the newest token of an account that is not written to the database yet."""
+        pending = self._pending.get(account_id)
+        return pending[1] if pending else None
+
+    def discard(self, account_id: int) -> None:
+        """Forget the unwritten token of an account, e.g. after it logged in again or out."""
+        self._pending.pop(account_id, None)
+        self._discarded.add(account_id)
+
+    async def flush(self) -> None:
+        """Write all pending tokens to the database in one transaction."""
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, {}
+        self._discarded.clear()
+        try:
+            async with get_session() as session:
+                account_repo = AccountRepository(session)
+                for account_id, (user_id, token) in batch.items():
+                    # Never overwrite a token stored by a login that happened during the flush
+                    if account_id not in self._discarded:
+                        await account_repo.update_token(account_id, user_id, token)
+        except Exception:
+            logger.error("Failed to persist refreshed tokens", accounts=len(batch), exc_info=True)
+            for account_id, pending in batch.items():
+                if account_id not in self._discarded:
+                    self._pending.setdefault(account_id, pending)
+            return
+
+        logger.debug("Persisted refreshed tokens", accounts=len(batch))
+
+    async def close(self) -> None:
+        """Cancel the scheduled flush and write pending tokens immediately."""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self.flush()
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self._delay)
+        await self.flush()
+
+
+# Global token writer instance
+token_writer = TokenWriter(delay=settings.token_flush_delay)
 
 
 async def on_token_refresh(new_token: Token, account_id: int, user_id: int) -> None:
-    """Callback to update token in database when it's refreshed."""
-    async with get_session() as new_session:
-        account_repo = AccountRepository(new_session)
-        await account_repo.update_token(account_id, user_id, new_token.to_base64())
+    """Callback to persist a token when it's refreshed."""
+    token_writer.submit(account_id, user_id, new_token.to_base64())
+
+
+class AccountSeedr(AsyncSeedr):
+    """
+    AsyncSeedr client bound to a single account.
+
+    Folder listings are served from `listing_cache` and download links from
+    `link_cache`, both shared by every login of the Seedr account. Every call
+    that changes the account's storage drops the account's cached listings and
+    playlists, and deletions drop the links of the deleted items. Concurrent
+    identical reads share a single upstream request, also across logins of the
+    same Seedr account, and every request goes through `seedr_breaker`.
+    """
+
+    def __init__(self, account_id: int, seedr_account_id: str, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.account_id = account_id
+        self.seedr_account_id = seedr_account_id
+        self._last_refresh: tuple[float, models.RefreshTokenResult] | None = None
+
+        # Bounds fan-out work, such as playlist crawls, done on behalf of this account
+        self.request_slots = asyncio.Semaphore(settings.seedr_account_concurrency)
+
+    async def list_contents(self, folder_id: str = "0") -> models.ListContentsResult:
+        contents = listing_cache.get(self.seedr_account_id, folder_id)
+        if contents is not None:
+            return contents
+
+        # Callers arriving after an invalidation must not join a fetch started before it
+        generation = listing_cache.generation(self.seedr_account_id)
+        key = (self.seedr_account_id, "list_contents", folder_id, generation)
+        return await inflight_calls.do(key, lambda: self._fetch_contents(folder_id, generation))
+
+    async def get_settings(self) -> models.UserSettings:
+        key = (self.seedr_account_id, "get_settings")
+        return await inflight_calls.do(key, super().get_settings)
+
+    async def fetch_file(self, file_id: str) -> models.FetchFileResult:
+        result = link_cache.get(self.seedr_account_id, ("file", file_id))
+        if result is not None:
+            return result
+
+        # A link fetched before an invalidation must neither be joined nor cached after it
+        generation = link_cache.generation(self.seedr_account_id)
+        key = (self.seedr_account_id, "fetch_file", file_id, generation)
+        result = await inflight_calls.do(key, lambda: super(AccountSeedr, self).fetch_file(file_id))
+        if result.url:
+            link_cache.set(
+                self.seedr_account_id,
+                ("file", file_id),
+                result,
+                ttl=_link_cache_ttl(result.url),
+                generation=generation,
+            )
+        return result
+
+    async def create_archive(self, folder_id: str) -> models.CreateArchiveResult:
+        result = link_cache.get(self.seedr_account_id, ("archive", folder_id))
+        if result is not None:
+            return result
+
+        generation = link_cache.generation(self.seedr_account_id)
+        key = (self.seedr_account_id, "create_archive", folder_id, generation)
+        result = await inflight_calls.do(key, lambda: super(AccountSeedr, self).create_archive(folder_id))
+        if result.archive_url:
+            link_cache.set(
+                self.seedr_account_id,
+                ("archive", folder_id),
+                result,
+                ttl=_link_cache_ttl(result.archive_url),
+                generation=generation,
+            )
+        return result
+
+    async def add_torrent(self, *args, **kwargs) -> models.AddTorrentResult:
+        try:
+            return await super().add_torrent(*args, **kwargs)
+        finally:
+            self.invalidate_cache()
+
+    async def add_folder(self, name: str) -> models.APIResult:
+        try:
+            return await super().add_folder(name)
+        finally:
+            self.invalidate_cache()
+
+    async def rename_file(self, file_id: str, rename_to: str) -> models.APIResult:
+        try:
+            return await super().rename_file(file_id, rename_to)
+        finally:
+            self.invalidate_cache()
+            link_cache.pop(self.seedr_account_id, ("file", file_id))
+
+    async def rename_folder(self, folder_id: str, rename_to: str) -> models.APIResult:
+        try:
+            return await super().rename_folder(folder_id, rename_to)
+        finally:
+            self.invalidate_cache()
+            link_cache.pop(self.seedr_account_id, ("archive", folder_id))
+
+    async def delete_file(self, file_id: str) -> models.APIResult:
+        try:
+            return await super().delete_file(file_id)
+        finally:
+            self.invalidate_cache()
+            link_cache.pop(self.seedr_account_id, ("file", file_id))
+
+    async def delete_folder(self, folder_id: str) -> models.APIResult:
+        try:
+            return await super().delete_folder(folder_id)
+        finally:
+            # The links of the files inside the folder are unknown here, so drop them all
+            self.invalidate_cache()
+            link_cache.clear_namespace(self.seedr_account_id)
+
+    async def delete_torrent(self, torrent_id: str) -> models.APIResult:
+        try:
+            return await super().delete_torrent(torrent_id)
+        finally:
+            self.invalidate_cache()
+
+    async def _api_request(self, *args, **kwargs) -> dict:
+        return await seedr_breaker.call(lambda: super(AccountSeedr, self)._api_request(*args, **kwargs))
+
+    async def _refresh_access_token(self) -> models.RefreshTokenResult:
+        """Refresh the access token once for all concurrent requests that found it expired."""
+        # A request that started with the old token may only notice the expiry after
+        # another request already refreshed it, so reuse a refresh that just finished.
+        if self._last_refresh and time.monotonic() - self._last_refresh[0] < _REFRESH_REUSE_WINDOW:
+            return self._last_refresh[1]
+
+        # Keyed by login rather than Seedr account, since every login has its own token
+        key = (self.account_id, "refresh_token")
+        return await inflight_calls.do(key, self._do_refresh_access_token)
+
+    async def _do_refresh_access_token(self) -> models.RefreshTokenResult:
+        result = await super()._refresh_access_token()
+        self._last_refresh = (time.monotonic(), result)
+        return result
+
+    def invalidate_cache(self) -> None:
+        """Drop every cached listing and playlist of this Seedr account."""
+        listing_cache.clear_namespace(self.seedr_account_id)
+        playlist_cache.clear_namespace(self.seedr_account_id)
+
+    async def _fetch_contents(self, folder_id: str, generation: int) -> models.ListContentsResult:
+        contents = await super().list_contents(folder_id)
+
+        # Keep download progress fresh while torrents are running
+        ttl = settings.listing_cache_active_ttl if contents.torrents else None
+        listing_cache.set(self.seedr_account_id, folder_id, contents, ttl=ttl, generation=generation)
+        return contents
+
+
+@dataclass
+class _PooledClient:
+    """A pooled client together with its bookkeeping."""
+
+    client: AccountSeedr
+    source_token: str
+    last_used: float
+    leases: int = 0
+    evicted: bool = False
+
+
+class SeedrClientPool:
+    """
+    Keeps one long-lived AsyncSeedr client per account so that its HTTP
+    connections stay warm between events.
+
+    Clients are evicted when the pool grows past `max_size` (least recently
+    used first) or when they have been idle for longer than `idle_ttl` seconds.
+    A client that is evicted while a handler is still using it is closed as
+    soon as the last lease is released.
+    """
+
+    def __init__(self, max_size: int, idle_ttl: float):
+        self._max_size = max_size
+        self._idle_ttl = idle_ttl
+        self._clients: OrderedDict[int, _PooledClient] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    @asynccontextmanager
+    async def lease(
+        self, account_id: int, seedr_account_id: str, user_id: int, token: str
+    ) -> AsyncIterator[AccountSeedr]:
+        """
+        Borrow the client of an account, creating it if needed.
+
+        `token` is the base64 token currently stored for the account. If it no
+        longer matches the token the pooled client was built with (or refreshed
+        to), the account was re-authenticated and the client is replaced. A newer
+        refreshed token that is not written to the database yet takes precedence.
+        """
+        token = token_writer.get(account_id) or token
+        entry = await self._acquire(account_id, seedr_account_id, user_id, token)
+        entry.leases += 1
+        try:
+            yield entry.client
+        finally:
+            entry.leases -= 1
+            entry.last_used = time.monotonic()
+            if not entry.evicted:
+                self._clients.move_to_end(account_id)
+            elif entry.leases == 0:
+                await entry.client.close()
+
+    async def invalidate(self, account_id: int) -> None:
+        """Drop the client and cached data of an account, e.g. after logout or a token change."""
+        token_writer.discard(account_id)
+        if entry := self._clients.get(account_id):
+            seedr_account_id = entry.client.seedr_account_id
+            listing_cache.clear_namespace(seedr_account_id)
+            link_cache.clear_namespace(seedr_account_id)
+            playlist_cache.clear_namespace(seedr_account_id)
+        await self._evict(account_id)
+
+    async def close(self) -> None:
+        """Close every pooled client."""
+        for account_id in list(self._clients):
+            entry = self._clients.pop(account_id)
+            entry.evicted = True
+            await entry.client.close()
+
+    async def _acquire(self, account_id: int, seedr_account_id: str, user_id: int, token: str) -> _PooledClient:
+        await self._evict_idle()
+
+        # Evicting a client yields, and a concurrent lease may store a client for
+        # the account meanwhile, so look again after every eviction
+        while entry := self._clients.get(account_id):
+            if token in (entry.source_token, entry.client.token.to_base64()):
+                entry.last_used = time.monotonic()
+                self._clients.move_to_end(account_id)
+                return entry
+
+            logger.info("Replacing Seedr client after token change", account_id=account_id)
+            await self._evict(account_id)
+
+        callback = functools.partial(on_token_refresh, account_id=account_id, user_id=user_id)
+        client = AccountSeedr(account_id, seedr_account_id, token=Token.from_base64(token), on_token_refresh=callback)
+        entry = _PooledClient(client=client, source_token=token, last_used=time.monotonic())
+        self._clients[account_id] = entry
+
+        while len(self._clients) > self._max_size:
+            oldest_account_id = next(iter(self._clients))
+            await self._evict(oldest_account_id)
+
+        return entry
+
+    async def _evict(self, account_id: int) -> None:
+        entry = self._clients.pop(account_id, None)
+        if entry is None:
+            return
+
+        entry.evicted = True
+        if entry.leases == 0:
+            await entry.client.close()
+
+    async def _evict_idle(self) -> None:
+        deadline = time.monotonic() - self._idle_ttl
+        for account_id, entry in list(self._clients.items()):
+            # Entries are ordered from least to most recently used
+            if entry.last_used > deadline:
+                break
+            if entry.leases == 0:
+                await self._evict(account_id)
+
+
+# Global pool instance
+seedr_pool = SeedrClientPool(
+    max_size=settings.seedr_client_pool_size,
+    idle_ttl=settings.seedr_client_idle_ttl,
+)
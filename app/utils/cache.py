@@ -0,0 +1,125 @@
+"""In-memory caching utilities."""
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from typing import Any
+
+from app.utils.metrics import metrics
+
+
+@dataclass(slots=True)
+class _Entry:
+    value: Any
+    weight: int
+    expires_at: float
+
+
+class TTLCache:
+    """
+    An LRU cache with per-entry expiry and a cap on the total weight of its entries.
+
+    Keys are grouped into namespaces (e.g. an account id) so that every entry
+    of a namespace can be dropped at once. Each namespace has a generation
+    number that is bumped on invalidation; passing the generation read before
+    a slow fetch to `set` prevents a stale result from being cached after the
+    namespace was invalidated in the meantime.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float,
+        max_weight: int,
+        weigher: Callable[[Any], int] | None = None,
+    ):
+        self.name = name
+        self._ttl = ttl
+        self._max_weight = max_weight
+        self._weigher = weigher or (lambda value: 1)
+        self._weight = 0
+        self._entries: OrderedDict[tuple[Hashable, Hashable], _Entry] = OrderedDict()
+        self._namespaces: dict[Hashable, set[Hashable]] = {}
+        self._generations: dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, namespace: Hashable, key: Hashable, default: Any = None) -> Any:
+        """Get a cached value, or `default` if it is missing or expired."""
+        entry = self._entries.get((namespace, key))
+        if entry is None or entry.expires_at <= time.monotonic():
+            if entry is not None:
+                self._remove(namespace, key)
+            metrics.increment(f"{self.name}.misses")
+            return default
+
+        self._entries.move_to_end((namespace, key))
+        metrics.increment(f"{self.name}.hits")
+        return entry.value
+
+    def set(
+        self,
+        namespace: Hashable,
+        key: Hashable,
+        value: Any,
+        ttl: float | None = None,
+        generation: int | None = None,
+    ) -> None:
+        """Cache a value, unless `generation` shows the namespace was invalidated since it was read."""
+        if generation is not None and generation != self.generation(namespace):
+            return
+
+        ttl = self._ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+
+        weight = self._weigher(value)
+        if weight > self._max_weight:
+            return
+
+        self._remove(namespace, key)
+        self._entries[(namespace, key)] = _Entry(value=value, weight=weight, expires_at=time.monotonic() + ttl)
+        self._namespaces.setdefault(namespace, set()).add(key)
+        self._weight += weight
+
+        while self._weight > self._max_weight:
+            oldest_namespace, oldest_key = next(iter(self._entries))
+            self._remove(oldest_namespace, oldest_key)
+            metrics.increment(f"{self.name}.evictions")
+
+    def pop(self, namespace: Hashable, key: Hashable) -> None:
+        """Drop a single entry."""
+        self._remove(namespace, key)
+
+    def clear_namespace(self, namespace: Hashable) -> None:
+        """Drop every entry of a namespace and bump its generation."""
+        self._generations[namespace] = self.generation(namespace) + 1
+        for key in list(self._namespaces.get(namespace, ())):
+            self._remove(namespace, key)
+
+    def generation(self, namespace: Hashable) -> int:
+        """Get the current generation of a namespace."""
+        return self._generations.get(namespace, 0)
+
+    def stats(self) -> dict[str, float]:
+        """Return size and hit/miss counters of the cache."""
+        return {
+            "entries": len(self._entries),
+            "weight": self._weight,
+            "hits": metrics.get(f"{self.name}.hits"),
+            "misses": metrics.get(f"{self.name}.misses"),
+            "evictions": metrics.get(f"{self.name}.evictions"),
+        }
+
+    def _remove(self, namespace: Hashable, key: Hashable) -> None:
+        entry = self._entries.pop((namespace, key), None)
+        if entry is None:
+            return
+
+        self._weight -= entry.weight
+        keys = self._namespaces[namespace]
+        keys.discard(key)
+        if not keys:
+            del self._namespaces[namespace]
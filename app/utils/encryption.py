@@ -1,21 +1,37 @@
 """Encryption service and custom SQLAlchemy type for securing sensitive data."""
 
-from cryptography.fernet import Fernet
+import hashlib
+from collections import OrderedDict
+
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 from sqlalchemy import Text
 from sqlalchemy.types import TypeDecorator
 
 from app.config import settings
+from app.utils.metrics import metrics
 
 
 class EncryptionService:
-    """Handles symmetric encryption and decryption of strings using Fernet."""
+    """
+    Handles symmetric encryption and decryption of strings using Fernet.
+
+    Data is always encrypted with `key`, but can be decrypted with `key` or any
+    of `old_keys`, so the bot keeps working while data is re-encrypted with a
+    new key. Decrypted values are kept in a bounded LRU cache keyed by the
+    digest of their ciphertext, so credentials loaded on every event are
+    decrypted once.
+    """
 
-    def __init__(self, key: str):
+    def __init__(self, key: str, old_keys: tuple[str, ...] = (), cache_size: int = 0):
         try:
             self.fernet = Fernet(key.encode())
+            self.multi_fernet = MultiFernet([self.fernet, *(Fernet(old_key.encode()) for old_key in old_keys)])
         except Exception as e:
             raise ValueError(f"Invalid Fernet encryption key provided: {e}") from e
 
+        self._cache_size = cache_size
+        self._cache: OrderedDict[bytes, str] = OrderedDict()
+
     def encrypt(self, data: str | None) -> str | None:
         """Encrypts a plaintext string."""
         if data is None:
@@ -30,7 +46,42 @@ class EncryptionService:
         """
         if encrypted_data is None:
             return None
-        return self.fernet.decrypt(encrypted_data.encode()).decode()
+
+        digest = hashlib.sha256(encrypted_data.encode()).digest()
+        plaintext = self._cache.get(digest)
+        if plaintext is not None:
+            self._cache.move_to_end(digest)
+            metrics.increment("decryption_cache.hits")
+            return plaintext
+
+        metrics.increment("decryption_cache.misses")
+        plaintext = self.multi_fernet.decrypt(encrypted_data.encode()).decode()
+        if self._cache_size > 0:
+            self._cache[digest] = plaintext
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return plaintext
+
+    def is_current(self, encrypted_data: str) -> bool:
+        """Checks whether the data is already encrypted with the current key."""
+        try:
+            self.fernet.decrypt(encrypted_data.encode())
+        except InvalidToken:
+            return False
+        return True
+
+    def rotate(self, encrypted_data: str) -> str:
+        """Re-encrypts data encrypted with any known key using the current key.
+
+        Raises:
+            InvalidToken: If none of the keys can decrypt the data.
+        """
+        return self.multi_fernet.rotate(encrypted_data.encode()).decode()
+
+
+def parse_keys(keys: str) -> tuple[str, ...]:
+    """Splits a comma-separated list of keys."""
+    return tuple(key.strip() for key in keys.split(",") if key.strip())
 
 
 class EncryptedType(TypeDecorator):
@@ -43,7 +94,11 @@ class EncryptedType(TypeDecorator):
 
     impl = Text
     cache_ok = True
-    encryption_service = EncryptionService(settings.encryption_key)
+    encryption_service = EncryptionService(
+        settings.encryption_key,
+        old_keys=parse_keys(settings.old_encryption_keys),
+        cache_size=settings.decryption_cache_size,
+    )
 
     def process_bind_param(self, value, dialect):
         """Encrypt the value before saving it to the database."""
@@ -0,0 +1,67 @@
+"""Serialization of work per key, with a cap on concurrency."""
+
+import asyncio
+import itertools
+from collections.abc import AsyncIterator, Hashable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+from app.utils.metrics import metrics
+
+
+@dataclass(slots=True)
+class _Lane:
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    users: int = 0
+
+
+class Lanes:
+    """
+    Runs work sharing a lane key one at a time, in arrival order.
+
+    At most `max_active` lanes run at once, so a busy lane holds a single slot
+    and cannot starve the others. Work can also name a slot (e.g. the message
+    a button belongs to): work still waiting when newer work for the same slot
+    arrives is superseded, and should be skipped rather than run.
+    """
+
+    def __init__(self, name: str, max_active: int):
+        self.name = name
+        self._lanes: dict[Hashable, _Lane] = {}
+        self._active = asyncio.Semaphore(max_active)
+        self._latest: dict[Hashable, int] = {}
+        self._tickets = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._lanes)
+
+    @asynccontextmanager
+    async def enter(self, key: Hashable, slot: Hashable | None = None) -> AsyncIterator[bool]:
+        """Wait for the turn of the work in lane `key`. Yields False if it was superseded meanwhile."""
+        ticket = None
+        if slot is not None:
+            ticket = next(self._tickets)
+            self._latest[slot] = ticket
+
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = _Lane()
+            metrics.set_gauge(f"{self.name}.lanes", len(self._lanes))
+        lane.users += 1
+
+        try:
+            async with lane.lock:
+                if ticket is not None and self._latest.get(slot) != ticket:
+                    metrics.increment(f"{self.name}.superseded")
+                    yield False
+                    return
+
+                async with self._active:
+                    yield True
+        finally:
+            lane.users -= 1
+            if not lane.users:
+                del self._lanes[key]
+                metrics.set_gauge(f"{self.name}.lanes", len(self._lanes))
+            if ticket is not None and self._latest.get(slot) == ticket:
+                del self._latest[slot]
@@ -1,6 +1,7 @@
 """Language service for loading and accessing translations."""
 
 import functools
+from collections.abc import Iterable
 from pathlib import Path
 
 import yaml
@@ -37,6 +38,17 @@ class LanguageService:
             fallback_strings=self._languages.get("en", {}),
         )
 
+    def reverse_index(self, keys: Iterable[str]) -> dict[str, str]:
+        """
+        Maps the translations of the given keys, in every loaded language, back to their key.
+        """
+        index = {}
+        for strings in self._languages.values():
+            for key in keys:
+                if text := strings.get(key):
+                    index[text] = key
+        return index
+
 
 class Translator:
     """
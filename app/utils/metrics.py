@@ -0,0 +1,45 @@
+"""Lightweight in-process metrics registry."""
+
+import asyncio
+from collections import Counter
+
+from structlog import get_logger
+
+logger = get_logger(__name__)
+
+
+class Metrics:
+    """Holds named counters and gauges for the running process."""
+
+    def __init__(self):
+        self._counters: Counter[str] = Counter()
+        self._gauges: dict[str, float] = {}
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """Increase a counter by `value`."""
+        self._counters[name] += value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Set a gauge to its current value."""
+        self._gauges[name] = value
+
+    def get(self, name: str) -> float:
+        """Get the current value of a counter or gauge."""
+        if name in self._gauges:
+            return self._gauges[name]
+        return self._counters[name]
+
+    def snapshot(self) -> dict[str, float]:
+        """Return all counters and gauges, sorted by name."""
+        return dict(sorted({**self._counters, **self._gauges}.items()))
+
+
+async def report_metrics(interval: float) -> None:
+    """Periodically log a snapshot of all metrics."""
+    while True:
+        await asyncio.sleep(interval)
+        logger.info("Metrics", **metrics.snapshot())
+
+
+# Global metrics instance
+metrics = Metrics()
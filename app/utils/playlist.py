@@ -1,50 +1,131 @@
 """Playlist generation utilities for M3U and XSPF formats."""
 
-import tempfile
-from typing import NamedTuple
+import asyncio
+import functools
+import io
+from pathlib import Path
+from typing import Any, NamedTuple
 from urllib.parse import quote
 
 import xspf_lib as xspf
 from seedrcc import AsyncSeedr
+from seedrcc.exceptions import APIError, NetworkError, ServerError
+from seedrcc.models import File, Folder
+from structlog import get_logger
+
+from app.config import settings
+
+logger = get_logger(__name__)
+
+
+PLAYLIST_TYPES = ("vlc", "m3u", "xspf")
 
 
 class PlaylistResult(NamedTuple):
-    file_path: str
+    file: io.BytesIO
+    filename: str
+    # Download links in the playlist, whose expiry bounds how long it can be reused
+    links: tuple[str, ...] = ()
+
+
+class CachedPlaylist(NamedTuple):
+    """A generated playlist kept for reuse, with the Telegram document it was uploaded as."""
+
+    content: bytes
     filename: str
+    document: Any = None
 
+    def open(self) -> io.BytesIO:
+        """Returns the playlist as a fresh in-memory file for uploading."""
+        buffer = io.BytesIO(self.content)
+        buffer.name = self.filename
+        return buffer
+
+
+@functools.lru_cache(maxsize=1)
+def load_playlist_thumbnails() -> dict[str, bytes]:
+    """Reads the thumbnail of every playlist type from the images directory once."""
+    images_dir = Path(__file__).parent.parent.parent / "images"
+    return {playlist_type: (images_dir / f"{playlist_type}.jpg").read_bytes() for playlist_type in PLAYLIST_TYPES}
+
+
+def get_playlist_thumbnail(playlist_type: str) -> bytes | None:
+    """Gets the thumbnail bytes for a playlist type."""
+    return load_playlist_thumbnails().get(playlist_type)
+
+
+def generate_playlist_file(tracks: list[dict], playlist_type: str, playlist_title: str, filename: str) -> io.BytesIO:
+    """Generates the playlist file as an in-memory buffer named `filename`."""
+    buffer = io.BytesIO()
+    buffer.name = filename
 
-def generate_playlist_content(tracks: list[dict], playlist_type: str, playlist_title: str) -> bytes:
-    """Generates the content of the playlist file."""
     if playlist_type == "xspf":
         track_list = [xspf.Track(location=t["location"], title=t["title"]) for t in tracks]
         playlist = xspf.Playlist(title=playlist_title, trackList=track_list)
-        return playlist.xml_string().encode()
+        buffer.write(playlist.xml_string().encode())
+    else:
+        # Default to M3U, written line by line
+        buffer.write(b"#EXTM3U")
+        for track in tracks:
+            buffer.write(f"\n#EXTINF:-1,{track['title']}\n{track['location']}".encode())
+
+    buffer.seek(0)
+    return buffer
+
+
+async def _fetch_track(seedr: AsyncSeedr, file: File, slots: asyncio.Semaphore) -> dict | None:
+    """Fetches the streaming link of a single file, skipping it if Seedr fails."""
+    try:
+        async with slots:
+            result = await seedr.fetch_file(str(file.folder_file_id))
+    except (APIError, NetworkError, ServerError) as e:
+        logger.warning("Skipping file in playlist", file_id=file.folder_file_id, error=str(e))
+        return None
+
+    if not result.url:
+        return None
+
+    safe_url = quote(result.url, safe="/:&?=%")
+    return {"location": safe_url, "title": result.name}
 
-    # Default to M3U
-    playlist_content = ["#EXTM3U"]
-    for track in tracks:
-        playlist_content.append(f"#EXTINF:-1,{track['title']}")
-        playlist_content.append(track["location"])
-    return "\n".join(playlist_content).encode()
 
+async def _crawl_folder(seedr: AsyncSeedr, folder: Folder, slots: asyncio.Semaphore) -> list[dict]:
+    """Lists a sub folder and collects its tracks, skipping it if Seedr fails."""
+    try:
+        async with slots:
+            sub_contents = await seedr.list_contents(folder_id=str(folder.id))
+    except (APIError, NetworkError, ServerError) as e:
+        logger.warning("Skipping folder in playlist", folder_id=folder.id, error=str(e))
+        return []
 
-async def _recursive_get_tracks(seedr: AsyncSeedr, contents) -> list[dict]:
-    """Recursively fetches all playable tracks from a given folder's contents."""
-    tracks = []
+    return await _recursive_get_tracks(seedr, sub_contents, slots)
+
+
+async def _recursive_get_tracks(seedr: AsyncSeedr, contents, slots: asyncio.Semaphore) -> list[dict]:
+    """
+    Recursively fetches all playable tracks from a given folder's contents.
+
+    Files and sub folders are fetched concurrently, with `slots` bounding the
+    number of requests in flight. Tracks are returned in the same order as a
+    sequential depth-first walk: files first, then sub folders, each sorted by name.
+
+    An error that aborts the crawl, such as an open circuit breaker or an expired
+    token, cancels the requests still pending and is raised as is.
+    """
     # Sort to ensure a consistent order
-    files = sorted(contents.files, key=lambda f: f.name)
+    files = sorted((f for f in contents.files if f.play_video or f.play_audio), key=lambda f: f.name)
     folders = sorted(contents.folders, key=lambda f: f.name)
 
-    for file in files:
-        if file.play_video or file.play_audio:
-            result = await seedr.fetch_file(str(file.folder_file_id))
-            if result.url:
-                safe_url = quote(result.url, safe="/:&?=%")
-                tracks.append({"location": safe_url, "title": result.name})
+    try:
+        async with asyncio.TaskGroup() as group:
+            file_tasks = [group.create_task(_fetch_track(seedr, file, slots)) for file in files]
+            folder_tasks = [group.create_task(_crawl_folder(seedr, folder, slots)) for folder in folders]
+    except ExceptionGroup as e:
+        raise e.exceptions[0] from None
 
-    for folder in folders:
-        sub_contents = await seedr.list_contents(folder_id=str(folder.id))
-        tracks.extend(await _recursive_get_tracks(seedr, sub_contents))
+    tracks = [track for task in file_tasks if (track := task.result())]
+    for task in folder_tasks:
+        tracks.extend(task.result())
 
     return tracks
 
@@ -61,27 +142,30 @@ async def generate_file_playlist(
 
     safe_url = quote(result.url, safe="/:&?=%")
     tracks = [{"location": safe_url, "title": result.name}]
-    playlist_content = generate_playlist_content(tracks, playlist_type, result.name)
-
-    with tempfile.NamedTemporaryFile(mode="wb", delete=False, suffix=f".{playlist_type}") as temp_f:
-        temp_f.write(playlist_content)
-        return PlaylistResult(file_path=temp_f.name, filename=f"{result.name}.{playlist_type}")
+    filename = f"{result.name}.{playlist_type}"
+    playlist_file = generate_playlist_file(tracks, playlist_type, result.name, filename)
+    return PlaylistResult(file=playlist_file, filename=filename, links=(result.url,))
 
 
 async def generate_folder_playlist(
     seedr: AsyncSeedr,
     folder_id: str,
     playlist_type: str = "m3u",
+    slots: asyncio.Semaphore | None = None,
 ) -> PlaylistResult | None:
-    """Generate playlist for a folder."""
+    """Generate playlist for a folder.
+
+    `slots` limits the concurrent Seedr requests of the crawl; pass the
+    account's shared semaphore to bound all crawls of that account together.
+    """
+    slots = slots or asyncio.Semaphore(settings.seedr_account_concurrency)
     root_contents = await seedr.list_contents(folder_id=folder_id)
-    all_tracks = await _recursive_get_tracks(seedr, root_contents)
+    all_tracks = await _recursive_get_tracks(seedr, root_contents, slots)
 
     if not all_tracks:
         return None
 
-    playlist_content = generate_playlist_content(all_tracks, playlist_type, root_contents.name)
-
-    with tempfile.NamedTemporaryFile(mode="wb", delete=False, suffix=f".{playlist_type}") as temp_f:
-        temp_f.write(playlist_content)
-        return PlaylistResult(file_path=temp_f.name, filename=f"{root_contents.name}.{playlist_type}")
+    filename = f"{root_contents.name}.{playlist_type}"
+    playlist_file = generate_playlist_file(all_tracks, playlist_type, root_contents.name, filename)
+    links = tuple(track["location"] for track in all_tracks)
+    return PlaylistResult(file=playlist_file, filename=filename, links=links)
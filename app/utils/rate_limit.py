@@ -0,0 +1,35 @@
+"""Rate limiting utilities."""
+
+import time
+
+
+class TokenBucket:
+    """
+    Allows `rate` operations per second, with bursts of up to `capacity`.
+
+    Tokens are reserved rather than waited for: `reserve` always takes a token
+    and returns how long the caller must wait before using it, so concurrent
+    callers are served in the order they reserved.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Take a token and return the seconds to wait before using it."""
+        self._refill()
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def pause(self, seconds: float) -> None:
+        """Make operations not reserved yet wait at least `seconds`."""
+        self._refill()
+        self._tokens = min(self._tokens, 0) - seconds * self.rate
@@ -0,0 +1,41 @@
+"""Coalescing of identical concurrent calls."""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+from app.utils.metrics import metrics
+
+
+class SingleFlight:
+    """
+    Shares one in-flight call among all concurrent callers with the same key.
+
+    The first caller starts the call; callers arriving while it runs await the
+    same result, or receive the same exception. A caller being cancelled does
+    not cancel the shared call for the others.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `func`, or join the call already running under `key`."""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+            metrics.increment(f"{self.name}.calls")
+        else:
+            metrics.increment(f"{self.name}.shared")
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
@@ -0,0 +1,22 @@
+"""
+Benchmarks of the bot's hot paths.
+
+Each benchmark is a module of its own, run from the project root:
+
+    uv run python -m benchmarks.<name> --help
+
+They only talk to local fakes and temporary databases, never to Telegram,
+Seedr or the configured database.
+"""
+
+import os
+
+from cryptography.fernet import Fernet
+
+# Settings are read when the app is imported, so they have to be in place first
+os.environ.setdefault("TELEGRAM_API_ID", "1")
+os.environ.setdefault("TELEGRAM_API_HASH", "benchmark")
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "benchmark")
+os.environ.setdefault("ENCRYPTION_KEY", Fernet.generate_key().decode())
+# Never touch a real database, whatever .env says
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
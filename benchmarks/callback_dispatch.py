@@ -0,0 +1,112 @@
+"""
+Cost of finding the handler of a callback query, regex patterns versus the router.
+
+Before, every callback handler was registered with its own pattern, and
+Telethon tried every pattern on every button press. The matched handler then
+parsed the data itself. The router decodes the data once and looks up the
+handler of its action. It is measured on legacy data, which it decodes through
+a prefix trie, and on the compact encoding new buttons carry.
+
+Only the lookup is measured, not the lanes the router runs handlers in.
+
+    uv run python -m benchmarks.callback_dispatch
+"""
+
+import argparse
+import re
+import time
+from collections.abc import Callable
+
+from app.bot.callback_data import Op, decode_callback, encode_callback
+from app.utils.validators import parse_callback_data
+
+# The patterns the callback handlers were registered with, in registration order
+_PATTERNS = (
+    b"authorize_device",
+    b"login_email",
+    b"auth_complete_.*",
+    b"^login$",
+    b"switch_account_.*",
+    b"logout_account_.*",
+    b"confirm_logout_.*",
+    b"cancel_logout",
+    b"folder_(?!link_).*",
+    b"folder_link_.*",
+    b"file_(?!link_).*",
+    b"file_link_.*",
+    b"delete_file_.*",
+    b"delete_folder_.*",
+    b"playlist_.*",
+    b"active_.*",
+    b"cancel_download_.*",
+)
+
+# One button of every action, as its data used to be written
+_BUTTONS = (
+    "authorize_device",
+    "login_email",
+    "auth_complete_a1b2c3d4e5f6",
+    "login",
+    "switch_account_12",
+    "logout_account_12",
+    "confirm_logout_12",
+    "cancel_logout",
+    "folder_123456789_page_2_parent_98765432",
+    "folder_link_123456789",
+    "file_123456789_parent_98765432",
+    "file_link_123456789",
+    "delete_file_123456789",
+    "delete_folder_123456789",
+    "playlist_xspf_folder_123456789",
+    "active_123456789",
+    "cancel_download_123456789",
+)
+
+
+def _per_update(updates: list[bytes], dispatch: Callable[[bytes], object]) -> float:
+    """Seconds `dispatch` takes per update."""
+    started = time.perf_counter()
+    for data in updates:
+        dispatch(data)
+    return (time.perf_counter() - started) / len(updates)
+
+
+def benchmark(updates: int) -> None:
+    # Telethon matches the patterns of CallbackQuery builders this way
+    patterns = [re.compile(pattern).match for pattern in _PATTERNS]
+
+    def regex_dispatch(data: bytes) -> list[dict]:
+        return [parse_callback_data(data.decode()) for match in patterns if match(data)]
+
+    handlers = {op: op.name for op in Op}
+
+    def router_dispatch(data: bytes) -> tuple[str, tuple] | None:
+        decoded = decode_callback(data)
+        return (handlers[decoded[0]], decoded[1]) if decoded else None
+
+    legacy = [button.encode() for button in _BUTTONS]
+    encoded = [encode_callback(op, *params) for op, params in map(decode_callback, legacy)]
+    for data in legacy:
+        if len(regex_dispatch(data)) != 1:
+            raise SystemExit(f"{data!r} does not match exactly one pattern")
+
+    rounds = max(updates // len(legacy), 1)
+    costs = {
+        "regex patterns": _per_update(legacy * rounds, regex_dispatch),
+        "router, legacy data": _per_update(legacy * rounds, router_dispatch),
+        "router, encoded data": _per_update(encoded * rounds, router_dispatch),
+    }
+    for name, cost in costs.items():
+        print(f"{name:>20}: {cost * 1e6:6.2f} us per update")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark finding the handler of callback queries.")
+    parser.add_argument("--updates", type=int, default=200_000, help="Callback queries to dispatch")
+    args = parser.parse_args()
+
+    benchmark(args.updates)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""Helpers shared by the benchmarks."""
+
+import math
+import statistics
+from collections.abc import Sequence
+
+
+def percentile(samples: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of `samples`, e.g. 0.99 for p99."""
+    ordered = sorted(samples)
+    rank = max(math.ceil(fraction * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def latency_summary(samples: Sequence[float]) -> str:
+    """Formats latencies in seconds as p50/p99/mean in milliseconds."""
+    return (
+        f"p50 {percentile(samples, 0.5) * 1000:8.2f} ms"
+        f"  p99 {percentile(samples, 0.99) * 1000:8.2f} ms"
+        f"  mean {statistics.fmean(samples) * 1000:8.2f} ms"
+    )
+
+
+def speedup(before: float, after: float) -> str:
+    """Formats how many times faster `after` is than `before`, both durations."""
+    return f"{before / after:.1f}x" if after else "n/a"
@@ -0,0 +1,70 @@
+"""
+Decryption cost of the credentials loaded for one event, before and after.
+
+Before, every event loaded an account's token, password and cookie, and
+decrypted all three. After, the password and cookie are deferred and only the
+token is decrypted, through the cache of decrypted values. Events are spread
+over `--accounts` accounts, so the cache is warm after the first event of each.
+
+    uv run python -m benchmarks.decryption
+"""
+
+import argparse
+import secrets
+import time
+from collections.abc import Callable
+
+from cryptography.fernet import Fernet
+
+from app.config import settings
+from app.utils.encryption import EncryptionService
+from benchmarks.common import speedup
+
+
+def _per_event(events: int, accounts: int, decrypt: Callable[[int], object]) -> float:
+    """Seconds `decrypt` takes per event, over `events` events spread across `accounts` accounts."""
+    started = time.perf_counter()
+    for event in range(events):
+        decrypt(event % accounts)
+    return (time.perf_counter() - started) / events
+
+
+def benchmark(events: int, accounts: int) -> None:
+    key = Fernet.generate_key().decode()
+    writer = EncryptionService(key)
+    # Sizes of a base64 Seedr token, a password and a session cookie
+    credentials = [
+        tuple(writer.encrypt(secrets.token_urlsafe(size)) for size in (300, 16, 600)) for _ in range(accounts)
+    ]
+
+    uncached = EncryptionService(key)
+    cached = EncryptionService(key, cache_size=settings.decryption_cache_size)
+
+    def before(account: int) -> None:
+        for ciphertext in credentials[account]:
+            uncached.decrypt(ciphertext)
+
+    def after(account: int) -> None:
+        cached.decrypt(credentials[account][0])
+
+    before_cost = _per_event(events, accounts, before)
+    after_cost = _per_event(events, accounts, after)
+    print(f"before: {before_cost * 1e6:8.2f} us per event (token, password and cookie, uncached)")
+    print(f" after: {after_cost * 1e6:8.2f} us per event (token only, cached)")
+    print(f"{speedup(before_cost, after_cost)} cheaper")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the decryption of credentials per event.")
+    parser.add_argument("--events", type=int, default=100_000, help="Events to decrypt credentials for")
+    parser.add_argument("--accounts", type=int, default=500, help="Accounts the events are spread over")
+    args = parser.parse_args()
+
+    if args.accounts > settings.decryption_cache_size:
+        parser.error("--accounts must not exceed DECRYPTION_CACHE_SIZE")
+
+    benchmark(args.events, args.accounts)
+
+
+if __name__ == "__main__":
+    main()
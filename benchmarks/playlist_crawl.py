@@ -0,0 +1,157 @@
+"""
+Duration of a playlist crawl, serial versus concurrent.
+
+The serial crawl is the one playlists were built with before, fetching one file
+or folder at a time. The concurrent crawl is `_recursive_get_tracks`, bounded
+by the account's `seedr_account_concurrency`. Both crawl the same folder tree
+on a fake Seedr backend that takes `--latency` to answer every request.
+
+    uv run python -m benchmarks.playlist_crawl
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+from seedrcc import models
+
+from app.config import settings
+from app.utils.playlist import _recursive_get_tracks
+from benchmarks.common import speedup
+
+
+class FakeSeedr:
+    """
+    Serves a root folder of `seasons` folders of `episodes` videos each.
+
+    Every request takes `latency` seconds, and the highest number of requests
+    in flight at once is recorded.
+    """
+
+    def __init__(self, seasons: int, episodes: int, latency: float):
+        self._seasons = seasons
+        self._episodes = episodes
+        self._latency = latency
+        self.in_flight = 0
+        self.peak = 0
+        self.requests = 0
+
+    async def list_contents(self, folder_id: str = "0") -> models.ListContentsResult:
+        await self._request()
+        now = datetime(2026, 1, 1)
+        if folder_id == "0":
+            folders = [
+                models.Folder(
+                    id=season,
+                    name=f"Season {season:02d}",
+                    fullname=f"Season {season:02d}",
+                    size=0,
+                    last_update=now,
+                    is_shared=False,
+                    play_audio=False,
+                    play_video=True,
+                )
+                for season in range(1, self._seasons + 1)
+            ]
+            return self._folder(0, "Show", folders=folders)
+
+        season = int(folder_id)
+        files = [
+            models.File(
+                file_id=season * 1000 + episode,
+                name=f"S{season:02d}E{episode:03d}.mkv",
+                size=1024,
+                folder_id=season,
+                folder_file_id=season * 1000 + episode,
+                hash="hash",
+                play_video=True,
+            )
+            for episode in range(1, self._episodes + 1)
+        ]
+        return self._folder(season, f"Season {season:02d}", files=files)
+
+    async def fetch_file(self, file_id: str) -> models.FetchFileResult:
+        await self._request()
+        return models.FetchFileResult(result=True, url=f"https://seedr.example/{file_id}.mkv", name=f"{file_id}.mkv")
+
+    async def _request(self) -> None:
+        self.requests += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self._latency)
+        finally:
+            self.in_flight -= 1
+
+    def _folder(self, folder_id: int, name: str, **contents) -> models.ListContentsResult:
+        return models.ListContentsResult(
+            id=folder_id,
+            name=name,
+            fullname=name,
+            size=0,
+            last_update=datetime(2026, 1, 1),
+            is_shared=False,
+            play_audio=False,
+            play_video=True,
+            **contents,
+        )
+
+
+async def _serial_get_tracks(seedr: FakeSeedr, contents) -> list[dict]:
+    """The crawl before it was made concurrent, one request at a time."""
+    tracks = []
+    files = sorted(contents.files, key=lambda f: f.name)
+    folders = sorted(contents.folders, key=lambda f: f.name)
+
+    for file in files:
+        if file.play_video or file.play_audio:
+            result = await seedr.fetch_file(str(file.folder_file_id))
+            if result.url:
+                safe_url = quote(result.url, safe="/:&?=%")
+                tracks.append({"location": safe_url, "title": result.name})
+
+    for folder in folders:
+        sub_contents = await seedr.list_contents(folder_id=str(folder.id))
+        tracks.extend(await _serial_get_tracks(seedr, sub_contents))
+
+    return tracks
+
+
+async def benchmark(seasons: int, episodes: int, latency: float) -> None:
+    crawls = {
+        "serial": _serial_get_tracks,
+        "concurrent": lambda seedr, contents: _recursive_get_tracks(
+            seedr, contents, asyncio.Semaphore(settings.seedr_account_concurrency)
+        ),
+    }
+
+    durations, playlists = {}, {}
+    for name, crawl in crawls.items():
+        seedr = FakeSeedr(seasons, episodes, latency)
+        started = time.perf_counter()
+        playlists[name] = await crawl(seedr, await seedr.list_contents())
+        durations[name] = time.perf_counter() - started
+        print(
+            f"{name:>10}: {durations[name]:7.2f}s  {len(playlists[name])} tracks"
+            f"  {seedr.requests} requests, at most {seedr.peak} at once"
+        )
+
+    if playlists["serial"] != playlists["concurrent"]:
+        raise SystemExit("The crawls returned different playlists")
+    print(f"Same playlist, {speedup(durations['serial'], durations['concurrent'])} faster")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the serial and the concurrent playlist crawl.")
+    parser.add_argument("--seasons", type=int, default=4, help="Sub folders of the crawled folder")
+    parser.add_argument("--episodes", type=int, default=50, help="Videos in every sub folder")
+    parser.add_argument("--latency", type=float, default=50, help="Milliseconds Seedr takes to answer a request")
+    args = parser.parse_args()
+
+    asyncio.run(benchmark(args.seasons, args.episodes, args.latency / 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Latency of the Seedr work of a handler, with and without the client pool.
+
+Without the pool every event builds its own client, and so opens a new TCP
+connection and TLS session to Seedr. With the pool, events of an account reuse
+its warm client. Both run against a local fake Seedr server over TLS, which
+adds `--rtt` to every request and twice that to every new connection, for the
+TCP and TLS handshakes a real network would need.
+
+    uv run python -m benchmarks.seedr_pool
+"""
+
+import argparse
+import asyncio
+import datetime
+import ipaddress
+import itertools
+import json
+import os
+import ssl
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+from seedrcc import Token, _constants
+
+from app.services.seedr import AccountSeedr, SeedrClientPool
+from benchmarks.common import latency_summary, speedup
+
+_SETTINGS = json.dumps(
+    {
+        "result": True,
+        "code": 200,
+        "settings": {
+            "allow_remote_access": False,
+            "site_language": "en",
+            "subtitles_language": "en",
+            "email_announcements": False,
+            "email_newsletter": False,
+        },
+        "account": {
+            "username": "benchmark",
+            "user_id": 1,
+            "premium": 0,
+            "package_id": 0,
+            "package_name": "Free",
+            "space_used": 0,
+            "space_max": 1024,
+            "bandwidth_used": 0,
+            "email": "benchmark@example.com",
+            "wishlist": [],
+            "invites": 0,
+            "invites_accepted": 0,
+        },
+        "country": "NP",
+    }
+).encode()
+
+
+def _write_certificate(directory: Path) -> tuple[Path, Path]:
+    """Creates a self-signed certificate for localhost, returning the certificate and key paths."""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.UTC)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(
+            x509.SubjectAlternativeName([x509.DNSName("localhost"), x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]),
+            critical=False,
+        )
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+
+    cert_path, key_path = directory / "cert.pem", directory / "key.pem"
+    cert_path.write_bytes(certificate.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(
+        key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    )
+    return cert_path, key_path
+
+
+class FakeSeedrServer:
+    """A keep-alive HTTPS server answering every request with the settings of an account."""
+
+    def __init__(self, rtt: float):
+        self._rtt = rtt
+        self.connections = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        # The TCP and TLS handshakes of a new connection take a round trip each
+        delay = 3 * self._rtt
+        try:
+            while await reader.readuntil(b"\r\n\r\n"):
+                await asyncio.sleep(delay)
+                delay = self._rtt
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: %d\r\n\r\n%s" % (len(_SETTINGS), _SETTINGS)
+                )
+                await writer.drain()
+        except asyncio.IncompleteReadError, ConnectionError, ssl.SSLError:
+            pass
+        finally:
+            writer.close()
+
+
+async def _run(
+    events: int, concurrency: int, accounts: int, work: Callable[[int], Awaitable[None]]
+) -> tuple[list[float], float]:
+    """Runs `work` for every event, `concurrency` at a time. Returns the latencies and the total duration."""
+    queue = iter(range(events))
+    latencies = []
+
+    async def worker() -> None:
+        for event in queue:
+            started = time.perf_counter()
+            await work(event % accounts)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    async with asyncio.TaskGroup() as group:
+        for _ in range(concurrency):
+            group.create_task(worker())
+    return latencies, time.perf_counter() - started
+
+
+async def benchmark(events: int, concurrency: int, accounts: int, rtt: float) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        cert_path, key_path = _write_certificate(Path(directory))
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(cert_path, key_path)
+        # Trusted by the clients created from here on
+        os.environ["SSL_CERT_FILE"] = str(cert_path)
+
+        server = FakeSeedrServer(rtt)
+        listener = await asyncio.start_server(server.handle, "127.0.0.1", 0, ssl=context)
+        port = listener.sockets[0].getsockname()[1]
+        _constants.RESOURCE_URL = f"https://localhost:{port}/oauth_test/resource.php"
+
+        token = Token("access", "refresh").to_base64()
+        # Unique per run, so nothing is shared through the caches of the Seedr client
+        ids = itertools.count(time.monotonic_ns())
+        seedr_account_ids = [str(next(ids)) for _ in range(accounts)]
+
+        async def fresh_client(account: int) -> None:
+            client = AccountSeedr(account, seedr_account_ids[account], token=Token.from_base64(token))
+            try:
+                await client.get_settings()
+            finally:
+                await client.close()
+
+        pool = SeedrClientPool(max_size=accounts, idle_ttl=3600)
+
+        async def pooled_client(account: int) -> None:
+            async with pool.lease(account, seedr_account_ids[account], account, token) as client:
+                await client.get_settings()
+
+        results = {}
+        async with listener:
+            for name, work in (("without pool", fresh_client), ("with pool", pooled_client)):
+                server.connections = 0
+                latencies, duration = await _run(events, concurrency, accounts, work)
+                results[name] = duration
+                print(f"{name:>13}: {latency_summary(latencies)}  connections {server.connections:5d}")
+            await pool.close()
+
+    print(
+        f"Total time {results['without pool']:.2f}s -> {results['with pool']:.2f}s, "
+        f"{speedup(results['without pool'], results['with pool'])} faster"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Seedr calls with and without the client pool.")
+    parser.add_argument("--events", type=int, default=1000, help="Events to handle")
+    parser.add_argument("--concurrency", type=int, default=20, help="Events handled at once")
+    parser.add_argument("--accounts", type=int, default=50, help="Accounts the events are spread over")
+    parser.add_argument("--rtt", type=float, default=20, help="Simulated network round trip in milliseconds")
+    args = parser.parse_args()
+
+    # Concurrent events of one account would share a single request and hide the connection cost
+    if args.concurrency > args.accounts:
+        parser.error("--concurrency must not exceed --accounts")
+
+    asyncio.run(benchmark(args.events, args.concurrency, args.accounts, args.rtt / 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Write throughput of SQLite under token refresh load, per engine profile.
+
+The old profile is the one SQLite used to share with PostgreSQL: a large pool
+with overflow, pre-ping and SQLite's default journal. The new profile is the
+one `app.database.session` builds for SQLite: WAL, synchronous=NORMAL, a busy
+timeout, memory-mapped I/O and a small pool. Every profile gets a fresh
+database file, in which `--tasks` concurrent tasks each store `--writes`
+refreshed tokens, one transaction each, as the token writer does.
+
+    uv run python -m benchmarks.sqlite_writes
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from seedrcc import Token
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from app.database import Account, User
+from app.database.models import Base
+from app.database.repository import AccountRepository
+from app.database.session import _engine_options, _set_sqlite_pragmas, make_async_db_url
+from benchmarks.common import latency_summary
+
+
+def _old_engine(db_url: str) -> AsyncEngine:
+    return create_async_engine(
+        make_async_db_url(db_url), pool_size=20, max_overflow=30, pool_timeout=30, pool_pre_ping=True
+    )
+
+
+def _new_engine(db_url: str) -> AsyncEngine:
+    engine = create_async_engine(make_async_db_url(db_url), **_engine_options(db_url))
+    event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+    return engine
+
+
+async def _seed(engine: AsyncEngine, accounts: int) -> list[tuple[int, int]]:
+    """Creates the schema and `accounts` accounts. Returns their account and user IDs."""
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        users = [User(telegram_id=index, username=f"user{index}") for index in range(accounts)]
+        session.add_all(users)
+        await session.flush()
+        rows = [
+            Account(user_id=user.id, seedr_account_id=str(user.telegram_id), token=Token("access").to_base64())
+            for user in users
+        ]
+        session.add_all(rows)
+        await session.commit()
+        return [(row.id, row.user_id) for row in rows]
+
+
+async def _run(engine: AsyncEngine, tasks: int, writes: int) -> tuple[list[float], int, float]:
+    """Runs the token refreshes. Returns the latencies of the writes, the failed writes and the total duration."""
+    accounts = await _seed(engine, tasks)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    latencies = []
+    failures = 0
+
+    async def refresh_tokens(account_id: int, user_id: int) -> None:
+        nonlocal failures
+        for write in range(writes):
+            token = Token(f"access-{write}", "refresh").to_base64()
+            started = time.perf_counter()
+            try:
+                async with session_factory() as session:
+                    await AccountRepository(session).update_token(account_id, user_id, token)
+                    await session.commit()
+            except OperationalError:
+                failures += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    async with asyncio.TaskGroup() as group:
+        for account_id, user_id in accounts:
+            group.create_task(refresh_tokens(account_id, user_id))
+    return latencies, failures, time.perf_counter() - started
+
+
+async def benchmark(tasks: int, writes: int) -> None:
+    throughput = {}
+    for name, make_engine in (("old profile", _old_engine), ("new profile", _new_engine)):
+        with tempfile.TemporaryDirectory() as directory:
+            engine = make_engine(f"sqlite:///{Path(directory) / 'benchmark.db'}")
+            try:
+                latencies, failures, duration = await _run(engine, tasks, writes)
+            finally:
+                await engine.dispose()
+
+        throughput[name] = len(latencies) / duration
+        print(f"{name}: {throughput[name]:8.1f} writes/s  write {latency_summary(latencies)}  {failures} failed")
+
+    print(f"{throughput['new profile'] / throughput['old profile']:.1f}x the writes per second")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark SQLite write throughput per engine profile.")
+    parser.add_argument("--tasks", type=int, default=200, help="Accounts refreshing their token concurrently")
+    parser.add_argument("--writes", type=int, default=10, help="Tokens stored by every task")
+    args = parser.parse_args()
+
+    asyncio.run(benchmark(args.tasks, args.writes))
+
+
+if __name__ == "__main__":
+    main()
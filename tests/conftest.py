@@ -0,0 +1,353 @@
+"""Shared test setup: settings, an in-memory database, fake Telegram events and a fake Seedr API."""
+
+import asyncio
+import functools
+import itertools
+import os
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from cryptography.fernet import Fernet
+
+# Settings are read when the app is imported, so they have to be in place first
+os.environ.setdefault("TELEGRAM_API_ID", "1")
+os.environ.setdefault("TELEGRAM_API_HASH", "test")
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "test")
+os.environ.setdefault("ENCRYPTION_KEY", Fernet.generate_key().decode())
+# Never touch a real database, whatever .env says
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+# Tests send messages much faster than Telegram allows
+os.environ["OUTBOX_GLOBAL_RATE"] = "100000"
+os.environ["OUTBOX_CHAT_RATE"] = "100000"
+
+from seedrcc import AsyncSeedr, Token, models  # noqa: E402
+from telethon import events  # noqa: E402
+
+from app.database import Account, User, UserRecord, get_session, init_db, user_cache  # noqa: E402
+from app.database.query_stats import QueryStats  # noqa: E402
+
+# Telegram, database and Seedr IDs, unique across tests so no cache carries over between them
+_ids = itertools.count(1000)
+
+
+class FakeClient:
+    """Telegram client of fake events, accepting any raw request."""
+
+    def __init__(self):
+        self.requests = []
+
+    async def __call__(self, request):
+        self.requests.append(request)
+
+
+class FakeMessage:
+    """A message the bot sent, or one a user sent to it."""
+
+    def __init__(self, chat_id: int, text: str = "", file: Any = None):
+        self.chat_id = chat_id
+        self.id = next(_ids)
+        self.text = self.message = text
+        self.file = file
+        self.edits: list[str] = []
+
+    async def edit(self, message: str, **kwargs) -> FakeMessage:
+        self.edits.append(message)
+        return self
+
+    async def delete(self) -> None:
+        pass
+
+    async def download_media(self, file: Any = None) -> bytes:
+        return b"d8:announce0:e"
+
+
+class FakeNewMessage(events.NewMessage.Event):
+    """An incoming message event, without a connection to Telegram."""
+
+    # Plain attributes in place of the properties Telethon reads from the update
+    client = chat_id = sender_id = sender = None
+
+    def __init__(self, user: UserRecord, text: str, file: Any = None):
+        # Lets the attributes below be set on the event rather than on its message
+        self.__dict__["_init"] = False
+        self.client = FakeClient()
+        self.chat_id = self.sender_id = user.telegram_id
+        self.sender = None
+        self.message = FakeMessage(self.chat_id, text, file)
+        self.id = self.message.id
+        self.replies: list[FakeMessage] = []
+
+    async def respond(self, message: str, **kwargs) -> FakeMessage:
+        reply = FakeMessage(self.chat_id, message)
+        self.replies.append(reply)
+        return reply
+
+    async def get_input_sender(self) -> None:
+        return None
+
+
+class FakeCallbackQuery(events.CallbackQuery.Event):
+    """A button click event, without a connection to Telegram."""
+
+    client = chat_id = sender_id = sender = message_id = data = None
+
+    def __init__(self, user: UserRecord):
+        self.client = FakeClient()
+        self.chat_id = self.sender_id = user.telegram_id
+        self.sender = None
+        self.message_id = next(_ids)
+        self.data = b""
+        self.edits: list[str] = []
+        self.answers: list[str | None] = []
+        self.replies: list[FakeMessage] = []
+
+    async def edit(self, message: str, **kwargs) -> FakeMessage:
+        self.edits.append(message)
+        return FakeMessage(self.chat_id, message)
+
+    async def answer(self, message: str | None = None, **kwargs) -> None:
+        self.answers.append(message)
+
+    async def respond(self, message: str, **kwargs) -> FakeMessage:
+        reply = FakeMessage(self.chat_id, message)
+        self.replies.append(reply)
+        return reply
+
+    async def delete(self) -> None:
+        pass
+
+    async def get_input_sender(self) -> None:
+        return None
+
+
+class FakeConversation:
+    """A conversation in which the user sends `answers` in turn."""
+
+    def __init__(self, chat_id: int, answers: list[str]):
+        self.chat_id = chat_id
+        self._answers = iter(answers)
+
+    async def respond(self, message: str, **kwargs) -> FakeMessage:
+        return FakeMessage(self.chat_id, message)
+
+    async def get_response(self) -> FakeMessage:
+        return FakeMessage(self.chat_id, next(self._answers))
+
+    def cancel(self) -> None:
+        pass
+
+
+@dataclass
+class FakeSeedr:
+    """
+    Stands in for the Seedr API of one Seedr account and records the calls made to it.
+
+    The root folder holds a torrent, a video and a sub folder with another video.
+    """
+
+    seedr_account_id: str
+    calls: list[str] = field(default_factory=list)
+    # While set, the statements it counted so far are recorded at every call
+    stats: QueryStats | None = None
+    statements_at_calls: list[int] = field(default_factory=list)
+
+    def folder(self, folder_id: str = "0") -> models.ListContentsResult:
+        now = datetime(2026, 1, 1)
+        if folder_id != "0":
+            return models.ListContentsResult(
+                id=int(folder_id),
+                name="Sub folder",
+                fullname="Sub folder",
+                size=0,
+                last_update=now,
+                is_shared=False,
+                play_audio=False,
+                play_video=True,
+                files=[self._video(31, int(folder_id))],
+            )
+
+        sub_folder = models.Folder(
+            id=20,
+            name="Sub folder",
+            fullname="Sub folder",
+            size=0,
+            last_update=now,
+            is_shared=False,
+            play_audio=False,
+            play_video=True,
+        )
+        torrent = models.Torrent(id=40, name="Downloading", size=100, hash="abc", progress="50", last_update=now)
+        return models.ListContentsResult(
+            id=0,
+            name="Root",
+            fullname="Root",
+            size=0,
+            last_update=now,
+            is_shared=False,
+            play_audio=False,
+            play_video=True,
+            folders=[sub_folder],
+            files=[self._video(30, 0)],
+            torrents=[torrent],
+        )
+
+    def settings(self) -> models.UserSettings:
+        return models.UserSettings(
+            result=True,
+            code=200,
+            settings=models.AccountSettings(
+                allow_remote_access=False,
+                site_language="en",
+                subtitles_language="en",
+                email_announcements=False,
+                email_newsletter=False,
+            ),
+            account=models.AccountInfo(
+                username="seedr-user",
+                user_id=int(self.seedr_account_id),
+                premium=0,
+                package_id=0,
+                package_name="Free",
+                space_used=0,
+                space_max=1024,
+                bandwidth_used=0,
+                email="user@example.com",
+                wishlist=[],
+                invites=0,
+                invites_accepted=0,
+            ),
+            country="NP",
+        )
+
+    def install(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Answer every Seedr API call of the app from this fake."""
+        results = {
+            "list_contents": lambda folder_id="0": self.folder(folder_id),
+            "get_settings": self.settings,
+            "fetch_file": lambda file_id: models.FetchFileResult(
+                result=True, url=f"https://seedr.example/{file_id}.mp4", name=f"{file_id}.mp4"
+            ),
+            "create_archive": lambda folder_id: models.CreateArchiveResult(
+                result=True, archive_id=1, archive_url=f"https://seedr.example/{folder_id}.zip"
+            ),
+            "add_torrent": lambda *args, **kwargs: models.AddTorrentResult(
+                result=True, user_torrent_id=41, title="Added"
+            ),
+            "delete_file": lambda file_id: models.APIResult(result=True),
+            "delete_folder": lambda folder_id: models.APIResult(result=True),
+            "delete_torrent": lambda torrent_id: models.APIResult(result=True),
+        }
+        for name, result in results.items():
+            monkeypatch.setattr(AsyncSeedr, name, self._method(name, result))
+
+        # A client that just logged in, of which the login handlers only use the token and settings
+        logged_in = SimpleNamespace(
+            token=Token("access", "refresh"),
+            get_settings=functools.partial(self._method("get_settings", self.settings), None),
+        )
+        device_code = models.DeviceCode(
+            expires_in=600,
+            interval=5,
+            device_code="device",
+            user_code="USER",
+            verification_url="https://seedr.example/devices",
+        )
+        monkeypatch.setattr(AsyncSeedr, "from_password", self._classmethod("from_password", logged_in))
+        monkeypatch.setattr(AsyncSeedr, "from_device_code", self._classmethod("from_device_code", logged_in))
+        monkeypatch.setattr(AsyncSeedr, "get_device_code", self._classmethod("get_device_code", device_code))
+
+    def _video(self, file_id: int, folder_id: int) -> models.File:
+        return models.File(
+            file_id=file_id,
+            name=f"{file_id}.mp4",
+            size=1024,
+            folder_id=folder_id,
+            folder_file_id=file_id,
+            hash="hash",
+            play_video=True,
+        )
+
+    def _method(self, name: str, result):
+        async def call(client: AsyncSeedr | None, *args, **kwargs):
+            self.calls.append(name)
+            if self.stats is not None:
+                self.statements_at_calls.append(self.stats.statements)
+            return result(*args, **kwargs)
+
+        return call
+
+    def _classmethod(self, name: str, result):
+        async def call(cls, *args, **kwargs):
+            self.calls.append(name)
+            return result
+
+        return classmethod(call)
+
+
+@dataclass
+class Scenario:
+    """A user with two Seedr accounts, the first of them active, and the Seedr API behind them."""
+
+    user: UserRecord
+    accounts: list[Account]
+    seedr: FakeSeedr
+
+    def message(self, text: str, file: Any = None) -> FakeNewMessage:
+        return FakeNewMessage(self.user, text, file)
+
+    def callback(self) -> FakeCallbackQuery:
+        return FakeCallbackQuery(self.user)
+
+    def conversation(self, answers: list[str]):
+        @asynccontextmanager
+        async def conversation(*args, **kwargs):
+            yield FakeConversation(self.user.telegram_id, answers)
+
+        return conversation
+
+
+@pytest.fixture(autouse=True)
+async def _cancel_leftover_tasks():
+    """Stop background work started by a test, e.g. live progress polling, before the next test."""
+    before = asyncio.all_tasks()
+    yield
+    leftover = asyncio.all_tasks() - before - {asyncio.current_task()}
+    for task in leftover:
+        task.cancel()
+    await asyncio.gather(*leftover, return_exceptions=True)
+
+
+@pytest.fixture
+async def database():
+    await init_db()
+
+
+@pytest.fixture
+async def scenario(database, monkeypatch: pytest.MonkeyPatch) -> Scenario:
+    """A fresh scenario, with the user already in the user cache."""
+    seedr_account_id = str(next(_ids))
+    async with get_session() as session:
+        user = User(telegram_id=next(_ids), username="tester")
+        session.add(user)
+        await session.flush()
+
+        accounts = [
+            Account(user_id=user.id, seedr_account_id=seedr_account_id, token=Token("a", "r").to_base64(), email=email)
+            for email in ("first@example.com", "second@example.com")
+        ]
+        # Each account is a separate Seedr account
+        accounts[1].seedr_account_id = str(next(_ids))
+        session.add_all(accounts)
+        await session.flush()
+        user.default_account_id = accounts[0].id
+
+    record = UserRecord.from_model(user)
+    user_cache.set(record, user_cache.generation)
+
+    seedr = FakeSeedr(seedr_account_id)
+    seedr.install(monkeypatch)
+    return Scenario(record, accounts, seedr)
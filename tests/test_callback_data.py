@@ -0,0 +1,115 @@
+"""Tests for the encoding of inline button callback data."""
+
+import pytest
+
+from app.bot import callback_data
+from app.bot.callback_data import MAX_CALLBACK_DATA_SIZE, CallbackStateStore, Op, decode_callback, encode_callback
+from app.bot.router import CallbackRouter
+from app.exceptions import CallbackDataExpiredError
+from app.utils.language import get_language_service
+
+# Parameters of a typical button of every action
+_PARAMS: dict[Op, tuple[str | None, ...]] = {
+    Op.FOLDER: ("123456789", "98765432", "2"),
+    Op.FILE: ("123456789", None),
+    Op.FOLDER_LINK: ("123456789",),
+    Op.FILE_LINK: ("123456789",),
+    Op.DELETE_FOLDER: ("123456789",),
+    Op.DELETE_FILE: ("123456789",),
+    Op.PLAYLIST: ("xspf", "folder", "123456789"),
+    Op.ACTIVE_DOWNLOAD: ("123456789",),
+    Op.CANCEL_DOWNLOAD: ("123456789",),
+    Op.SWITCH_ACCOUNT: ("12",),
+    Op.LOGOUT_ACCOUNT: ("12",),
+    Op.CONFIRM_LOGOUT: ("12",),
+    Op.CANCEL_LOGOUT: (),
+    Op.LOGIN: (),
+    Op.LOGIN_EMAIL: (),
+    Op.AUTHORIZE_DEVICE: (),
+    Op.AUTH_COMPLETE: ("a1b2c3d4e5f6",),
+    Op.LIVE_DOWNLOADS: (None,),
+}
+
+
+@pytest.fixture
+def store(monkeypatch: pytest.MonkeyPatch) -> CallbackStateStore:
+    """A store of a single entry in place of the shared one."""
+    store = CallbackStateStore(max_size=1)
+    monkeypatch.setattr(callback_data, "callback_store", store)
+    return store
+
+
+@pytest.mark.parametrize("op", list(Op), ids=lambda op: op.name)
+def test_every_action_round_trips(op: Op):
+    data = encode_callback(op, *_PARAMS[op])
+
+    assert len(data) <= MAX_CALLBACK_DATA_SIZE
+    assert decode_callback(data) == (op, _PARAMS[op])
+
+
+def test_strings_that_are_not_plain_numbers_round_trip():
+    params = ("007", "-1", "название", "")
+
+    assert decode_callback(encode_callback(Op.PLAYLIST, *params)) == (Op.PLAYLIST, params)
+
+
+@pytest.mark.parametrize(
+    ("data", "expected"),
+    [
+        ("folder_123456789_page_2_parent_98765432", (Op.FOLDER, ("123456789", "98765432", "2"))),
+        ("folder_123456789", (Op.FOLDER, ("123456789", None, "1"))),
+        ("file_123456789_parent_98765432", (Op.FILE, ("123456789", "98765432"))),
+        ("file_123456789", (Op.FILE, ("123456789", None))),
+        ("folder_link_123456789", (Op.FOLDER_LINK, ("123456789",))),
+        ("file_link_123456789", (Op.FILE_LINK, ("123456789",))),
+        ("delete_folder_123456789", (Op.DELETE_FOLDER, ("123456789",))),
+        ("delete_file_123456789", (Op.DELETE_FILE, ("123456789",))),
+        ("playlist_xspf_folder_123456789", (Op.PLAYLIST, ("xspf", "folder", "123456789"))),
+        ("active_123456789", (Op.ACTIVE_DOWNLOAD, ("123456789",))),
+        ("cancel_download_123456789", (Op.CANCEL_DOWNLOAD, ("123456789",))),
+        ("switch_account_12", (Op.SWITCH_ACCOUNT, ("12",))),
+        ("logout_account_12", (Op.LOGOUT_ACCOUNT, ("12",))),
+        ("confirm_logout_12", (Op.CONFIRM_LOGOUT, ("12",))),
+        ("cancel_logout", (Op.CANCEL_LOGOUT, ())),
+        ("login", (Op.LOGIN, ())),
+        ("login_email", (Op.LOGIN_EMAIL, ())),
+        ("authorize_device", (Op.AUTHORIZE_DEVICE, ())),
+        ("auth_complete_a1b2c3d4e5f6", (Op.AUTH_COMPLETE, ("a1b2c3d4e5f6",))),
+    ],
+)
+def test_legacy_data_is_decoded(data: str, expected: tuple):
+    assert decode_callback(data.encode()) == expected
+
+
+@pytest.mark.parametrize("data", [b"", b"unknown_123", b"\x01\xff", b"\xff\xfe"])
+def test_unknown_data_is_not_decoded(data: bytes):
+    assert decode_callback(data) is None
+
+
+def test_data_over_the_limit_is_kept_in_the_store(store):
+    params = ("xspf", "a" * MAX_CALLBACK_DATA_SIZE, "123456789")
+    data = encode_callback(Op.PLAYLIST, *params)
+
+    assert len(data) <= MAX_CALLBACK_DATA_SIZE
+    assert len(store) == 1
+    assert decode_callback(data) == (Op.PLAYLIST, params)
+
+
+def test_evicted_data_has_expired(store):
+    data = encode_callback(Op.PLAYLIST, "xspf", "a" * MAX_CALLBACK_DATA_SIZE, "1")
+    encode_callback(Op.PLAYLIST, "xspf", "b" * MAX_CALLBACK_DATA_SIZE, "1")
+
+    with pytest.raises(CallbackDataExpiredError):
+        decode_callback(data)
+
+
+async def test_expired_button_is_answered(scenario, store):
+    """Clicking a button whose data was evicted tells the user to open the menu again."""
+    event = scenario.callback()
+    event.data = encode_callback(Op.PLAYLIST, "xspf", "a" * MAX_CALLBACK_DATA_SIZE, "1")
+    encode_callback(Op.PLAYLIST, "xspf", "b" * MAX_CALLBACK_DATA_SIZE, "1")
+
+    await CallbackRouter().dispatch(event)
+
+    translator = get_language_service().get_translator(scenario.user.language)
+    assert event.answers == [translator.get("buttonExpired")]
@@ -0,0 +1,26 @@
+"""Tests for the dependency injection of setup_handler."""
+
+import pytest
+
+from app.bot.handlers.callbacks.navigation import folder_callback
+from app.bot.handlers.commands.files import files_handler
+from app.database import user_cache
+from app.database.query_stats import track_queries
+
+
+@pytest.mark.parametrize("cached", [True, False], ids=["user cached", "user not cached"])
+@pytest.mark.parametrize("handler", ["command", "callback"])
+async def test_one_round_trip_before_seedr(scenario, handler: str, cached: bool):
+    """The user and their active account are resolved with a single statement before Seedr is called."""
+    if not cached:
+        user_cache.invalidate({scenario.user.id})
+
+    with track_queries() as stats:
+        scenario.seedr.stats = stats
+        if handler == "command":
+            await files_handler(scenario.message("/files"))
+        else:
+            await folder_callback(scenario.callback(), params=("0", None, "1"))
+
+    assert scenario.seedr.calls == ["list_contents"]
+    assert scenario.seedr.statements_at_calls[0] <= 1
@@ -0,0 +1,150 @@
+"""
+Database statement budgets of the handlers.
+
+Every handler is run against the in-memory database, with the user already in
+the user cache, and must run exactly the number of statements pinned below. A
+change that adds a query to a handler has to update its budget on purpose.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+import pytest
+
+from app.bot.handlers.callbacks import email_auth
+from app.bot.handlers.callbacks.account_management import (
+    cancel_logout_callback,
+    confirm_logout_account_callback,
+    logout_account_callback,
+    switch_account_callback,
+)
+from app.bot.handlers.callbacks.active_downloads import (
+    active_download_callback,
+    cancel_download_callback,
+    live_downloads_callback,
+)
+from app.bot.handlers.callbacks.delete import delete_file_callback, delete_folder_callback
+from app.bot.handlers.callbacks.device_auth import auth_complete_callback, authorize_device_callback
+from app.bot.handlers.callbacks.link import file_link_callback, folder_link_callback
+from app.bot.handlers.callbacks.navigation import file_callback, folder_callback
+from app.bot.handlers.callbacks.playlist import playlist_callback
+from app.bot.handlers.commands.accounts import accounts_handler
+from app.bot.handlers.commands.active import active_handler
+from app.bot.handlers.commands.files import files_handler
+from app.bot.handlers.commands.info import info_handler
+from app.bot.handlers.commands.login import login_handler
+from app.bot.handlers.commands.signup import signup_handler
+from app.bot.handlers.commands.start import start_handler
+from app.bot.handlers.messages.add_torrent import add_torrent_handler, handle_torrent_file
+from app.bot.handlers.messages.text_message import text_message_handler
+from app.database.query_stats import track_queries
+from app.utils.language import get_language_service
+
+translator = get_language_service().get_translator("en")
+
+
+@dataclass(frozen=True)
+class Case:
+    """A handler, how to call it in a scenario, and the statements it may run."""
+
+    handler: Callable
+    call: Callable[[Any], tuple[Any, dict]]
+    statements: int
+    # Seedr API calls the handler has to make, to check it got past its database work
+    seedr_calls: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class FileInfo:
+    """The file of an uploaded document, as far as the handlers look at it."""
+
+    size: int
+
+
+def _params(*params: str | int | None) -> dict:
+    return {"params": tuple(None if param is None else str(param) for param in params)}
+
+
+CASES = {
+    # Commands
+    "start": Case(start_handler, lambda s: (s.message("/start"), {}), 0),
+    "login": Case(login_handler, lambda s: (s.message("/login"), {}), 0),
+    "signup": Case(signup_handler, lambda s: (s.message("/signup"), {}), 0),
+    "info": Case(info_handler, lambda s: (s.message("/info"), {}), 1, ("get_settings",)),
+    "accounts": Case(accounts_handler, lambda s: (s.message("/accounts"), {}), 2),
+    "files": Case(files_handler, lambda s: (s.message("/files"), {}), 1, ("list_contents",)),
+    "active": Case(active_handler, lambda s: (s.message("/active"), {}), 1, ("list_contents",)),
+    # Messages
+    "add_torrent": Case(
+        add_torrent_handler,
+        lambda s: (s.message("magnet:?xt=urn:btih:abc"), {}),
+        1,
+        ("add_torrent",),
+    ),
+    "torrent_file": Case(
+        handle_torrent_file,
+        lambda s: (s.message("", file=FileInfo(size=1024)), {}),
+        1,
+        ("add_torrent",),
+    ),
+    "keyboard_button": Case(
+        text_message_handler,
+        lambda s: (s.message(translator.get("fileManagerBtn")), {}),
+        1,
+        ("list_contents",),
+    ),
+    # Accounts
+    "switch_account": Case(switch_account_callback, lambda s: (s.callback(), _params(s.accounts[1].id)), 6),
+    "logout_account": Case(logout_account_callback, lambda s: (s.callback(), _params(s.accounts[1].id)), 2),
+    "confirm_logout": Case(confirm_logout_account_callback, lambda s: (s.callback(), _params(s.accounts[1].id)), 5),
+    "cancel_logout": Case(cancel_logout_callback, lambda s: (s.callback(), _params()), 2),
+    "authorize_device": Case(authorize_device_callback, lambda s: (s.callback(), _params()), 0, ("get_device_code",)),
+    # Logging in again to the active account
+    "auth_complete": Case(
+        auth_complete_callback, lambda s: (s.callback(), _params("device")), 3, ("from_device_code", "get_settings")
+    ),
+    "login_email": Case(
+        email_auth.login_email_callback,
+        lambda s: (s.callback(), _params()),
+        3,
+        ("from_password", "get_settings"),
+    ),
+    # Files
+    "folder": Case(folder_callback, lambda s: (s.callback(), _params("0", None, 1)), 1, ("list_contents",)),
+    "file": Case(file_callback, lambda s: (s.callback(), _params(30, "0")), 1, ("list_contents",)),
+    "file_link": Case(file_link_callback, lambda s: (s.callback(), _params(30)), 1, ("fetch_file",)),
+    "folder_link": Case(folder_link_callback, lambda s: (s.callback(), _params(20)), 1, ("create_archive",)),
+    "delete_file": Case(delete_file_callback, lambda s: (s.callback(), _params(30)), 1, ("delete_file",)),
+    "delete_folder": Case(delete_folder_callback, lambda s: (s.callback(), _params(20)), 1, ("delete_folder",)),
+    "playlist": Case(
+        playlist_callback,
+        lambda s: (s.callback(), _params("xspf", "folder", "root")),
+        3,
+        ("list_contents", "fetch_file"),
+    ),
+    # The user's current format is not written again
+    "playlist_same_format": Case(
+        playlist_callback,
+        lambda s: (s.callback(), _params(s.user.playlist_format, "folder", "root")),
+        1,
+        ("list_contents", "fetch_file"),
+    ),
+    # Active downloads
+    "active_download": Case(active_download_callback, lambda s: (s.callback(), _params(40)), 1, ("list_contents",)),
+    "cancel_download": Case(cancel_download_callback, lambda s: (s.callback(), _params(40)), 1, ("delete_torrent",)),
+    "live_downloads": Case(live_downloads_callback, lambda s: (s.callback(), _params(None)), 1),
+}
+
+
+@pytest.mark.parametrize("case", CASES.values(), ids=CASES.keys())
+async def test_handler_query_budget(case: Case, scenario, monkeypatch: pytest.MonkeyPatch):
+    answers = ["user@example.com", "password", translator.get("noBtn")]
+    monkeypatch.setattr(email_auth.bot, "conversation", scenario.conversation(answers))
+    event, kwargs = case.call(scenario)
+
+    with track_queries() as stats:
+        await case.handler(event, **kwargs)
+
+    assert stats.statements == case.statements
+    assert set(case.seedr_calls) <= set(scenario.seedr.calls)
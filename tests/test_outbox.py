@@ -0,0 +1,41 @@
+"""Tests for the merging of edits and the per-chat budgets of the outbox."""
+
+import asyncio
+
+from app.bot import outbox as outbox_module
+from app.bot.outbox import Outbox
+from tests.conftest import FakeMessage
+
+
+def _outbox() -> Outbox:
+    return Outbox(global_rate=1000, chat_rate=20, chat_burst=1, max_flood_wait=10, tracked=100)
+
+
+async def test_merged_edit_is_sent_when_the_first_caller_is_cancelled():
+    """Cancelling the caller that started a pending edit neither fails the others nor drops the newest content."""
+    box = _outbox()
+    message = FakeMessage(chat_id=1)
+    # Spend the chat's budget, so that the edits wait for it and merge
+    box._chat_bucket(message.chat_id).reserve()
+
+    first = asyncio.create_task(box.edit(message, "first"))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(box.edit(message, "second"))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second is message
+    assert first.cancelled()
+    assert message.edits == ["second"]
+
+
+async def test_chat_budgets_are_capped(monkeypatch):
+    """The least recently used budgets are dropped beyond the cap, however busy they are."""
+    monkeypatch.setattr(outbox_module, "_MAX_CHAT_BUCKETS", 3)
+    box = _outbox()
+    for chat_id in range(5):
+        box._chat_bucket(chat_id).reserve()
+    box._chat_bucket(2)
+    box._chat_bucket(5)
+
+    assert list(box._chat_buckets) == [4, 2, 5]
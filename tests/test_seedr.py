@@ -0,0 +1,156 @@
+"""Tests for the shared Seedr client helpers."""
+
+import asyncio
+import itertools
+import time
+
+import pytest
+from seedrcc import AsyncSeedr, Token, models
+
+from app.config import settings
+from app.services.seedr import AccountSeedr, SeedrClientPool, inflight_calls, playlist_cache_ttl
+
+_ids = itertools.count(1)
+
+
+def _contents() -> models.ListContentsResult:
+    return models.ListContentsResult(
+        id=0,
+        name="",
+        fullname="",
+        size=0,
+        last_update=None,
+        is_shared=False,
+        play_audio=False,
+        play_video=False,
+    )
+
+
+@pytest.fixture
+async def clients():
+    """Clients of two logins of the same Seedr account."""
+    # Fresh accounts per test, so listings cached by other tests are never hit
+    seedr_account_id = f"seedr-{next(_ids)}"
+    clients = [AccountSeedr(next(_ids), seedr_account_id, token=Token("access")) for _ in range(2)]
+    yield clients
+    for client in clients:
+        await client.close()
+
+
+@pytest.fixture
+def upstream(monkeypatch: pytest.MonkeyPatch):
+    """Replaces the Seedr API call behind `list_contents` and records its calls."""
+    calls = []
+    release = asyncio.Event()
+    outcome: dict = {"result": _contents()}
+
+    async def list_contents(self, folder_id: str = "0") -> models.ListContentsResult:
+        calls.append(folder_id)
+        await release.wait()
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["result"]
+
+    monkeypatch.setattr(AsyncSeedr, "list_contents", list_contents)
+    return calls, release, outcome
+
+
+async def _start_callers(clients: list[AccountSeedr], count: int) -> list[asyncio.Task]:
+    tasks = [asyncio.create_task(clients[i % len(clients)].list_contents("0")) for i in range(count)]
+    # Let every caller reach the shared call before it finishes
+    await asyncio.sleep(0)
+    return tasks
+
+
+async def test_concurrent_reads_share_one_upstream_request(clients, upstream):
+    calls, release, outcome = upstream
+
+    tasks = await _start_callers(clients, 10)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert calls == ["0"]
+    assert all(result is outcome["result"] for result in results)
+    assert len(inflight_calls) == 0
+
+
+async def test_failure_reaches_every_waiter(clients, upstream):
+    calls, release, outcome = upstream
+    outcome["error"] = RuntimeError("Seedr is down")
+
+    tasks = await _start_callers(clients, 10)
+    release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert calls == ["0"]
+    assert all(isinstance(result, RuntimeError) and str(result) == "Seedr is down" for result in results)
+    assert len(inflight_calls) == 0
+
+
+def test_playlist_cache_ttl_is_capped_by_its_links():
+    expires = int(time.time()) + 60
+    links = ["https://seedr.example/1.mp4", f"https://seedr.example/2.mp4?e={expires}"]
+
+    assert playlist_cache_ttl(links[:1]) == settings.playlist_cache_ttl
+    assert playlist_cache_ttl(links) <= 60
+    assert playlist_cache_ttl([f"https://seedr.example/3.mp4?e={expires - 120}"]) <= 0
+
+
+async def test_concurrent_leases_after_token_change_share_one_client(monkeypatch: pytest.MonkeyPatch):
+    closed = []
+    close = AccountSeedr.close
+
+    async def slow_close(self):
+        # Closing the HTTP client yields to other tasks
+        await asyncio.sleep(0)
+        closed.append(self)
+        await close(self)
+
+    monkeypatch.setattr(AccountSeedr, "close", slow_close)
+    pool = SeedrClientPool(max_size=10, idle_ttl=3600)
+    account_id, seedr_account_id = next(_ids), f"seedr-{next(_ids)}"
+    async with pool.lease(account_id, seedr_account_id, 1, Token("old").to_base64()) as old_client:
+        pass
+
+    clients = []
+
+    async def lease():
+        async with pool.lease(account_id, seedr_account_id, 1, Token("new").to_base64()) as client:
+            clients.append(client)
+            await asyncio.sleep(0)
+
+    await asyncio.gather(lease(), lease())
+
+    assert clients[0] is clients[1]
+    assert closed == [old_client]
+    assert len(pool) == 1
+    await pool.close()
+
+
+async def test_link_fetched_across_a_folder_deletion_is_not_cached(clients, monkeypatch: pytest.MonkeyPatch):
+    calls = []
+    release = asyncio.Event()
+
+    async def fetch_file(self, file_id: str) -> models.FetchFileResult:
+        calls.append(file_id)
+        await release.wait()
+        return models.FetchFileResult(result=True, url=f"https://seedr.example/{len(calls)}.mp4", name="video.mp4")
+
+    async def delete_folder(self, folder_id: str) -> models.APIResult:
+        return models.APIResult(result=True)
+
+    monkeypatch.setattr(AsyncSeedr, "fetch_file", fetch_file)
+    monkeypatch.setattr(AsyncSeedr, "delete_folder", delete_folder)
+
+    before = asyncio.create_task(clients[0].fetch_file("1"))
+    await asyncio.sleep(0)
+    await clients[1].delete_folder("2")
+    after = asyncio.create_task(clients[1].fetch_file("1"))
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(before, after)
+
+    # The fetch after the deletion did not join the one before it, and only its link is cached
+    assert calls == ["1", "1"]
+    assert (await clients[0].fetch_file("1")).url == "https://seedr.example/2.mp4"
+    assert calls == ["1", "1"]